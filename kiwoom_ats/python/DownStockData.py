@@ -1,6 +1,7 @@
 import sqlite3
 import time
 
+import openpyxl
 import pandas as pd
 # from PyQt5 import uic
 # from PyQt5.QtWidgets import QMainWindow
@@ -36,10 +37,20 @@ def collect_stock_data(kiwoom, code, start_date):
                                  데이터개수=1000000,
                                  next=0)
     return data
-def save_to_database(code, data):
-    connection = sqlite3.connect('src/resources/backtest/stock_data.db')
-    cursor = connection.cursor()
-    cursor.execute('''
+HISTORY_DB_PATH = 'src/resources/backtest/stock_data.db'
+
+INSERT_SQL = '''
+    INSERT OR IGNORE INTO back_testing_stock_data
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def open_history_db(db_path=HISTORY_DB_PATH):
+    """백테스트 데이터 DB 를 열고 테이블, (stock_code, transaction_time) unique index 를 준비한다."""
+    connection = sqlite3.connect(db_path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('''
         CREATE TABLE IF NOT EXISTS back_testing_stock_data
         ( 
         stock_code TEXT,
@@ -58,31 +69,96 @@ def save_to_database(code, data):
         previous_day_closing_price INTEGER)
     ''')
 
+    has_index = connection.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_stock_code_transaction_time'
+    ''').fetchone()
+    if has_index is None:
+        with connection:
+            # 기존 중복 데이터를 정리해야 unique index 를 만들 수 있다.
+            connection.execute('''
+                DELETE FROM back_testing_stock_data WHERE rowid NOT IN (
+                    SELECT MIN(rowid) FROM back_testing_stock_data
+                    GROUP BY stock_code, transaction_time)
+            ''')
+            connection.execute('''
+                CREATE UNIQUE INDEX ux_stock_code_transaction_time
+                ON back_testing_stock_data (stock_code, transaction_time)
+            ''')
+    return connection
+
+
+def to_db_row(code, data):
+    return (str(code),
+            data['현재가'],
+            data['거래량'],
+            int(data['체결시간']),
+            int(data['시가']),
+            int(data['고가']),
+            int(data['저가']),
+            data['수정주가구분'],
+            data['수정비율'],
+            data['대업종구분'],
+            data['소업종구분'],
+            data['종목정보'],
+            data['수정주가이벤트'],
+            data['전일종가'])
+
+
+def read_chunks(file_path, chunk_size):
+    """엑셀/CSV 파일을 chunk_size 행씩 dict 목록으로 읽는다. 파일 전체를 메모리에 올리지 않는다."""
+    if file_path.lower().endswith('.csv'):
+        for df in pd.read_csv(file_path, chunksize=chunk_size):
+            yield df.to_dict('records')
+        return
+
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows)
+        chunk = []
+        for values in rows:
+            chunk.append({name: value for name, value in zip(header, values) if name is not None})
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        wb.close()
+
+
+def ingest_file(code, file_path, db_path=HISTORY_DB_PATH, chunk_size=50000):
+    """분봉 파일을 한 번에 적재한다.
+
+    chunk 단위로 executemany + 트랜잭션 하나로 쓰고, 이미 있는 (종목코드, 체결시간) 은 무시하므로
+    같은 파일을 여러 번 적재해도 결과가 같다.
+
+    Returns:
+        (읽은 행 수, 새로 추가된 행 수)
+    """
+    connection = open_history_db(db_path)
+    started = time.perf_counter()
+    total = 0
+    inserted = 0
+    try:
+        for chunk in read_chunks(file_path, chunk_size):
+            rows = [to_db_row(code, data) for data in chunk]
+            before = connection.total_changes
+            with connection:
+                connection.executemany(INSERT_SQL, rows)
+            inserted += connection.total_changes - before
+            total += len(rows)
+            elapsed = time.perf_counter() - started
+            print(f"{code}: {total}건 처리, {inserted}건 추가 ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        connection.close()
+    return total, inserted
 
-    cursor.execute('''
-        SELECT * FROM back_testing_stock_data WHERE stock_code = ? AND transaction_time = ?
-    ''', (code, data['체결시간']))
-    rows = cursor.fetchall()
-
-    if len(rows) == 0:
-        cursor.execute('''
-            INSERT INTO back_testing_stock_data 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (str(code),
-              data['현재가'],
-              data['거래량'],
-              int(data['체결시간']),
-              int(data['시가']),
-              int(data['고가']),
-              int(data['저가']),
-              data['수정주가구분'],
-              data['수정비율'],
-              data['대업종구분'],
-              data['소업종구분'],
-              data['종목정보'],
-              data['수정주가이벤트'],
-              data['전일종가']))
-        connection.commit()
+
+def save_to_database(code, data):
+    connection = open_history_db()
+    with connection:
+        connection.execute(INSERT_SQL, to_db_row(code, data))
     connection.close()
 
 def main():
@@ -121,10 +197,7 @@ def main():
 if __name__ == "__main__":
     # main()
     stock_code = "233740"
-    data = pd.read_excel('src/resources/backtest/test_233740.XLSX')
-
-    for index, row in data.iterrows():
-        save_to_database(stock_code, row.to_dict())
+    ingest_file(stock_code, 'src/resources/backtest/test_233740.XLSX')
 
     # app = QApplication(sys.argv)
     # myWindow = tradesystem()
@@ -0,0 +1,210 @@
+'''벤치마크용 가짜 PyQt5 / 키움 OpenAPI 컨트롤.
+
+리눅스에서 KiwoomDAO 를 그대로 import 할 수 있도록 PyQt5 모듈을 sys.modules 에 끼워 넣는다.
+OCX 는 CommRqData 를 받으면 OnReceiveTrData 이벤트를 이벤트 큐에 넣고, QEventLoop.exec_ / QTest.qWait 이
+그 큐를 처리한다. 실제 서버 지연은 없으므로 측정값은 DAO/스케줄러/registry 의 순수 처리 비용이다.
+
+조회 TR(CommRqData, CommKwRqData)은 실제 서버처럼 rate_limits(기본 1초 5회, 1시간 1000회)를 최근 호출
+시각으로 세어서, 넘으면 이벤트 없이 -200(시세 과부하)을 반환한다. 벤치마크는 rate_limits 를 비워서 끈다.
+'''
+import bisect
+import collections
+import heapq
+import itertools
+import sys
+import time
+import types
+
+_events = collections.deque()  # Qt 이벤트 큐 흉내
+_timers = list()  # (실행 시각, 순번, 함수) heap
+_timer_seq = itertools.count()
+
+
+def post_event(callback, delay: float = 0.0):
+    if delay <= 0:
+        _events.append(callback)
+    else:
+        heapq.heappush(_timers, (time.monotonic() + delay, next(_timer_seq), callback))
+
+
+def process_events():
+    '''지금 쌓여 있는 이벤트와 실행 시각이 지난 타이머를 처리한다. 처리한 개수 반환
+    '''
+    processed = 0
+    now = time.monotonic()
+    while _timers.__len__() > 0 and _timers[0][0] <= now:
+        heapq.heappop(_timers)[2]()
+        processed += 1
+    for _ in range(_events.__len__()):
+        _events.popleft()()
+        processed += 1
+    return processed
+
+
+class _Signal():
+    def __init__(self):
+        self.__slots = list()
+
+    def connect(self, slot):
+        self.__slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.__slots:
+            slot(*args)
+
+
+class QEventLoop():
+    def __init__(self):
+        self.__running = False
+
+    def exec_(self):
+        self.__running = True
+        while self.__running:
+            if process_events() == 0:
+                time.sleep(0)
+        return 0
+
+    def exit(self, code: int = 0):
+        self.__running = False
+
+    quit = exit
+
+
+class QTimer():
+    @staticmethod
+    def singleShot(msec: int, callback):
+        post_event(callback, msec / 1000)
+
+
+class QTest():
+    @staticmethod
+    def qWait(msec: int):
+        deadline = time.monotonic() + msec / 1000
+        while True:
+            process_events()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 0.001))
+
+
+class QApplication():
+    def __init__(self, *args):
+        pass
+
+    def exit(self, code: int = 0):
+        pass
+
+
+class FakeOpenAPI():
+    '''KHOPENAPI.KHOpenAPICtrl.1 흉내. dynamicCall 로 들어온 호출 수를 calls 에 센다.
+
+    조회 제한을 넘어 거절된 조회는 calls["overloaded"] 에, 받아들인 조회의 시각은 accepted 에 남는다.
+    '''
+    prices = dict()  # 종목코드 -> 현재가, GetCommData/GetCommRealData 응답에 사용
+    OVERLOAD = -200
+    rate_limits = ((5, 1.0), (1000, 3600.0))  # (횟수, 초) 구간마다 허용하는 조회 수
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, *args):
+        self.OnEventConnect = _Signal()
+        self.OnReceiveTrData = _Signal()
+        self.OnReceiveRealData = _Signal()
+        self.OnReceiveMsg = _Signal()
+        self.OnReceiveChejanData = _Signal()
+        self.calls = collections.Counter()
+        self.accepted = list()  # 받아들인 조회 TR 의 시각
+        self.__inputs = dict()
+        self.__kw_codes = list()  # 처리 중인 관심종목 응답의 종목 목록
+
+    def dynamicCall(self, signature: str, *args):
+        name = signature.split("(", 1)[0]
+        self.calls[name] += 1
+        return getattr(self, "_" + name, self._default)(*args)
+
+    def _default(self, *args):
+        return 0
+
+    def _GetConnectState(self):
+        return 1
+
+    def _SetInputValue(self, key, value):
+        self.__inputs[key] = value
+
+    def _CommRqData(self, rq_name, tr_code, prev_next, scr_no):
+        if not self.__admit():
+            return self.OVERLOAD
+        post_event(lambda: self.OnReceiveTrData.emit(scr_no, rq_name, tr_code, prev_next))
+        return 0
+
+    def _CommKwRqData(self, codes, prev_next, count, type_flag, rq_name, scr_no):
+        if not self.__admit():
+            return self.OVERLOAD
+
+        def receive():
+            self.__kw_codes = codes.split(";")
+            self.OnReceiveTrData.emit(scr_no, rq_name, "OPTKWFID", "0")
+        post_event(receive)
+        return 0
+
+    def _GetRepeatCnt(self, tr_code, rq_name):
+        if tr_code == "OPTKWFID":
+            return self.__kw_codes.__len__()
+        return 1
+
+    def _GetCommData(self, tr_code, rq_name, index, field):
+        if tr_code == "OPTKWFID":
+            code = self.__kw_codes[index]
+            if field == "종목코드":
+                return code
+            return f"-{self.prices.get(code, 10000)}"
+        if field == "예수금":
+            return "000000100000000"
+        return f"+{self.prices.get(self.__inputs.get('종목코드'), 10000)}"
+
+    def _GetCommRealData(self, stock_code, fid):
+        return f"-{self.prices.get(stock_code, 10000)}"
+
+    def _GetMasterCodeName(self, stock_code):
+        return f"종목{stock_code}"
+
+    def _GetMasterStockState(self, stock_code):
+        return "증거금20%"
+
+    def _GetLoginInfo(self, *args):
+        return "1"
+
+    def __admit(self) -> bool:
+        '''최근 period 초 안에 받아들인 조회가 limit 회 미만이면 기록하고 True
+        '''
+        now = self.clock()
+        for limit, period in self.rate_limits:
+            recent = self.accepted.__len__() - bisect.bisect_right(self.accepted, now - period)
+            if recent >= limit:
+                self.calls["overloaded"] += 1
+                return False
+        self.accepted.append(now)
+        return True
+
+    def send_real_tick(self, stock_code: str, price: int):
+        self.prices[stock_code] = price
+        self.OnReceiveRealData.emit(stock_code, "주식체결", "")
+
+
+def install():
+    '''PyQt5 모듈 대신 가짜 모듈을 등록한다. 실제 PyQt5 가 설치되어 있어도 가짜를 쓴다.
+    '''
+    package = types.ModuleType("PyQt5")
+    package.__path__ = list()
+    modules = {
+        "PyQt5.QAxContainer": {"QAxWidget": FakeOpenAPI},
+        "PyQt5.QtCore": {"QEventLoop": QEventLoop, "QTimer": QTimer},
+        "PyQt5.QtTest": {"QTest": QTest},
+        "PyQt5.QtWidgets": {"QApplication": QApplication},
+    }
+    sys.modules["PyQt5"] = package
+    for name, attrs in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+        setattr(package, name.split(".")[-1], module)
@@ -0,0 +1,378 @@
+'''백테스트/원장/설정/TR 처리 hot path 벤치마크.
+
+리눅스에서 합성 데이터와 가짜 키움 컨트롤(fake_kiwoom)로 실행된다. 벤치마크마다 임시 디렉토리에 데이터를 만들고,
+반복(repeat)마다 새 프로세스에서 실행해서 싱글턴/스레드 로컬 상태가 섞이지 않게 한다. 반복 결과의 중앙값을 쓴다.
+
+    python kiwoom_ats/python/benchmarks/run_benchmarks.py                       # 전체 실행, baseline 과 비교
+    python kiwoom_ats/python/benchmarks/run_benchmarks.py --only backtest_sqlite
+    python kiwoom_ats/python/benchmarks/run_benchmarks.py --save-baseline       # 현재 결과를 baseline 으로 저장
+
+결과는 --output(JSON, 기본 benchmarks/benchmark_results.json) 에 저장되고, baseline 보다 threshold 이상 나빠진
+지표는 regression 으로 표시된다. p99 처럼 흔들림이 큰 지표(gate=False)는 변화율만 참고로 남기고,
+작업량(--ticks, --ledger-ops, --tr-requests)이 baseline 과 다르면 비교하지 않는다.
+'''
+import argparse
+import contextlib
+import datetime
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+KIWOOM_ATS_ROOT = os.path.dirname(os.path.dirname(BENCHMARK_DIR))
+if KIWOOM_ATS_ROOT not in sys.path:
+    sys.path.insert(0, KIWOOM_ATS_ROOT)
+if BENCHMARK_DIR not in sys.path:
+    sys.path.insert(0, BENCHMARK_DIR)
+
+import synthetic  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "benchmark_results.json")
+WORKLOAD_KEYS = ("ticks", "ledger_ops", "tr_requests")  # 값이 다르면 baseline 과 비교하지 않는다.
+STOCK_CODES = ["233740", "251340", "069500", "005930", "000660"]
+
+
+def metric(value: float, unit: str, higher_is_better: bool, gate: bool = True) -> Dict:
+    '''gate=False 인 지표(한 번 실행의 p99 처럼 흔들림이 큰 값)는 참고로만 비교하고 regression 으로 판정하지 않는다.
+    '''
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better, "gate": gate}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(ordered.__len__() - 1, int(q * ordered.__len__()))]
+
+
+def reset_backtest_ledger():
+    for path in glob.glob("./resources/backtest/backtest_ats.db*"):
+        os.remove(path)
+
+
+# ---------------------------------------------------------------- 백테스트
+def setup_backtest(args):
+    synthetic.make_tick_db("./resources/backtest/stock_data.db", STOCK_CODES[:1], args.ticks)
+    synthetic.make_config_workbook("./resources/config/config_stock.xlsx", STOCK_CODES[:1])
+
+
+def setup_backtest_columnar(args):
+    from python.src.ats.dao.ColumnarTickStore import ColumnarTickStore
+    setup_backtest(args)
+    ColumnarTickStore.for_db("./resources/backtest/stock_data.db").convert_from_sqlite()
+
+
+def run_backtest(args) -> Dict:
+    '''헤드리스 백테스트 CLI(src/backtest.py) 를 그대로 실행한다.
+
+    Controller + TickDispatcher + AtsRunner + BacktestDAO 로 backtesting 시트의 B1/S1(20:3, 30:2) 을 평가한다.
+    ticks_per_sec 는 TickDispatcher 의 틱 처리 구간, wall_ms 는 설정 로드와 원장 저장까지 포함한 전체 시간이다.
+    '''
+    from python.src import backtest
+    reset_backtest_ledger()
+    started = time.perf_counter()
+    exit_code = backtest.main(["--stocks", STOCK_CODES[0], "--ledger", "./resources/backtest/backtest_ats.db",
+                               "--output", "./backtest_result.json"])
+    wall = time.perf_counter() - started
+    if exit_code != 0:
+        raise RuntimeError(f"백테스트 실패 [{exit_code}]")
+    with open("./backtest_result.json", encoding="utf-8") as f:
+        summary = json.load(f)["summary"]
+    return {
+        "ticks_per_sec": metric(summary["events_per_sec"], "ticks/s", True),
+        "wall_ms": metric(wall * 1000, "ms", False),
+    }
+
+
+# ---------------------------------------------------------------- 원장
+def setup_ledger(args):
+    synthetic.make_tick_db("./resources/backtest/stock_data.db", STOCK_CODES[:1], args.ledger_ops * 2 + 10)
+
+
+def run_ledger(args) -> Dict:
+    '''open/close_position 호출 지연과 LedgerWriter 의 durable commit 지연
+    '''
+    import sqlite3
+    from python.src.ats.dao.BacktestDAO import BacktestDAO
+    from python.src.ats.dao.LedgerWriter import LedgerWriter
+    reset_backtest_ledger()
+    dao = BacktestDAO()
+    stock_code = STOCK_CODES[0]
+    open_samples, close_samples = list(), list()
+    for _ in range(args.ledger_ops):
+        started = time.perf_counter_ns()
+        dao.open_position("bench", stock_code, 1)
+        open_samples.append((time.perf_counter_ns() - started) / 1000)
+        started = time.perf_counter_ns()
+        dao.close_position("bench", stock_code, 1)
+        close_samples.append((time.perf_counter_ns() - started) / 1000)
+    dao.close()
+
+    # fsync 포함 commit 지연: 변경 하나를 넣고 commit 될 때까지 기다린다.
+    for path in glob.glob("./ledger_full.db*"):
+        os.remove(path)
+    conn = sqlite3.connect("./ledger_full.db")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS trading_active_stocks (
+            _id INTEGER PRIMARY KEY AUTOINCREMENT, transaction_time DATETIME NOT NULL, stock_code TEXT NOT NULL,
+            trade_price REAL NOT NULL, qty INTEGER NOT NULL, acc_no TEXT NOT NULL)
+    ''')
+    conn.commit()
+    conn.close()
+    writer = LedgerWriter("./ledger_full.db", durability="full", commit_interval=0.0)
+    durable_samples = list()
+    for trade_id in range(1, min(args.ledger_ops, 200) + 1):
+        started = time.perf_counter_ns()
+        writer.open_lot(trade_id, "20240102090000", stock_code, 10000, 1, "bench")
+        writer.flush()
+        durable_samples.append((time.perf_counter_ns() - started) / 1e6)
+
+    writer.close()
+
+    # group commit 처리량: 기본 설정으로 한꺼번에 넣고 모두 commit 될 때까지
+    writer = LedgerWriter("./ledger_full.db", durability="full")
+    burst = args.ledger_ops * 5
+    started = time.perf_counter()
+    for trade_id in range(1000000, 1000000 + burst):
+        writer.open_lot(trade_id, "20240102090000", stock_code, 10000, 1, "bench")
+    writer.flush()
+    burst_elapsed = time.perf_counter() - started
+    writer.close()
+
+    return {
+        "open_position_p50_us": metric(percentile(open_samples, 0.5), "us", False),
+        "open_position_p99_us": metric(percentile(open_samples, 0.99), "us", False, gate=False),
+        "close_position_p50_us": metric(percentile(close_samples, 0.5), "us", False),
+        "close_position_p99_us": metric(percentile(close_samples, 0.99), "us", False, gate=False),
+        "durable_commit_p50_ms": metric(percentile(durable_samples, 0.5), "ms", False, gate=False),  # 디스크 fsync 지연
+        "group_commit_writes_per_sec": metric(burst / burst_elapsed, "writes/s", True),
+    }
+
+
+# ---------------------------------------------------------------- 설정
+def setup_config(args):
+    synthetic.make_config_workbook("./resources/config/config_stock.xlsx", STOCK_CODES * 4)
+
+
+def run_config(args) -> Dict:
+    '''엑셀 첫 로드(파싱) 시간과, 스냅샷이 만들어진 뒤 설정 조회 비용
+    '''
+    from python.src.ats.ConfigParser import ConfigParser
+    parser = ConfigParser()
+    started = time.perf_counter()
+    parser.load_stock_config()
+    cold = time.perf_counter() - started
+
+    calls = 2000
+    started = time.perf_counter()
+    for _ in range(calls):
+        parser.load_stock_config()
+        parser.is_back_testing_mode()
+    warm = (time.perf_counter() - started) / calls
+    return {
+        "cold_load_ms": metric(cold * 1000, "ms", False),
+        "warm_lookup_us": metric(warm * 1e6, "us", False),
+    }
+
+
+# ---------------------------------------------------------------- TR / 실시간
+def setup_tr(args):
+    os.makedirs("./resources/trading", exist_ok=True)
+
+
+def run_tr(args) -> Dict:
+    '''가짜 QAxWidget 위에서 KiwoomDAO 의 TR 왕복, 관심종목 warm-up, 실시간 체결 처리 비용.
+
+    스케줄러와 가짜 서버의 조회 제한은 풀어 두므로 스케줄러/registry/이벤트 루프의 처리 비용만 측정된다.
+    '''
+    import fake_kiwoom
+    fake_kiwoom.install()
+    fake_kiwoom.FakeOpenAPI.rate_limits = ()
+    from python.src.ats.dao.KiwoomDAO import KiwoomDAO
+    dao = KiwoomDAO(tr_limits=((10 ** 9, 1.0),))
+
+    requests = args.tr_requests
+    started = time.perf_counter()
+    for _ in range(requests):
+        dao.get_available_balance("8000000011")
+    round_trip = (time.perf_counter() - started) / requests
+
+    codes = [f"{i:06d}" for i in range(1, 301)]
+    started = time.perf_counter()
+    dao.warm_up(codes)
+    warm_up = time.perf_counter() - started
+
+    ocx = dao.kiwoom_instance
+    ticks = requests * 20
+    started = time.perf_counter()
+    for i in range(ticks):
+        ocx.send_real_tick(codes[i % codes.__len__()], 10000 + i % 50)
+    real_tick = (time.perf_counter() - started) / ticks
+
+    started = time.perf_counter()
+    for i in range(ticks):
+        dao.get_current_price(codes[i % codes.__len__()])
+    price_read = (time.perf_counter() - started) / ticks
+    dao.close()
+
+    return {
+        "tr_round_trip_us": metric(round_trip * 1e6, "us", False),
+        "warm_up_300_codes_ms": metric(warm_up * 1000, "ms", False),
+        "real_tick_us": metric(real_tick * 1e6, "us", False),
+        "current_price_read_us": metric(price_read * 1e6, "us", False),
+    }
+
+
+BENCHMARKS: Dict[str, Dict[str, Callable]] = {
+    "backtest_sqlite": {"setup": setup_backtest, "run": run_backtest},
+    "backtest_columnar": {"setup": setup_backtest_columnar, "run": run_backtest},
+    "ledger": {"setup": setup_ledger, "run": run_ledger},
+    "config": {"setup": setup_config, "run": run_config},
+    "tr_dispatch": {"setup": setup_tr, "run": run_tr},
+}
+
+
+# ---------------------------------------------------------------- 실행/비교
+@contextlib.contextmanager
+def working_directory(path: str):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_benchmark(name: str, args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        with working_directory(workdir):
+            BENCHMARKS[name]["setup"](args)
+
+        samples = list()
+        for _ in range(args.repeat):
+            result_path = os.path.join(workdir, "result.json")
+            command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--result", result_path,
+                       "--ticks", str(args.ticks), "--ledger-ops", str(args.ledger_ops),
+                       "--tr-requests", str(args.tr_requests)]
+            subprocess.run(command, cwd=workdir, check=True, stdout=subprocess.DEVNULL)
+            with open(result_path) as f:
+                samples.append(json.load(f))
+
+        metrics = dict()
+        for key, first in samples[0].items():
+            values = [sample[key]["value"] for sample in samples]
+            metrics[key] = dict(first, value=statistics.median(values), samples=values)
+        return metrics
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, meta: Dict) -> Dict:
+    '''baseline 보다 threshold 이상 나빠진 지표를 regression 으로 표시한다.
+
+    작업량(--ticks, --ledger-ops, --tr-requests)이 baseline 과 다르면 값의 의미가 달라지므로 비교하지 않는다.
+    '''
+    if not baseline:
+        return dict()
+    mismatched = [key for key in WORKLOAD_KEYS if baseline.get("meta", {}).get(key) != meta[key]]
+    if mismatched:
+        print(f"경고: baseline 과 작업량이 달라 비교하지 않습니다: "
+              + ", ".join(f"{key}={baseline.get('meta', {}).get(key)}->{meta[key]}" for key in mismatched),
+              file=sys.stderr)
+        return dict()
+
+    comparison = dict()
+    for name, metrics in results.items():
+        for key, current in metrics.items():
+            previous = baseline.get("results", {}).get(name, {}).get(key)
+            if previous is None or previous["value"] == 0:
+                continue
+            change = (current["value"] - previous["value"]) / previous["value"]
+            worse = -change if current["higher_is_better"] else change
+            comparison[f"{name}.{key}"] = {
+                "baseline": previous["value"],
+                "current": current["value"],
+                "change_pct": round(change * 100, 2),
+                "gate": current.get("gate", True),
+                "regression": current.get("gate", True) and worse > threshold,
+            }
+    return comparison
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="kiwoom_ats hot path benchmarks")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="실행할 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ticks", type=int, default=20000, help="백테스트 틱 수")
+    parser.add_argument("--ledger-ops", type=int, default=2000, help="원장 open/close 횟수")
+    parser.add_argument("--tr-requests", type=int, default=2000, help="TR 왕복 횟수")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 baseline 으로 저장")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression 판정 기준 (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.worker:
+        result = BENCHMARKS[args.worker]["run"](args)
+        with open(args.result, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    results = dict()
+    for name in args.only or BENCHMARKS:
+        print(f"[{name}] 실행 중...", file=sys.stderr)
+        results[name] = run_benchmark(name, args)
+        for key, value in results[name].items():
+            print(f"  {key:32s} {value['value']:14.3f} {value['unit']}", file=sys.stderr)
+
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    meta = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "ticks": args.ticks,
+        "ledger_ops": args.ledger_ops,
+        "tr_requests": args.tr_requests,
+    }
+    report = {
+        "meta": meta,
+        "results": results,
+        "comparison": compare(results, baseline, args.threshold, meta),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    regressions = [key for key, value in report["comparison"].items() if value["regression"]]
+    for key in regressions:
+        value = report["comparison"][key]
+        print(f"REGRESSION {key}: {value['baseline']:.3f} -> {value['current']:.3f} ({value['change_pct']:+.1f}%)",
+              file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": report["meta"], "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"baseline 저장: {args.baseline}", file=sys.stderr)
+
+    return 1 if args.fail_on_regression and regressions.__len__() > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+'''벤치마크용 합성 데이터. 같은 seed 면 항상 같은 데이터를 만든다.
+'''
+import datetime
+import os
+import random
+import sqlite3
+from typing import List
+
+import openpyxl
+
+
+def make_tick_db(db_path: str, stock_codes: List[str], ticks_per_stock: int, seed: int = 7):
+    '''back_testing_stock_data 테이블에 종목별 랜덤 워크 틱을 만든다.
+    '''
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TABLE IF EXISTS back_testing_stock_data')
+    conn.execute('''
+        CREATE TABLE back_testing_stock_data
+        (
+        stock_code TEXT,
+        current_price INTEGER,
+        volume INTEGER,
+        transaction_time TEXT,
+        open_price INTEGER,
+        high_price INTEGER,
+        low_price INTEGER,
+        price_correction_division INTEGER,
+        correction_ratio REAL,
+        major_industry_division TEXT,
+        minor_industry_division TEXT,
+        stock_info TEXT,
+        price_correction_event TEXT,
+        previous_day_closing_price INTEGER)
+    ''')
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 2, 9, 0)
+    for stock_code in stock_codes:
+        price = 10000
+        rows = list()
+        for i in range(ticks_per_stock):
+            price = max(100, price + rng.choice((-10, -5, 0, 5, 10)))
+            transaction_time = (start + datetime.timedelta(seconds=i)).strftime("%Y%m%d%H%M%S")
+            rows.append((stock_code, -price if i % 3 else price, 100, transaction_time,
+                         price, price, price, 0, 0.0, "", "", "", "", price))
+        conn.executemany('INSERT INTO back_testing_stock_data VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)', rows)
+    conn.execute('CREATE INDEX ix_stock_code_transaction_time ON back_testing_stock_data (stock_code, transaction_time)')
+    conn.commit()
+    conn.close()
+
+
+def make_config_workbook(path: str, stock_codes: List[str]):
+    '''ConfigParser 가 읽는 config_stock.xlsx 와 같은 구조의 엑셀 파일을 만든다.
+    '''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    wb = openpyxl.Workbook()
+    wb.active.title = "setting"
+    setting = wb["setting"]
+    setting["D5"] = 5
+    setting["H5"] = "n"
+    setting["D9"] = "8000000011"
+    setting["H9"] = "y"
+    for sheet_name in ("main", "backtesting", "trading"):
+        sheet = wb.create_sheet(sheet_name)
+        for i, stock_code in enumerate(stock_codes[:19]):
+            row = 9 + i
+            sheet.cell(row, 2).value = f"종목{stock_code}"
+            sheet.cell(row, 3).value = stock_code
+            sheet.cell(row, 4).value = 20
+            sheet.cell(row, 5).value = 3
+            sheet.cell(row, 6).value = 30
+            sheet.cell(row, 7).value = 2
+    wb.save(path)
+    wb.close()
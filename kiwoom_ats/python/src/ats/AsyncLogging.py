@@ -0,0 +1,140 @@
+import itertools
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+from typing import Dict, List, Optional, Tuple
+
+
+class SamplingFilter(logging.Filter):
+    '''로거별 샘플링. rates 의 로거 이름(접두어) 에 해당하는 로거는 level 이하의 레코드를 N 개 중 1 개만 남긴다.
+
+    틱마다 남기는 DEBUG 로그처럼 양이 많은 메시지용이다. level 보다 높은 레코드(체결, 경고, 오류)는 항상 남긴다.
+    '''
+
+    def __init__(self, rates: Dict[str, int], level: int = logging.DEBUG):
+        super().__init__()
+        self.level = level
+        # 긴 접두어가 먼저 매칭되도록 정렬
+        self.__rates: List[Tuple[str, int]] = sorted(rates.items(), key=lambda item: -item[0].__len__())
+        self.__rate_by_logger: Dict[str, int] = dict()
+        self.__counters: Dict[str, itertools.count] = dict()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        rate = self.__rate_by_logger.get(record.name)
+        if rate is None:
+            rate = self.__rate_by_logger.setdefault(record.name, self.__find_rate(record.name))
+        if rate <= 1:
+            return True
+        counter = self.__counters.get(record.name)
+        if counter is None:
+            counter = self.__counters.setdefault(record.name, itertools.count())
+        return next(counter) % rate == 0
+
+    def __find_rate(self, name: str) -> int:
+        for prefix, rate in self.__rates:
+            if name == prefix or name.startswith(prefix + ".") or prefix == "":
+                return int(rate)
+        return 1
+
+
+class StructuredFormatter(logging.Formatter):
+    '''extra={"fields": {...}} 로 넘긴 값을 메시지 뒤에 key=value 로 붙인다. as_json=True 이면 한 줄에 JSON 하나
+    '''
+
+    def __init__(self, fmt: str = None, datefmt: str = None, style: str = "%", as_json: bool = False):
+        super().__init__(fmt, datefmt, style)
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        if self.as_json:
+            data = {
+                "time": self.formatTime(record, self.datefmt),
+                "level": record.levelname,
+                "logger": record.name,
+                "thread": record.threadName,
+                "message": record.getMessage(),
+            }
+            if fields:
+                data.update(fields)
+            if record.exc_info:
+                data["exc_info"] = self.formatException(record.exc_info)
+            return json.dumps(data, ensure_ascii=False, default=str)
+
+        text = super().format(record)
+        if fields:
+            text += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    '''로거 하나의 원래 handler 들을 대신하는 QueueHandler. 레코드에 목적지 handler 를 붙여서 큐에 넣는다.
+
+    같은 프로세스의 스레드 사이 큐이므로 표준 QueueHandler 처럼 호출한 스레드에서 메시지를 포맷하지 않는다.
+    '''
+
+    def __init__(self, log_queue, sinks: Tuple[logging.Handler, ...]):
+        super().__init__(log_queue)
+        self.sinks = sinks
+
+    def prepare(self, record: logging.LogRecord):
+        record.sinks = self.sinks
+        return record
+
+
+class _RoutingHandler(logging.Handler):
+    '''QueueListener 의 유일한 handler. 레코드를 붙어 온 목적지 handler 들에 전달한다.
+    '''
+
+    def handle(self, record: logging.LogRecord):
+        for handler in record.sinks:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        pass
+
+
+def configure_async_logging(config: Dict) -> Optional[logging.handlers.QueueListener]:
+    '''logging.json 설정을 적용하고, 모든 로거의 handler 를 QueueHandler 하나로 바꾼다.
+
+    파일/콘솔 출력은 QueueListener 스레드 하나가 하므로 러너 스레드와 Qt 스레드는 큐에 넣기만 한다.
+    설정의 "async" 가 false 이면 기존처럼 동기 handler 를 그대로 쓰고 None 을 반환한다.
+
+    추가 설정 키
+    ------------
+    async          : 비동기 사용 여부 (기본 true)
+    sampling       : {"로거 이름": N} 해당 로거의 sampling_level 이하 로그를 N 개 중 1 개만 남긴다.
+    sampling_level : 샘플링할 최고 레벨, 이름 또는 숫자 (기본 "DEBUG")
+    '''
+    config = dict(config)
+    use_async = config.pop("async", True)
+    sampling = config.pop("sampling", dict())
+    # logging.config 와 같이 "DEBUG" 같은 이름과 10 같은 숫자를 모두 받는다.
+    sampling_level = logging._checkLevel(config.pop("sampling_level", "DEBUG"))
+    logging.config.dictConfig(config)
+    if not use_async:
+        return None
+
+    log_queue = queue.SimpleQueue()
+    sampling_filter = SamplingFilter(sampling, sampling_level) if sampling else None
+    loggers = [logging.getLogger()] + [logging.getLogger(name) for name in config.get("loggers", dict()) if name]
+    for logger in loggers:
+        if logger.handlers.__len__() == 0:
+            continue
+        sinks = tuple(logger.handlers)
+        queue_handler = _QueueHandler(log_queue, sinks)
+        if sampling_filter is not None:
+            queue_handler.addFilter(sampling_filter)
+        for handler in sinks:
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, _RoutingHandler())
+    listener.start()
+    return listener
@@ -3,10 +3,11 @@ import threading
 import time
 
 from python.src.ats.ConfigParser import ConfigParser
-from python.src.ats.dao.KiwoomDAO import KiwoomDAO
+from python.src.ats.GridStrategy import GridStrategy
+from python.src.ats.LatencyMetrics import LatencyMetrics
 from python.src.ats.RunnerLocker import RunnerLocker
 from python.src.ats.StockException import NoSuchStockPositionError
-from python.src.ats.dao.BacktestDAO import BacktestDAO
+from python.src.ats.dao.RunnerJournal import RunnerJournal
 
 
 class AtsRunner(threading.Thread):
@@ -15,19 +16,35 @@ class AtsRunner(threading.Thread):
     run_flag = True
     current_price: int
     is_back_testing_mode = False
+    dispatch_mode = False
     logger = logging.getLogger(__name__)
 
-    def __init__(self, config):
+    def __init__(self, config, dispatch_mode=False):
         super().__init__()
+        self.dispatch_mode = dispatch_mode
+        self.__finished = False
+        self.__price_seq = 0
         self.logger = logging.getLogger(f"{__name__}.{config['stock_code']}")
         self.logger.info(f"AtsRunner 초기화 - {config['stock_name']}({config['stock_code']})")
         self.config = config
+        # 타점 설정은 한 번만 조건표로 컴파일한다. GridBacktester 도 같은 표를 사용한다.
+        self.strategy = GridStrategy.from_config(config)
         self.is_back_testing_mode = ConfigParser.instance().is_back_testing_mode()
+        # 백테스트 상태는 원장에서 다시 계산하므로 실거래만 상태 변경을 기록한다.
+        self.__journal = None if self.is_back_testing_mode else RunnerJournal.instance()
+
+        metrics = LatencyMetrics.instance()
+        self.__refresh_latency = metrics.histogram("refresh_all_data", stock_code=config["stock_code"])
+        self.__decision_latency = metrics.histogram("decision", stock_code=config["stock_code"])
+        self.__open_latency = metrics.histogram("open_position", stock_code=config["stock_code"])
+        self.__close_latency = metrics.histogram("close_position", stock_code=config["stock_code"])
         
-        # 백테스팅/실거래 DAO 선택
+        # 백테스팅/실거래 DAO 선택. KiwoomDAO 는 PyQt5 를 import 하므로 실거래일 때만 불러온다.
         if self.is_back_testing_mode:
+            from python.src.ats.dao.BacktestDAO import BacktestDAO
             self.trading_dao = BacktestDAO.instance()
         else:
+            from python.src.ats.dao.KiwoomDAO import KiwoomDAO
             self.trading_dao = KiwoomDAO.instance()
             if "거래정지" in self.trading_dao.get_stock_state(self.config["stock_code"]):
                 self.logger.info(self.__format_log_msg("거래정지 되었습니다."))
@@ -35,8 +52,8 @@ class AtsRunner(threading.Thread):
         if not self.is_back_testing_mode:
             if config.__contains__("state"):
                 self.logger.info(self.__format_log_msg(f"이전 거래 데이터 불러왔습니다. state: {config['state']}"))
-                self.state = config["state"]
-                RunnerLocker.instance().open_locker()
+                self.__set_state(config["state"])
+                RunnerLocker.instance().restore(self)
 
         self.refresh_all_data()
         self.logger.info(self.__format_log_msg("실행 준비 완료"))
@@ -49,69 +66,113 @@ class AtsRunner(threading.Thread):
             self.logger.exception(self.__format_log_msg("Exception 발생!!! 하기 로그 참조"))
             self.logger.exception(e)
 
-        if self.state != -1 and not self.state == 0:
-            RunnerLocker.instance().close_locker()
-
+        self.finish()
         self.logger.info(self.__format_log_msg("스레드 종료합니다."))
 
-    def processing_loop(self):
+    def prepare(self):
         if self.is_back_testing_mode:
             if self.trading_dao.get_latest_trade_price(self.config["stock_code"]) is None:
                 self.state = -1
             else :
                 self.state = 1
+                RunnerLocker.instance().restore(self)
+
+    def processing_loop(self):
+        self.prepare()
 
-        print(f"{'[백테스트]' if self.is_back_testing_mode else ''} processing_loop 시작 {self.state}")
+        self.logger.info(self.__format_log_msg(f"processing_loop 시작 {self.state}"))
         while self.run_flag:
             self.refresh_all_data()
-            if self.state == -1:
-                # 거래 되지 않음
-                RunnerLocker.instance().check_locker()
-                if not self.run_flag:
-                    break
-                self.process_state_initial()
-            elif self.state == 1:
-                self.process_state_one()
-            elif self.state == 0:
-                self.run_flag = False
-                RunnerLocker.instance().close_locker()
-                self.logger.info(self.__format_log_msg("Locker Close 하였습니다."))
-            time.sleep(0.1)
+            if not self.run_flag:
+                break
+            self.process_tick()
+            self.__wait_next_tick()
+
+    def __wait_next_tick(self):
+        if self.is_back_testing_mode:
+            self.trading_dao.clock.sleep(0.1)  # SimulatedClock: 실제로 기다리지 않는다.
+            return
+        # 실거래: 다음 체결이 PriceBoard 에 올라오면 바로 깨어난다. 체결이 없어도 0.1초마다 상태를 확인한다.
+        _, self.__price_seq = self.trading_dao.wait_for_price_change(
+            self.config["stock_code"], self.__price_seq, timeout=0.1)
+
+    def on_tick(self, price):
+        '''TickDispatcher 에서 호출. 이 종목의 가격이 바뀌었을 때만 실행된다.
+        '''
+        self.__update_price(price)
+        if self.run_flag:
+            self.process_tick()
+
+    def process_tick(self):
+        if self.state == -1:
+            # 거래 되지 않음
+            if self.dispatch_mode:
+                # 스케줄러 스레드를 막으면 안 되므로 빈 자리가 없으면 다음 틱에 다시 확인
+                if not RunnerLocker.instance().try_acquire(self):
+                    return
+            elif not RunnerLocker.instance().acquire(self):
+                # 종료(cancel) 되었음
+                return
+            self.logger.info(self.__format_log_msg("Locker Open 하였습니다."))
+            if not self.run_flag:
+                RunnerLocker.instance().release(self)
+                return
+            self.process_state_initial()
+        elif self.state == 1:
+            self.process_state_one()
+        elif self.state == 0:
+            self.run_flag = False
+            RunnerLocker.instance().release(self)
+            self.logger.info(self.__format_log_msg("Locker Close 하였습니다."))
+
+    def finish(self):
+        '''러너 종료 처리. 스레드 모드에서는 run() 끝에서, 디스패처 모드에서는 TickDispatcher 가 호출한다.
+        '''
+        if self.__finished:
+            return
+        self.__finished = True
+        RunnerLocker.instance().release(self)
 
     def process_state_initial(self):
-        print("최초 구매")
-        # processing state: -1
-        RunnerLocker.instance().open_locker()
+        # processing state: -1. 호출하는 쪽에서 RunnerLocker 슬롯을 잡은 상태다.
         self.logger.info(self.__format_log_msg("B1 매수 타점 도달하였습니다!"))
-        self.open_position(self.config["B1"]["qty"])
-        self.logger.info(self.__format_log_msg("Locker Open 하였습니다."))
-        self.state = 1
+        self.open_position(self.strategy.entry_qty)
+        self.__set_state(1)
 
     def process_state_one(self):
-        # print(f"{"[백테스트]" if self.is_back_testing_mode else ""} 거래 중")
-        latest_price = self.trading_dao.get_backtest_latest_trade_price(self.config["stock_code"])
+        started = time.perf_counter_ns()
+        latest_price = self.trading_dao.get_latest_trade_price(self.config["stock_code"])
         if latest_price is None:
+            self.__decision_latency.record(time.perf_counter_ns() - started)
             self.process_state_initial()
             self.state = 1
             return
         # processing state: 1
-        if self.current_price >= latest_price + self.config["S1"]["price"]:
-            self.logger.info(self.__format_log_msg("S1 매도 타점 도달하였습니다!"))
-            self.close_position(self.config["S1"]["qty"])
-        elif self.current_price <= latest_price - self.config["B1"]["price"]:
-            self.logger.info(self.__format_log_msg("B2 매수 타점 도달하였습니다!"))
-            self.open_position(self.config["B1"]["qty"])
+        lots = self.trading_dao.get_open_lot_count(self.config["acc_no"], self.config["stock_code"]) \
+            if self.strategy.uses_lot_count else 1
+        level = self.strategy.evaluate(self.current_price, latest_price, lots)
+        self.__decision_latency.record(time.perf_counter_ns() - started)
+        if level is not None:
+            if self.strategy.actions[level] == GridStrategy.SELL:
+                self.logger.info(self.__format_log_msg(f"{self.strategy.names[level]} 매도 타점 도달하였습니다!"))
+                self.close_position(self.strategy.qtys[level])
+            else:
+                self.logger.info(self.__format_log_msg(f"{self.strategy.names[level]} 매수 타점 도달하였습니다!"))
+                self.open_position(self.strategy.qtys[level])
 
         self.state = 1
 
     def open_position(self, qty):
+        started = time.perf_counter_ns()
         self.trading_dao.open_position(
             self.config["acc_no"], 
             self.config["stock_code"], 
             qty
         )
+        self.__open_latency.record(time.perf_counter_ns() - started)
 
     def close_position(self, qty):
+        started = time.perf_counter_ns()
         try:
             self.trading_dao.close_position(
                 self.config["acc_no"], 
@@ -120,14 +181,31 @@ class AtsRunner(threading.Thread):
             )
         except NoSuchStockPositionError:
             self.logger.info(self.__format_log_msg("매도하려고 했으나, 이미 사용자에 의해 전량 매도 되었습니다."))
+        self.__close_latency.record(time.perf_counter_ns() - started)
 
     def refresh_all_data(self):
-        self.current_price = self.trading_dao.get_current_price(self.config["stock_code"])
+        started = time.perf_counter_ns()
+        self.__update_price(self.trading_dao.get_current_price(self.config["stock_code"]))
+        self.__refresh_latency.record(time.perf_counter_ns() - started)
+
+    def __update_price(self, price):
+        self.current_price = price
+        if self.is_back_testing_mode and self.current_price == -1:
+            # 백테스트 데이터 모두 처리됨
+            self.logger.info(self.__format_log_msg("백테스트 데이터를 모두 처리하였습니다."))
+            self.run_flag = False
 
     def stop_and_save(self):
         self.run_flag = False
+        # 슬롯을 기다리며 잠든 스레드를 깨운다.
+        RunnerLocker.instance().cancel(self)
         self.config["state"] = self.state
         return self.config
 
+    def __set_state(self, state):
+        self.state = state
+        if self.__journal is not None:
+            self.__journal.record(self.config, state)
+
     def __format_log_msg(self, msg):
         return f"{self.config['stock_name']}({self.config['stock_code']}): {msg}"
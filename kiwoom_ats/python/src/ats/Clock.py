@@ -0,0 +1,72 @@
+import datetime
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class Clock(ABC):
+    '''러너와 DAO 가 쓰는 시계. 실거래는 WallClock, 백테스트는 SimulatedClock 을 쓴다.
+    '''
+
+    @abstractmethod
+    def now(self) -> datetime.datetime:
+        pass
+
+    @abstractmethod
+    def sleep(self, seconds: float) -> None:
+        pass
+
+    def timestamp(self) -> str:
+        '''원장(trading_active_stocks, closed_trades) 에 기록하는 형식의 현재 시각
+        '''
+        return self.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class WallClock(Clock):
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    '''백테스트 시계. 틱의 체결시간(transaction_time)으로만 움직이고, sleep 은 실제로 기다리지 않는다.
+
+    틱마다 advance_to() 가 불리므로 문자열만 저장해 두고, now() 가 호출될 때 datetime 으로 변환한다.
+    시간은 앞으로만 간다.
+    '''
+
+    def __init__(self, start: Optional[datetime.datetime] = None):
+        self.__lock = threading.Lock()
+        self.__transaction_time: Optional[str] = None
+        self.__parsed_time: Optional[str] = None
+        self.__now = start or datetime.datetime(1970, 1, 1)
+
+    def advance_to(self, transaction_time) -> None:
+        transaction_time = str(transaction_time)
+        if self.__transaction_time is None or transaction_time > self.__transaction_time:
+            with self.__lock:
+                if self.__transaction_time is None or transaction_time > self.__transaction_time:
+                    self.__transaction_time = transaction_time
+
+    def now(self) -> datetime.datetime:
+        with self.__lock:
+            if self.__transaction_time != self.__parsed_time:
+                self.__now = self.parse(self.__transaction_time)
+                self.__parsed_time = self.__transaction_time
+            return self.__now
+
+    def sleep(self, seconds: float) -> None:
+        # 백테스트의 진행 속도는 CPU 에만 의존한다.
+        pass
+
+    @staticmethod
+    def parse(transaction_time) -> datetime.datetime:
+        '''체결시간 문자열을 datetime 으로 변환한다. "YYYYmmddHHMMSS" 와 "YYYY-mm-dd HH:MM:SS" 를 지원한다.
+        '''
+        transaction_time = str(transaction_time).strip()
+        if transaction_time.isdigit():
+            return datetime.datetime.strptime(transaction_time[:14].ljust(14, "0"), "%Y%m%d%H%M%S")
+        return datetime.datetime.fromisoformat(transaction_time)
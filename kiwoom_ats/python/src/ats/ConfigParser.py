@@ -1,4 +1,14 @@
+import hashlib
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
 import openpyxl
+from openpyxl.utils.cell import coordinate_to_tuple
+
+from python.src.ats.GridStrategy import GridStrategy
 
 
 class ConfigParser():
@@ -8,8 +18,16 @@ class ConfigParser():
 
     def __init__(self):
         self.FILE_PATH = "./resources/config/config_stock.xlsx"
+        self.STRATEGY_PATH = "./resources/config/strategy.json"
         self.__row_start = 9
         self.__row_end = 28
+        self.__snapshot_lock = threading.Lock()
+        self.__snapshot = None
+        self.__snapshot_stat = None
+        self.__snapshot_hash = None
+        self.__strategies = dict()
+        self.__strategies_stat = None
+        self.__back_testing_mode = None
 
     @classmethod
     def __get_instance(cls):
@@ -24,41 +42,20 @@ class ConfigParser():
     def load_stock_config(self):
         '''로컬에서 주식 설정을 불러온다.
         '''
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["main"]
-        config = list()
-        for i in range(self.__row_start, self.__row_end):
-            stock_name = sheet.cell(i, 2).value
-            stock_code = sheet.cell(i, 3).value
-            if stock_code is None:
-                continue
-
-            data = {
-                "stock_code": stock_code,
-                "stock_name": stock_name,
-                "B1": {
-                    "price": sheet.cell(i, 4).value,
-                    "qty": sheet.cell(i, 5).value
-                },
-                "S1": {
-                    "price": sheet.cell(i, 6).value,
-                    "qty": sheet.cell(i, 7).value
-                },
-            }
-
-            config.append(data)
-        wb.close()
-        return config
+        return self.__load_stock_sheet("main")
 
     def load_back_testing_stock_config(self):
         ''' 백테스팅용 - 로컬에서 주식 설정을 불러온다.
         '''
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["backtesting"]
+        return self.__load_stock_sheet("backtesting")
+
+    def __load_stock_sheet(self, sheet_name: str):
+        # 호출한 쪽에서 dict 를 수정하므로(acc_no, state 등) 매번 새로 만든다.
         config = list()
+        strategies = self.load_strategies()
         for i in range(self.__row_start, self.__row_end):
-            stock_name = sheet.cell(i, 2).value
-            stock_code = sheet.cell(i, 3).value
+            stock_name = self.__cell(sheet_name, i, 2)
+            stock_code = self.__cell(sheet_name, i, 3)
             if stock_code is None:
                 continue
 
@@ -66,41 +63,46 @@ class ConfigParser():
                 "stock_code": stock_code,
                 "stock_name": stock_name,
                 "B1": {
-                    "price": sheet.cell(i, 4).value,
-                    "qty": sheet.cell(i, 5).value
+                    "price": self.__cell(sheet_name, i, 4),
+                    "qty": self.__cell(sheet_name, i, 5)
                 },
                 "S1": {
-                    "price": sheet.cell(i, 6).value,
-                    "qty": sheet.cell(i, 7).value
+                    "price": self.__cell(sheet_name, i, 6),
+                    "qty": self.__cell(sheet_name, i, 7)
                 },
             }
+            strategy = strategies.get(str(stock_code), strategies.get("default"))
+            if strategy:
+                data["strategy"] = strategy
 
             config.append(data)
-        wb.close()
         return config
 
 
-    def add_unfinished_stock(self, data_list):
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["trading"]
-
-        for i in range(self.__row_start, 30):
-            for j in range(2, 18):
-                sheet.cell(i, j).value = None
-
-        i = self.__row_start
-        for data in data_list:
-            sheet.cell(i, 2).value = data["stock_name"]
-            sheet.cell(i, 3).value = data["stock_code"]
-            sheet.cell(i, 4).value = data["B1"]["price"]
-            sheet.cell(i, 5).value = data["B1"]["qty"]
-            sheet.cell(i, 6).value = data["S1"]["price"]
-            sheet.cell(i, 7).value = data["S1"]["qty"]
-            sheet.cell(i, 8).value = data["state"]
-            i += 1
-        wb.save(self.FILE_PATH)
-        wb.close()
+    def load_strategies(self):
+        '''종목코드별 다단계 타점 설정(GridStrategy). "default" 는 설정이 없는 모든 종목에 적용된다.
+        파일이 없으면 빈 dict 를 반환하고, 모든 종목이 엑셀의 B1/S1 으로 동작한다.
+        타점 표가 잘못되었으면(max_lots < min_lots 등) 러너를 만들기 전에 ValueError 를 낸다.
 
+        엑셀 스냅샷처럼 파일의 mtime/크기가 바뀐 경우에만 다시 읽고 검증한다. 반환값의 타점 설정은 읽기 전용이다.
+        '''
+        try:
+            stat = os.stat(self.STRATEGY_PATH)
+        except FileNotFoundError:
+            return dict()
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self.__strategies_stat == stat_key:
+            return dict(self.__strategies)
+
+        with self.__snapshot_lock:
+            if self.__strategies_stat != stat_key:
+                with open(self.STRATEGY_PATH, encoding="utf-8") as f:
+                    strategies = json.load(f)
+                for strategy in strategies.values():
+                    GridStrategy(strategy["levels"], strategy.get("entry_qty", 0))
+                self.__strategies = strategies
+                self.__strategies_stat = stat_key
+        return dict(self.__strategies)
 
     def remove_stock_config(self, stock_code: str):
         row_index = self.find_stock_row(stock_code, "main")
@@ -112,17 +114,13 @@ class ConfigParser():
 
         wb.save(self.FILE_PATH)
         wb.close()
+        self.invalidate()
 
 
     def find_stock_row(self, stock_code: str, sheet: str) -> int:
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb[sheet]
-
         for i in range(self.__row_start, self.__row_end):
-            if (sheet.cell(i, 3).value == stock_code):
-                wb.close()
+            if (self.__cell(sheet, i, 3) == stock_code):
                 return i
-        wb.close()
         raise KeyError(f"No such key {stock_code} in config_stock.xlsx")
 
 
@@ -134,37 +132,73 @@ class ConfigParser():
         int:
             종목 수
         '''
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["setting"]
-
-        val = int(sheet["D5"].value)
-
-        wb.close()
-        return val
+        return int(self.__setting("D5"))
 
     def is_back_testing_mode(self):
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["setting"]
+        if self.__back_testing_mode is not None:
+            return self.__back_testing_mode
+        return str(self.__setting("H9").strip()).lower() == "y"
 
-        val = str(sheet["H9"].value.strip()).lower() == "y"
+    def set_back_testing_mode(self, value: bool):
+        '''setting 시트 H9 대신 사용할 백테스팅 여부. 백테스트 CLI 는 엑셀 설정과 관계없이 항상 백테스팅이다.
+        '''
+        self.__back_testing_mode = value
 
-        wb.close()
-        return val
+    def is_dispatch_mode(self):
+        '''이벤트 방식(TickDispatcher) 사용 여부. setting 시트 D13 이 비어 있으면 기존 러너별 스레드 방식
+        '''
+        val = self.__setting("D13")
+        return val is not None and str(val).strip().lower() == "y"
 
     def load_is_power_off(self):
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["setting"]
+        return self.__setting("H5").strip() == "y"
 
-        val = sheet["H5"].value.strip() == "y"
+    def get_account_number(self):
+        return self.__setting("D9").strip()
 
-        wb.close()
-        return val
+    def invalidate(self):
+        '''다음 조회 시 엑셀 파일과 strategy.json 을 다시 읽도록 스냅샷을 버린다.
+        '''
+        with self.__snapshot_lock:
+            self.__snapshot_stat = None
+            self.__snapshot_hash = None
+            self.__strategies_stat = None
 
-    def get_account_number(self):
-        wb = openpyxl.load_workbook(self.FILE_PATH)
-        sheet = wb["setting"]
+    def __setting(self, coordinate: str):
+        row, col = coordinate_to_tuple(coordinate)
+        return self.__cell("setting", row, col)
 
-        val = sheet["D9"].value.strip()
+    def __cell(self, sheet_name: str, row: int, col: int):
+        rows = self.__get_snapshot()[sheet_name]
+        if row > rows.__len__() or col > rows[row - 1].__len__():
+            return None
+        return rows[row - 1][col - 1]
 
+    def __get_snapshot(self) -> Mapping[str, Tuple[Tuple]]:
+        '''엑셀 파일을 파싱한 읽기 전용 스냅샷.
+
+        파일의 mtime/크기가 바뀐 경우에만 내용 해시를 비교하고, 해시까지 바뀌었을 때만 다시 파싱한다.
+        '''
+        stat = os.stat(self.FILE_PATH)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self.__snapshot_stat == stat_key:
+            return self.__snapshot
+
+        with self.__snapshot_lock:
+            if self.__snapshot_stat != stat_key:
+                with open(self.FILE_PATH, "rb") as f:
+                    digest = hashlib.sha1(f.read()).hexdigest()
+                if digest != self.__snapshot_hash:
+                    self.__snapshot = self.__parse_workbook()
+                    self.__snapshot_hash = digest
+                self.__snapshot_stat = stat_key
+        return self.__snapshot
+
+    def __parse_workbook(self) -> Mapping[str, Tuple[Tuple]]:
+        wb = openpyxl.load_workbook(self.FILE_PATH)
+        snapshot = dict()
+        for sheet in wb.worksheets:
+            snapshot[sheet.title] = tuple(
+                tuple(row) for row in sheet.iter_rows(min_row=1, min_col=1, values_only=True))
         wb.close()
-        return val
+        return MappingProxyType(snapshot)
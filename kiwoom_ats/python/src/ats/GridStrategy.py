@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class GridStrategy():
+    '''타점(B1, B2, S1~S5) 설정을 한 번 컴파일한 평탄한 조건표.
+
+    각 행(level)은 "가장 최근 lot 매수가 대비 현재가가 distance 이상 올랐으면/내렸으면 qty 만큼 매수/매도" 이고,
+    보유 lot 수가 [min_lots, max_lots] 일 때만 유효하다. 여러 행이 동시에 만족되면 표에서 앞선 행이 이긴다.
+    보유 물량이 없을 때는 entry_qty 만큼 매수한다. (AtsRunner.process_state_initial)
+
+    * evaluate() : 틱 하나를 O(행 수) 로 평가한다. (실거래, AtsRunner)
+    * signals() / find_signal() : 가격 배열 전체를 numpy 로 한 번에 평가한다. (GridBacktester)
+
+    두 경로가 같은 표를 쓰므로 실거래와 배치 백테스트의 매매 규칙이 항상 같다.
+
+    설정 예 (resources/config/strategy.json 의 종목별 값, 없으면 B1/S1 으로 기본 표를 만든다)::
+
+        {"entry_qty": 100,
+         "levels": [{"name": "S1", "when": "above", "distance": 50, "action": "sell", "qty": 100, "max_lots": 1},
+                    {"name": "S3", "when": "above", "distance": 20, "action": "sell", "qty": 100, "min_lots": 2},
+                    {"name": "S5", "when": "below", "distance": 60, "action": "sell", "qty": 100, "min_lots": 2},
+                    {"name": "B2", "when": "below", "distance": 30, "action": "buy", "qty": 100, "max_lots": 1}]}
+    '''
+    BUY = 1
+    SELL = -1
+    ABOVE = 1
+    BELOW = -1
+    MAX_LOTS = int(np.iinfo(np.int64).max)
+    __ACTIONS = {"buy": BUY, "sell": SELL}
+    __DIRECTIONS = {"above": ABOVE, "below": BELOW}
+    __MIN_CHUNK = 64
+    __MAX_CHUNK = 1 << 16
+
+    def __init__(self, levels: List[Dict], entry_qty: int):
+        if levels.__len__() == 0:
+            raise ValueError("타점이 하나도 없습니다.")
+        self.entry_qty = int(entry_qty)
+        self.names = tuple(str(level.get("name", f"L{i + 1}")) for i, level in enumerate(levels))
+
+        directions, offsets, actions, qtys, min_lots, max_lots = [], [], [], [], [], []
+        for level in levels:
+            direction = self.__DIRECTIONS[level["when"]]
+            directions.append(direction)
+            offsets.append(direction * abs(int(level["distance"])))
+            actions.append(self.__ACTIONS[level["action"]])
+            qtys.append(int(level["qty"]))
+            low = int(level.get("min_lots", 1))
+            high = self.MAX_LOTS if level.get("max_lots") is None else int(level["max_lots"])
+            if high < low:
+                raise ValueError(f"{level.get('name', '타점')}: max_lots({high}) 가 min_lots({low}) 보다 작습니다.")
+            min_lots.append(low)
+            max_lots.append(high)
+
+        # 배열 평가용 (GridBacktester)
+        self.__directions = np.array(directions, dtype=np.int64)
+        self.__offsets = np.array(offsets, dtype=np.int64)
+        self.__min_lots = np.array(min_lots, dtype=np.int64)
+        self.__max_lots = np.array(max_lots, dtype=np.int64)
+        self.actions = tuple(actions)
+        self.qtys = tuple(qtys)
+        # 틱 하나 평가용 (AtsRunner). numpy 스칼라 연산보다 파이썬 tuple 이 빠르다.
+        self.__rows = tuple((index, direction > 0, offset, low, high) for index, (direction, offset, low, high)
+                            in enumerate(zip(directions, offsets, min_lots, max_lots)))
+        # 보유 lot 수와 관계없는 표(기본 B1/S1)는 lot 수를 조회하지 않아도 된다.
+        self.uses_lot_count = any(low > 1 or high != self.MAX_LOTS for low, high in zip(min_lots, max_lots))
+        self.__eligible_cache: Dict[int, np.ndarray] = dict()
+
+    @classmethod
+    def from_config(cls, config) -> "GridStrategy":
+        '''종목 설정으로 표를 만든다. config["strategy"] 가 있으면 그 타점을, 없으면 B1/S1 을 사용한다.
+        '''
+        strategy = config.get("strategy")
+        if strategy:
+            return cls(strategy["levels"], strategy.get("entry_qty", config["B1"]["qty"]))
+        return cls([
+            {"name": "S1", "when": "above", "distance": config["S1"]["price"], "action": "sell",
+             "qty": config["S1"]["qty"]},
+            {"name": "B2", "when": "below", "distance": config["B1"]["price"], "action": "buy",
+             "qty": config["B1"]["qty"]},
+        ], config["B1"]["qty"])
+
+    def evaluate(self, price: int, latest_price: int, lots: int = 1) -> Optional[int]:
+        '''현재가에서 실행할 행 번호. 만족하는 행이 없으면 None
+        '''
+        diff = price - latest_price
+        for index, above, offset, min_lots, max_lots in self.__rows:
+            if (diff >= offset if above else diff <= offset) and min_lots <= lots <= max_lots:
+                return index
+        return None
+
+    def signals(self, prices, latest_price: int, lots: int = 1) -> np.ndarray:
+        '''prices 의 각 가격에 대해 evaluate() 와 같은 행 번호를 구한다. 만족하는 행이 없으면 -1
+        '''
+        eligible = self.__eligible(lots)
+        prices = np.asarray(prices, dtype=np.int64)
+        if eligible.__len__() == 0:
+            return np.full(prices.__len__(), -1, dtype=np.int64)
+        directions = self.__directions[eligible][:, None]
+        # 아래(below) 행은 부호를 뒤집어서 모든 행을 "이상" 비교 하나로 평가한다.
+        hits = directions * (prices[None, :] - latest_price) >= (directions * self.__offsets[eligible][:, None])
+        return np.where(hits.any(axis=0), eligible[hits.argmax(axis=0)], -1)
+
+    def find_signal(self, prices, start: int, latest_price: int, lots: int = 1) -> Tuple[int, int]:
+        '''start 이후 처음으로 타점에 도달한 (틱 위치, 행 번호). 없으면 (-1, -1)
+
+        앞쪽에서 체결되는 경우가 많으므로 작은 구간부터 두 배씩 늘려 가며 평가한다.
+        '''
+        n = prices.__len__()
+        chunk = self.__MIN_CHUNK
+        while start < n:
+            rows = self.signals(prices[start:start + chunk], latest_price, lots)
+            hits = np.flatnonzero(rows >= 0)
+            if hits.__len__() > 0:
+                return start + int(hits[0]), int(rows[hits[0]])
+            start += chunk
+            chunk = min(chunk * 2, self.__MAX_CHUNK)
+        return -1, -1
+
+    def __eligible(self, lots: int) -> np.ndarray:
+        eligible = self.__eligible_cache.get(lots)
+        if eligible is None:
+            eligible = np.flatnonzero((self.__min_lots <= lots) & (lots <= self.__max_lots))
+            self.__eligible_cache[lots] = eligible
+        return eligible
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class LatencyHistogram():
+    '''HDR 방식의 로그-선형 히스토그램. 나노초 단위 값을 기록한다.
+
+    2^k 구간마다 SUB_BUCKET_COUNT/2 개로 나누므로 상대 오차는 약 3% 이내이고, 기록 비용은 정수 연산과 배열
+    증가 하나다. 분위수와 min/max 는 구간 값으로 계산한다.
+    '''
+    SUB_BUCKET_BITS = 6
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    __HALF = SUB_BUCKET_COUNT >> 1
+    BUCKET_COUNT = SUB_BUCKET_COUNT + 40 * __HALF  # 2^45ns(약 9.7시간) 까지
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__counts = [0] * self.BUCKET_COUNT
+        self.__total = 0
+
+    def record(self, value_ns: int):
+        if value_ns < self.SUB_BUCKET_COUNT:
+            index = value_ns if value_ns > 0 else 0
+        else:
+            shift = value_ns.bit_length() - self.SUB_BUCKET_BITS
+            index = self.SUB_BUCKET_COUNT + (shift - 1) * self.__HALF + ((value_ns >> shift) - self.__HALF)
+            if index >= self.BUCKET_COUNT:
+                index = self.BUCKET_COUNT - 1
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__total += value_ns
+
+    @property
+    def count(self) -> int:
+        return sum(self.__counts)
+
+    @classmethod
+    def index_of(cls, value_ns: int) -> int:
+        if value_ns < cls.SUB_BUCKET_COUNT:
+            return value_ns
+        shift = value_ns.bit_length() - cls.SUB_BUCKET_BITS
+        return cls.SUB_BUCKET_COUNT + (shift - 1) * cls.__HALF + ((value_ns >> shift) - cls.__HALF)
+
+    @classmethod
+    def bucket_range(cls, index: int) -> Tuple[int, int]:
+        '''index 구간의 [하한, 상한) 나노초
+        '''
+        if index < cls.SUB_BUCKET_COUNT:
+            return index, index + 1
+        shift = (index - cls.SUB_BUCKET_COUNT) // cls.__HALF + 1
+        top = (index - cls.SUB_BUCKET_COUNT) % cls.__HALF + cls.__HALF
+        return top << shift, (top + 1) << shift
+
+    def percentile(self, q: float) -> int:
+        with self.__lock:
+            counts = list(self.__counts)
+        return self.__percentile(counts, sum(counts), q)
+
+    def snapshot(self, quantiles=(0.5, 0.9, 0.99, 0.999)) -> Dict:
+        with self.__lock:
+            counts = list(self.__counts)
+            total = self.__total
+        count = sum(counts)
+        used = [index for index, bucket_count in enumerate(counts) if bucket_count > 0]
+        return {
+            "count": count,
+            "sum_ns": total,
+            "min_ns": self.bucket_range(used[0])[0] if used else 0,
+            "max_ns": self.bucket_range(used[-1])[1] - 1 if used else 0,
+            "mean_ns": total / count if count else 0,
+            "quantiles_ns": {str(q): self.__percentile(counts, count, q) for q in quantiles},
+        }
+
+    def reset(self):
+        with self.__lock:
+            self.__counts = [0] * self.BUCKET_COUNT
+            self.__total = 0
+
+    def __percentile(self, counts, count: int, q: float) -> int:
+        if count == 0:
+            return 0
+        rank = max(1, int(round(q * count)))
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = self.bucket_range(index)
+                return (low + high - 1) // 2
+        return 0
+
+
+class LatencyMetrics():
+    '''이름과 label(종목코드 등) 별 LatencyHistogram 모음.
+
+    hot path 에서는 histogram() 으로 받은 객체를 들고 있다가 record() 만 호출한다.
+    start_exporter() 를 호출하면 주기적으로 JSON 과 Prometheus text(exposition format) 파일을 덮어쓴다.
+    '''
+    logger = logging.getLogger(__name__)
+    PROMETHEUS_NAME = "kiwoom_ats_latency_seconds"
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], LatencyHistogram] = dict()
+        self.__exporter: Optional[threading.Thread] = None
+        self.__stop_event = threading.Event()
+
+    @classmethod
+    def __get_instance(cls):
+        return cls.__instance
+
+    @classmethod
+    def instance(cls, *args, **kargs):
+        cls.__instance = cls(*args, **kargs)
+        cls.instance = cls.__get_instance
+        return cls.__instance
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        histogram = self.__histograms.get(key)
+        if histogram is None:
+            with self.__lock:
+                histogram = self.__histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def record(self, name: str, elapsed_ns: int, **labels):
+        self.histogram(name, **labels).record(elapsed_ns)
+
+    def to_json(self) -> Dict:
+        with self.__lock:
+            items = list(self.__histograms.items())
+        return {
+            "timestamp": time.time(),
+            "histograms": [
+                dict(name=name, labels=dict(labels), **histogram.snapshot())
+                for (name, labels), histogram in sorted(items, key=lambda item: item[0])
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        '''Prometheus summary 형식. name 은 operation label 로 들어간다.
+        '''
+        lines = [f"# HELP {self.PROMETHEUS_NAME} kiwoom_ats hot path latency",
+                 f"# TYPE {self.PROMETHEUS_NAME} summary"]
+        for histogram in self.to_json()["histograms"]:
+            labels = dict(operation=histogram["name"], **histogram["labels"])
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+            for quantile, value_ns in histogram["quantiles_ns"].items():
+                lines.append(f'{self.PROMETHEUS_NAME}{{{label_text},quantile="{quantile}"}} {value_ns / 1e9:.9f}')
+            lines.append(f"{self.PROMETHEUS_NAME}_sum{{{label_text}}} {histogram['sum_ns'] / 1e9:.9f}")
+            lines.append(f"{self.PROMETHEUS_NAME}_count{{{label_text}}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, directory: str):
+        '''latency.json / latency.prom 을 directory 에 쓴다. 읽는 쪽이 쓰다 만 파일을 보지 않도록 교체 방식으로 쓴다.
+        '''
+        os.makedirs(directory, exist_ok=True)
+        self.__write(os.path.join(directory, "latency.json"), json.dumps(self.to_json(), ensure_ascii=False, indent=2))
+        self.__write(os.path.join(directory, "latency.prom"), self.to_prometheus())
+
+    def start_exporter(self, directory: str = "./resources/metrics", interval: float = 60.0):
+        if self.__exporter is not None:
+            return
+        self.__stop_event.clear()
+
+        def export_loop():
+            while not self.__stop_event.wait(interval):
+                try:
+                    self.dump(directory)
+                except Exception as e:
+                    self.logger.error(f"latency metrics 저장 실패: {e}")
+
+        self.__export_directory = directory
+        self.__exporter = threading.Thread(target=export_loop, name="LatencyExporter", daemon=True)
+        self.__exporter.start()
+
+    def stop_exporter(self):
+        '''exporter 를 멈추고 마지막으로 한 번 더 저장한다.
+        '''
+        if self.__exporter is None:
+            return
+        self.__stop_event.set()
+        self.__exporter.join()
+        self.__exporter = None
+        self.dump(self.__export_directory)
+
+    @staticmethod
+    def __write(path: str, text: str):
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
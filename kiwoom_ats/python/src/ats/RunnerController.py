@@ -1,10 +1,11 @@
 import logging
 from typing import List
 
-from PyQt5.QtTest import QTest
-
 from python.src.ats.AtsRunner import AtsRunner
 from python.src.ats.ConfigParser import ConfigParser
+from python.src.ats.RunnerLocker import RunnerLocker
+from python.src.ats.TickDispatcher import TickDispatcher
+from python.src.ats.dao.RunnerJournal import RunnerJournal
 
 
 class Controller():
@@ -13,16 +14,49 @@ class Controller():
 
     def __init__(self):
         self.runner_list = list()
+        # 백테스트는 항상 TickDispatcher 의 포트폴리오 모드로 실행한다.
+        # (종목별 스레드로 돌리면 종목 간 시간 순서가 없어 결과가 매번 달라진다)
+        self.dispatch_mode = ConfigParser.instance().is_dispatch_mode() \
+            or ConfigParser.instance().is_back_testing_mode()
 
     def add_runner(self, config):
         '''예수금 '''
         config["acc_no"] = ConfigParser.instance().get_account_number()
 
-        print(f"{'[백테스팅]' if ConfigParser.instance().is_back_testing_mode() else ''} 나의 계좌번호 : {config['acc_no']}")
-        self.runner_list.append(AtsRunner(config))
+        self._log.info(f"{'[백테스팅]' if ConfigParser.instance().is_back_testing_mode() else ''} 나의 계좌번호 : {config['acc_no']}")
+        self.runner_list.append(AtsRunner(config, self.dispatch_mode))
 
     def run_all(self):
+        if self.dispatch_mode:
+            # 러너별 스레드 대신 TickDispatcher 하나가 가격이 바뀐 종목의 러너만 실행
+            dispatcher = TickDispatcher.instance()
+            for runner in self.runner_list:
+                runner.prepare()
+                dispatcher.register(runner)
+            if ConfigParser.instance().is_back_testing_mode():
+                from python.src.ats.dao.BacktestDAO import BacktestDAO
+                dispatcher.start_backtest(BacktestDAO.instance())
+            else:
+                dispatcher.start()
+            return
+
         for runner in self.runner_list:
             runner.start()
-            print(runner.config["stock_code"])
-            QTest.qWait(500)
+            self._log.info(f"러너 시작: {runner.config['stock_code']}")
+
+    def stop_and_save_all(self):
+        if self.dispatch_mode:
+            TickDispatcher.instance().stop()
+
+        saved = [runner.stop_and_save() for runner in self.runner_list]
+        self._log.info(f"최대 거래 종목 수 대기 현황: {RunnerLocker.instance().stats()}")
+        if not ConfigParser.instance().is_back_testing_mode():
+            # 상태는 바뀔 때마다 기록되어 있다. 마지막 상태를 한 번 더 기록하고 스냅샷으로 정리한다.
+            journal = RunnerJournal.instance()
+            for config in saved:
+                journal.record(config, config["state"])
+            journal.close()
+
+        # 원장 writer 에 남은 체결을 모두 commit
+        for trading_dao in {id(runner.trading_dao): runner.trading_dao for runner in self.runner_list}.values():
+            trading_dao.close()
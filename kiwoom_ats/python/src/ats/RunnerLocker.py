@@ -1,13 +1,46 @@
+import collections
+import logging
 import threading
+import time
+from typing import Deque, Dict, Hashable, Set
 
 from python.src.ats.ConfigParser import ConfigParser
+from python.src.ats.LatencyMetrics import LatencyMetrics
+
+
+class _Waiter():
+    __slots__ = ("holder", "event", "granted", "enqueued_ns")
+
+    def __init__(self, holder: Hashable):
+        self.holder = holder
+        self.event = threading.Event()
+        self.granted = False
+        self.enqueued_ns = time.perf_counter_ns()
 
 
 class RunnerLocker():
-    __semaphore: threading.Semaphore
+    '''최대 거래 종목 수(setting 시트 D5)를 지키는 입장 관리자.
+
+    슬롯을 잡은 러너(holder)를 직접 기록하므로 같은 러너가 여러 번 acquire 해도 슬롯은 하나만 쓰고, release 도
+    잡고 있을 때만 반영된다.
 
-    def __init__(self):
-        self.__semaphore = threading.Semaphore(ConfigParser.instance().load_maximum_trading())
+    기다리는 러너는 도착 순서대로 줄을 서고 각자 자기 Event 에서 잠든다. 슬롯이 풀리면 release 하는 쪽이 맨 앞
+    러너에게 슬롯을 바로 넘기고 그 러너만 깨운다. 그 사이 다른 러너가 try_acquire 로 새치기할 수 없다.
+    '''
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, maximum_trading: int = None):
+        if maximum_trading is None:
+            maximum_trading = ConfigParser.instance().load_maximum_trading()
+        self.capacity = maximum_trading
+        self.__lock = threading.Lock()
+        self.__holders: Set[Hashable] = set()
+        self.__waiters: Deque[_Waiter] = collections.deque()
+        self.__waiting: Dict[Hashable, _Waiter] = dict()
+        self.__admitted = 0
+        self.__total_wait_ns = 0
+        self.__max_wait_ns = 0
+        self.__wait_latency = LatencyMetrics.instance().histogram("locker_wait")
 
     @classmethod
     def __get_instance(cls):
@@ -19,12 +52,108 @@ class RunnerLocker():
         cls.instance = cls.__get_instance
         return cls.__instance
 
-    def check_locker(self):
-        self.__semaphore.acquire()
-        self.__semaphore.release()
+    def acquire(self, holder: Hashable, timeout: float = None) -> bool:
+        '''슬롯을 잡을 때까지 차례대로 기다린다. 이미 잡고 있으면 바로 True.
+
+        timeout 이 지나거나 cancel() 되면 False
+        '''
+        with self.__lock:
+            if holder in self.__holders:
+                return True
+            if not self.__waiters and self.__holders.__len__() < self.capacity:
+                self.__admit(holder, 0)
+                return True
+            waiter = self.__waiting.get(holder)
+            if waiter is None:
+                waiter = _Waiter(holder)
+                self.__waiters.append(waiter)
+                self.__waiting[holder] = waiter
+
+        waiter.event.wait(timeout)
+
+        with self.__lock:
+            if not waiter.granted and self.__waiting.get(holder) is waiter:
+                # timeout: 줄에서 빠진다.
+                self.__waiters.remove(waiter)
+                del self.__waiting[holder]
+            return waiter.granted
+
+    def try_acquire(self, holder: Hashable) -> bool:
+        '''기다리지 않는 acquire. 빈 슬롯이 있고 기다리는 러너가 없을 때만 잡는다.
+        '''
+        with self.__lock:
+            if holder in self.__holders:
+                return True
+            if self.__waiters or self.__holders.__len__() >= self.capacity:
+                return False
+            self.__admit(holder, 0)
+            return True
+
+    def restore(self, holder: Hashable):
+        '''이전 실행에서 이미 거래 중이던 러너. 보유 물량이 있으므로 한도를 넘더라도 슬롯을 잡는다.
+        '''
+        with self.__lock:
+            if holder in self.__holders:
+                return
+            if self.__holders.__len__() >= self.capacity:
+                self.logger.warning(f"거래 중 종목 수가 최대 거래 종목 수({self.capacity})를 넘었습니다.")
+            self.__admit(holder, 0)
+
+    def release(self, holder: Hashable):
+        '''슬롯 반납. 잡고 있지 않으면 아무것도 하지 않는다. 기다리는 중이면 줄에서 뺀다.
+        '''
+        with self.__lock:
+            if holder in self.__holders:
+                self.__holders.discard(holder)
+                self.__hand_over()
+            else:
+                self.__cancel(holder)
+
+    def cancel(self, holder: Hashable):
+        '''기다리고 있는 acquire 를 False 로 끝낸다. (종료 시 사용)
+        '''
+        with self.__lock:
+            self.__cancel(holder)
+
+    def is_holding(self, holder: Hashable) -> bool:
+        return holder in self.__holders
+
+    def is_available(self) -> bool:
+        '''빈 슬롯이 있고 기다리는 러너가 없으면 True
+        '''
+        with self.__lock:
+            return not self.__waiters and self.__holders.__len__() < self.capacity
+
+    def stats(self) -> Dict:
+        with self.__lock:
+            return {
+                "capacity": self.capacity,
+                "occupied": self.__holders.__len__(),
+                "waiting": self.__waiters.__len__(),
+                "admitted": self.__admitted,
+                "total_wait_sec": self.__total_wait_ns / 1e9,
+                "max_wait_sec": self.__max_wait_ns / 1e9,
+            }
+
+    def __admit(self, holder: Hashable, wait_ns: int):
+        # lock 을 잡은 상태에서만 호출
+        self.__holders.add(holder)
+        self.__admitted += 1
+        self.__total_wait_ns += wait_ns
+        self.__max_wait_ns = max(self.__max_wait_ns, wait_ns)
+        self.__wait_latency.record(wait_ns)
 
-    def open_locker(self):
-        self.__semaphore.acquire(blocking=False)
+    def __hand_over(self):
+        # lock 을 잡은 상태에서만 호출. 빈 슬롯만큼 줄 맨 앞부터 넘겨준다.
+        while self.__waiters and self.__holders.__len__() < self.capacity:
+            waiter = self.__waiters.popleft()
+            del self.__waiting[waiter.holder]
+            waiter.granted = True
+            self.__admit(waiter.holder, time.perf_counter_ns() - waiter.enqueued_ns)
+            waiter.event.set()
 
-    def close_locker(self):
-        self.__semaphore.release()
+    def __cancel(self, holder: Hashable):
+        waiter = self.__waiting.pop(holder, None)
+        if waiter is not None:
+            self.__waiters.remove(waiter)
+            waiter.event.set()
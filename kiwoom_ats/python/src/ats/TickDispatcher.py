@@ -0,0 +1,154 @@
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List
+
+
+class TickDispatcher():
+    '''가격 변경 이벤트를 받아, 가격이 바뀐 종목의 러너만 실행하는 단일 스케줄러.
+
+    실거래에서는 KiwoomDAO 의 OnReceiveRealData 가 publish() 로 가격을 밀어 넣고,
+    백테스트에서는 스케줄러 스레드가 BacktestDAO 의 틱 스트림을 체결시간 순으로 병합해서 러너에 전달한다.
+    러너별 polling 스레드와 time.sleep(0.1) 이 없으므로 지연 시간은 이벤트 처리 시간에만 의존한다.
+    '''
+    logger = logging.getLogger(__name__)
+
+    def __init__(self):
+        self.__runners: Dict[str, List] = dict()
+        self.__pending: Dict[str, int] = dict()  # 종목코드 -> 아직 처리하지 않은 최신가
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.__running = False
+        self.backtest_summary = None
+
+    @classmethod
+    def __get_instance(cls):
+        return cls.__instance
+
+    @classmethod
+    def instance(cls, *args, **kargs):
+        cls.__instance = cls(*args, **kargs)
+        cls.instance = cls.__get_instance
+        return cls.__instance
+
+    def register(self, runner):
+        self.__runners.setdefault(str(runner.config["stock_code"]), list()).append(runner)
+
+    def is_running(self) -> bool:
+        return self.__running
+
+    def publish(self, stock_code: str, price: int):
+        '''가격 변경 이벤트 등록. 어느 스레드에서 호출해도 된다.
+
+        아직 처리되지 않은 같은 종목의 이벤트가 있으면 최신가로 덮어쓴다.
+        '''
+        stock_code = str(stock_code)
+        if not self.__running or stock_code not in self.__runners:
+            return
+        with self.__condition:
+            self.__pending[stock_code] = price
+            self.__condition.notify()
+
+    def start(self):
+        '''실거래 모드: publish() 로 들어온 이벤트를 처리하는 스케줄러 스레드 시작
+        '''
+        self.__start(self.__live_loop)
+
+    def start_backtest(self, trading_dao):
+        '''포트폴리오 백테스트 모드: 스케줄러 스레드가 모든 종목의 틱을 체결시간 순으로 병합해서 러너에 전달한다.
+        sleep 없이 CPU 속도로 실행된다.
+        '''
+        self.__start(lambda: self.__backtest_loop(trading_dao))
+
+    def stop(self):
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+        for runners in self.__runners.values():
+            for runner in runners:
+                runner.finish()
+
+    def join(self, timeout=None):
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+    def __start(self, target):
+        self.__running = True
+        self.__thread = threading.Thread(target=target, name="TickDispatcher", daemon=True)
+        self.__thread.start()
+        self.logger.info(f"TickDispatcher 시작: {list(self.__runners.keys())}")
+
+    def __live_loop(self):
+        while True:
+            with self.__condition:
+                while self.__running and self.__pending.__len__() == 0:
+                    self.__condition.wait()
+                if not self.__running:
+                    break
+                events = self.__pending
+                self.__pending = dict()
+
+            for stock_code, price in events.items():
+                self.__dispatch(stock_code, price)
+
+    def __backtest_loop(self, trading_dao):
+        '''포트폴리오 백테스트. 모든 종목의 틱 스트림을 체결시간 기준 heap 으로 병합해서 한 스레드에서 순서대로 처리한다.
+
+        heap 에는 종목별로 다음 틱 하나만 들어 있다. 러너의 주문이 같은 종목의 틱을 체결에 소비하더라도
+        처리가 끝난 뒤 다음 틱을 다시 읽어 넣으므로 전체 순서는 시뮬레이션 시간 순서를 유지한다.
+        같은 시각의 틱은 러너 등록 순서대로 처리하므로 결과가 항상 같다. RunnerLocker 의 최대 거래 종목 수도
+        이 순서대로 판단된다.
+        '''
+        order = {stock_code: i for i, stock_code in enumerate(self.__runners.keys())}
+        heap = list()
+        events = 0
+        first_time, last_time = None, None
+        started = time.perf_counter()
+
+        def push(stock_code):
+            transaction_time = trading_dao.peek_transaction_time(stock_code)
+            if transaction_time is None:
+                # 데이터 끝: EOF(-1) 를 전달해서 러너를 종료시킨다.
+                self.__dispatch(stock_code, trading_dao.get_current_price(stock_code))
+                return
+            heapq.heappush(heap, (transaction_time, order[stock_code], stock_code))
+
+        for stock_code in order:
+            push(stock_code)
+
+        while self.__running and heap.__len__() > 0:
+            transaction_time, _, stock_code = heapq.heappop(heap)
+            if all(not runner.run_flag for runner in self.__runners[stock_code]):
+                continue
+            first_time = first_time or transaction_time
+            last_time = transaction_time
+            events += 1
+            self.__dispatch(stock_code, trading_dao.get_current_price(stock_code))
+            push(stock_code)
+
+        elapsed = time.perf_counter() - started
+        self.backtest_summary = {
+            "events": events,
+            "elapsed_sec": elapsed,
+            "events_per_sec": events / elapsed if elapsed > 0 else 0.0,
+            "first_transaction_time": first_time,
+            "last_transaction_time": last_time,
+        }
+        self.__running = False
+        self.logger.info(f"TickDispatcher 백테스트 종료: {self.backtest_summary}")
+
+    def __dispatch(self, stock_code: str, price: int):
+        for runner in self.__runners.get(stock_code, ()):
+            if not runner.run_flag:
+                continue
+            try:
+                runner.on_tick(price)
+            except Exception as e:
+                self.logger.exception(f"{stock_code} 틱 처리 중 Exception 발생")
+                self.logger.exception(e)
+                runner.run_flag = False
+            if not runner.run_flag:
+                runner.finish()
@@ -0,0 +1,146 @@
+import logging
+import sqlite3
+from typing import Dict, List
+
+import numpy as np
+
+from python.src.ats.GridStrategy import GridStrategy
+from python.src.ats.dao.ColumnarTickStore import ColumnarTickStore
+
+logger = logging.getLogger(__name__)
+
+
+class GridBacktester():
+    '''그리드 전략 배치 백테스트 엔진.
+
+    AtsRunner 와 같은 GridStrategy 표를 ``BacktestDAO`` 의 체결 규칙으로 가격 배열 전체에 대해 한 번에 계산한다.
+    스레드, sleep, 틱당 SQLite 조회가 없다.
+
+    체결 규칙 (BacktestDAO 와 동일)
+    ---------------------------
+    * 매 틱마다 현재가를 하나 읽는다.
+    * 보유 물량이 없으면 entry_qty(기본 B1 수량)를 매수한다.
+    * 보유 중이면 마지막 매수가(가장 최근 lot) 기준으로 GridStrategy 표에서 처음 만족하는 타점의 수량을
+      매수/매도한다. 기본 표는 현재가 >= 매수가 + S1.price 이면 S1 수량 매도, 현재가 <= 매수가 - B1.price 이면
+      B1 수량 매수.
+    * 주문은 다음 틱 가격에 체결되며, 체결에 사용된 틱은 소비된다.
+    * 매도는 가장 최근 lot 하나를 통째로 정리하고,
+      수익 = (매도가 * 매도수량 - 매수가 * 매수수량) * (1 - FEE_RATE).
+    '''
+    FEE_RATE = 0.015  # 수수료 1.5%
+
+    def __init__(self, config):
+        self.config = config
+        self.strategy = GridStrategy.from_config(config)
+
+    def run(self, prices, transaction_times=None) -> Dict:
+        '''가격 배열 전체에 대해 전략을 실행한다.
+
+        Parameters
+        ----------
+        prices :
+            시간순으로 정렬된 현재가 배열
+
+        transaction_times :
+            prices 와 같은 길이의 체결시간 배열 (생략 가능)
+
+        Returns
+        -------
+        Dict:
+            stock_code, trades(체결 목록), buy_count, sell_count, profit, open_lots, tick_count
+        '''
+        prices = np.asarray(prices, dtype=np.int64)
+        if prices.__len__() > 0 and prices.min() < 0:
+            prices = np.abs(prices)
+        n = prices.__len__()
+
+        # 보유 lot 스택 (LIFO)
+        lot_id = np.zeros(n // 2 + 1, dtype=np.int64)
+        lot_price = np.zeros(n // 2 + 1, dtype=np.int64)
+        lot_qty = np.zeros(n // 2 + 1, dtype=np.int64)
+        top = 0
+        next_id = 1
+
+        trades: List[Dict] = list()
+        profit = 0.0
+        i = 0
+        while i < n:
+            if top == 0:
+                # 보유 물량 없음: 이번 틱을 읽고 다음 틱에 진입 매수
+                signal_idx, is_sell, qty = i, False, self.strategy.entry_qty
+            else:
+                signal_idx, level = self.strategy.find_signal(prices, i, int(lot_price[top - 1]), top)
+                if signal_idx < 0:
+                    break
+                is_sell = self.strategy.actions[level] == GridStrategy.SELL
+                qty = self.strategy.qtys[level]
+
+            fill_idx = signal_idx + 1
+            if fill_idx >= n:
+                break
+            fill_price = int(prices[fill_idx])
+
+            if is_sell:
+                top -= 1
+                trade_profit = (fill_price * qty - int(lot_price[top]) * int(lot_qty[top])) \
+                    * (1 - self.FEE_RATE)
+                profit += trade_profit
+                trades.append(self.__make_trade("sell", int(lot_id[top]), fill_idx, transaction_times,
+                                                fill_price, qty, trade_profit))
+            else:
+                lot_id[top] = next_id
+                lot_price[top] = fill_price
+                lot_qty[top] = qty
+                top += 1
+                trades.append(self.__make_trade("buy", next_id, fill_idx, transaction_times,
+                                                fill_price, qty, None))
+                next_id += 1
+            i = fill_idx + 1
+
+        return {
+            "stock_code": self.config.get("stock_code"),
+            "trades": trades,
+            "buy_count": next_id - 1,
+            "sell_count": next_id - 1 - top,
+            "profit": profit,
+            "open_lots": [(int(lot_id[k]), int(lot_price[k]), int(lot_qty[k])) for k in range(top)],
+            "tick_count": n,
+        }
+
+    @staticmethod
+    def __make_trade(side, trade_id, idx, transaction_times, price, qty, profit):
+        return {
+            "side": side,
+            "_id": trade_id,
+            "tick_index": idx,
+            "transaction_time": None if transaction_times is None else str(transaction_times[idx]),
+            "trade_price": price,
+            "qty": qty,
+            "profit": profit,
+        }
+
+
+def load_price_history(db_path: str, stock_code: str, store: ColumnarTickStore = None):
+    '''종목의 (현재가 배열, 체결시간 배열) 을 시간순으로 읽어온다.
+
+    db_path 옆의 컬럼 저장소에 변환된 뒤로 원본이 바뀌지 않은 종목이면 memory-map 배열을 그대로 반환하고,
+    아니면 back_testing_stock_data 테이블에서 읽는다.
+    '''
+    store = store or ColumnarTickStore.for_db(db_path)
+    if store.is_fresh(stock_code, db_path):
+        logger.info(f"{stock_code} 가격 데이터: 컬럼 저장소 {store.root}")
+        return store.load(stock_code)
+    logger.info(f"{stock_code} 가격 데이터: SQLite {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT current_price, transaction_time FROM back_testing_stock_data
+            WHERE stock_code = ? ORDER BY transaction_time ASC
+        ''', (stock_code,)).fetchall()
+    finally:
+        conn.close()
+
+    prices = np.fromiter((abs(int(row[0])) for row in rows), dtype=np.int64, count=rows.__len__())
+    transaction_times = [row[1] for row in rows]
+    return prices, transaction_times
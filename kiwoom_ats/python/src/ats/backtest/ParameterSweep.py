@@ -0,0 +1,132 @@
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from python.src.ats.backtest.GridBacktester import GridBacktester, load_price_history
+from python.src.ats.dao.ColumnarTickStore import ColumnarTickStore
+
+# 워커 프로세스에서 붙인 가격 배열 (읽기 전용)
+_worker_prices: Dict[str, np.ndarray] = dict()
+_worker_shms: List[shared_memory.SharedMemory] = list()
+
+
+def _init_worker(price_specs):
+    for stock_code, spec in price_specs.items():
+        if spec[0] == "store":
+            # 컬럼 저장소 memory-map: 모든 워커가 같은 페이지 캐시를 공유한다.
+            prices, _ = ColumnarTickStore(spec[1]).load(stock_code)
+        else:
+            shm = shared_memory.SharedMemory(name=spec[1])
+            prices = np.ndarray((spec[2],), dtype=np.int64, buffer=shm.buf)
+            prices.setflags(write=False)
+            _worker_shms.append(shm)
+        _worker_prices[stock_code] = prices
+
+
+def _run_one(task):
+    stock_code, config = task
+    result = GridBacktester(config).run(_worker_prices[stock_code])
+    return {
+        "stock_code": stock_code,
+        "B1.price": config["B1"]["price"],
+        "B1.qty": config["B1"]["qty"],
+        "S1.price": config["S1"]["price"],
+        "S1.qty": config["S1"]["qty"],
+        "profit": result["profit"],
+        "buy_count": result["buy_count"],
+        "sell_count": result["sell_count"],
+        "open_lots": result["open_lots"].__len__(),
+    }
+
+
+class ParameterSweep():
+    '''B1/S1 가격, 수량 조합을 프로세스 풀에서 병렬로 백테스트한다.
+
+    가격 데이터는 컬럼 저장소(ColumnarTickStore)가 있으면 각 워커가 memory-map 으로 열고,
+    없으면 부모 프로세스에서 종목당 한 번만 읽어 공유 메모리에 올린다.
+    어느 쪽이든 워커는 읽기 전용 배열로 사용한다.
+    '''
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, db_path: str = "./resources/backtest/stock_data.db", max_workers: int = None,
+                 store: ColumnarTickStore = None):
+        self.db_path = db_path
+        self.store = store or ColumnarTickStore.for_db(db_path)
+        self.max_workers = max_workers
+
+    def run(self, sweep_config: Dict[str, Dict]) -> List[Dict]:
+        '''파라미터 그리드 전체를 실행하고 종목별 수익 순위표를 반환한다.
+
+        Parameters
+        ----------
+        sweep_config :
+            종목코드별 범위. 예) {"233740": {"B1": {"price": range(10, 60, 5), "qty": [1]},
+                                              "S1": {"price": range(10, 80, 5), "qty": [1]}}}
+
+        Returns
+        -------
+        List[Dict]:
+            종목코드, 파라미터, profit, 체결 횟수, rank. 종목별로 수익이 큰 순서.
+        '''
+        tasks = list()
+        for stock_code, ranges in sweep_config.items():
+            tasks.extend((stock_code, config) for config in expand_grid(stock_code, ranges))
+
+        shms = list()
+        price_specs = dict()
+        try:
+            for stock_code in sweep_config:
+                if self.store.is_fresh(stock_code, self.db_path):
+                    price_specs[stock_code] = ("store", self.store.root)
+                    self.logger.info(f"{stock_code} 가격 데이터: 컬럼 저장소 {self.store.root}")
+                    continue
+                prices, _ = load_price_history(self.db_path, stock_code, self.store)
+                shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+                np.ndarray(prices.shape, dtype=np.int64, buffer=shm.buf)[:] = prices
+                shms.append(shm)
+                price_specs[stock_code] = ("shm", shm.name, prices.__len__())
+                self.logger.info(f"{stock_code} 가격 데이터 {prices.__len__()}건 로드")
+
+            self.logger.info(f"파라미터 조합 {tasks.__len__()}개 실행")
+            with ProcessPoolExecutor(max_workers=self.max_workers,
+                                     initializer=_init_worker, initargs=(price_specs,)) as executor:
+                chunksize = max(1, tasks.__len__() // ((self.max_workers or os.cpu_count() or 1) * 16))
+                rows = list(executor.map(_run_one, tasks, chunksize=chunksize))
+        finally:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+
+        return rank_results(rows)
+
+
+def expand_grid(stock_code: str, ranges: Dict[str, Dict[str, Iterable]]) -> List[Dict]:
+    '''B1/S1 범위를 AtsRunner 설정 형식의 dict 목록으로 펼친다.
+    '''
+    configs = list()
+    for b1_price, b1_qty, s1_price, s1_qty in itertools.product(
+            ranges["B1"]["price"], ranges["B1"]["qty"], ranges["S1"]["price"], ranges["S1"]["qty"]):
+        configs.append({
+            "stock_code": stock_code,
+            "B1": {"price": b1_price, "qty": b1_qty},
+            "S1": {"price": s1_price, "qty": s1_qty},
+        })
+    return configs
+
+
+def rank_results(rows: List[Dict]) -> List[Dict]:
+    '''종목별로 수익이 큰 순서로 정렬하고 rank 를 매긴다.
+    '''
+    rows = sorted(rows, key=lambda row: (str(row["stock_code"]), -row["profit"]))
+    rank = 0
+    prev_code = None
+    for row in rows:
+        rank = rank + 1 if row["stock_code"] == prev_code else 1
+        prev_code = row["stock_code"]
+        row["rank"] = rank
+    return rows
@@ -1,6 +1,11 @@
+from .ColumnarTickStore import ColumnarTickStore, ColumnarTickStream
+from .LedgerWriter import LedgerWriter
+from .PositionBook import PositionBook
+from .TickStream import TickStream
+from .TradeIdAllocator import TradeIdAllocator
 from .TradingInterface import TradingInterface
+from python.src.ats.Clock import SimulatedClock
 import sqlite3
-import datetime
 import logging
 import threading
 
@@ -9,17 +14,30 @@ class BacktestDAO(TradingInterface):
     logger = logging.getLogger(__name__)
     __local = threading.local()  # 스레드별 로컬 저장소
 
-    def __init__(self):
+    def __init__(self, clock: SimulatedClock = None, history_db_path: str = "./resources/backtest/stock_data.db",
+                 ledger_db_path: str = "./resources/backtest/backtest_ats.db"):
         self.logger.info("BacktestDAO 초기화")
+        self.history_db_path = history_db_path
+        self.ledger_db_path = ledger_db_path
+        # 시간은 틱의 체결시간으로만 흐른다. 체결 기록과 러너의 대기에 이 시계를 쓴다.
+        self.clock = clock or SimulatedClock()
+        self.__tick_store = ColumnarTickStore.for_db(history_db_path)
+        self.__trade_id_allocator = TradeIdAllocator()
+        self.__position_book = PositionBook()
         self.__initialize_database_connections()
+        self.__position_book.load(self.__local.trading_db_conn)
+        self.__trade_id_allocator.seed(self.__local.trading_db_conn)
+        # 백테스트 원장은 다시 만들 수 있으므로 fsync 하지 않는다.
+        self.__ledger_writer = LedgerWriter(self.ledger_db_path, durability="off")
 
     def __initialize_database_connections(self):
         """현재 스레드의 데이터베이스 연결 초기화"""
         if not hasattr(self.__local, 'history_db_conn'):
-            self.__local.history_db_conn = sqlite3.connect("./resources/backtest/stock_data.db")
-            self.__local.trading_db_conn = sqlite3.connect("./resources/backtest/backtest_ats.db")
+            self.__local.history_db_conn = sqlite3.connect(self.history_db_path)
+            self.__local.trading_db_conn = sqlite3.connect(self.ledger_db_path)
             self.__local.latest_transaction_time = None
             self.__local.current_price_map = {}
+            self.__local.tick_streams = {}
             self.__initialize_database()
 
     def __initialize_database(self):
@@ -71,102 +89,98 @@ class BacktestDAO(TradingInterface):
         return f"종목_{stock_code}"  # 백테스팅에서는 실제 종목명이 중요하지 않음
 
     def get_latest_trade_price(self, stock_code: str):
-        self.__initialize_database_connections()  # 현재 스레드의 연결 확인
-        cursor = self.__local.trading_db_conn.cursor()
-        cursor.execute('''
-            SELECT trade_price FROM trading_active_stocks 
-            WHERE stock_code = ? 
-            ORDER BY transaction_time DESC LIMIT 1
-        ''', (stock_code,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self.__position_book.latest_trade_price(stock_code)
+
+    def get_open_lot_count(self, acc_no: str, stock_code: str) -> int:
+        return self.__position_book.lot_count(acc_no, stock_code)
 
     def get_current_price(self, stock_code: str) -> int:
         self.__initialize_database_connections()  # 현재 스레드의 연결 확인
-        cursor = self.__local.history_db_conn.cursor()
-        cursor.execute('''
-            SELECT * FROM back_testing_stock_data 
-            WHERE stock_code = ? ORDER BY transaction_time ASC
-        ''', (stock_code,))
-        rows = cursor.fetchall()
-
-        if self.__local.latest_transaction_time is None:
-            next_data = rows[0]
-        else:
-            for i, row in enumerate(rows):
-                if row[3] == self.__local.latest_transaction_time:
-                    next_data = rows[i + 1] if i < len(rows) - 1 else None
-                    break
-
-        if next_data is None:
-            print(f"[백테스트] {stock_code} 모든 데이터 처리 완료")
-            return -1  # 종료 신호
-
-        current_price = abs(int(next_data[1]))
-        print(f"[백테스트] {stock_code} 현재가: {current_price}")
-        self.__local.latest_transaction_time = next_data[3]
+        tick = self.__get_tick_stream(stock_code).next_tick()
+
+        if tick is None:
+            self.logger.info(f"[백테스트] {stock_code} 모든 데이터 처리 완료")
+            return TickStream.EOF  # 종료 신호
+
+        current_price, transaction_time = tick
+        if self.logger.isEnabledFor(logging.DEBUG):
+            # 틱마다 남기는 로그. logging.json 의 sampling 으로 양을 줄인다.
+            self.logger.debug("현재가", extra={"fields": {
+                "stock_code": stock_code, "price": current_price, "transaction_time": transaction_time}})
+        self.__local.latest_transaction_time = transaction_time
+        self.clock.advance_to(transaction_time)
         self.__local.current_price_map[stock_code] = current_price
-        
+
         return current_price
+
+    def peek_transaction_time(self, stock_code: str):
+        """다음 틱의 체결시간. 소비하지 않으며, 데이터가 끝났으면 None"""
+        self.__initialize_database_connections()
+        tick = self.__get_tick_stream(stock_code).peek()
+        return None if tick is None else tick[1]
+
+    def __get_tick_stream(self, stock_code: str) -> TickStream:
+        """현재 스레드에서 사용할 종목별 틱 스트림. 최초 호출 시 한 번만 연다.
+
+        history_db_path 옆의 컬럼 저장소(ColumnarTickStore)에 변환된 뒤로 원본이 바뀌지 않은 종목이면
+        memory-map 으로 읽고, 아니면 SQLite 커서를 사용한다.
+        """
+        if stock_code not in self.__local.tick_streams:
+            if self.__tick_store.is_fresh(stock_code, self.history_db_path):
+                stream = ColumnarTickStream(self.__tick_store, stock_code)
+                self.logger.info(f"{stock_code} 틱 데이터: 컬럼 저장소 {self.__tick_store.root}")
+            else:
+                stream = TickStream(self.__local.history_db_conn, stock_code)
+                self.logger.info(f"{stock_code} 틱 데이터: SQLite {self.history_db_path}")
+            self.__local.tick_streams[stock_code] = stream
+        return self.__local.tick_streams[stock_code]
     
     def close_position(self, acc_no: str, stock_code: str, qty: int) -> None:
         self.__initialize_database_connections()
         """백테스팅용 매도 처리"""
-        print(f"[백테스트] 매도 주문\n  계좌번호: {acc_no}  종목코드: {stock_code}  주문수량: {qty}")
-        cursor = self.__local.trading_db_conn.cursor()
-        
+        self.logger.debug("매도 주문", extra={"fields": {"acc_no": acc_no, "stock_code": stock_code, "qty": qty}})
+
         # 매수 기록 찾기
-        cursor.execute('''
-            SELECT * FROM trading_active_stocks 
-            WHERE stock_code = ? AND acc_no = ? 
-            ORDER BY _id DESC LIMIT 1
-        ''', (stock_code, acc_no))
-        buy_trade = cursor.fetchone()
-        
+        buy_trade = self.__position_book.latest_lot(acc_no, stock_code)
+
         if buy_trade:
             current_price = self.get_current_price(stock_code)
-            buy_price = buy_trade[3] * buy_trade[4]  # trade_price * qty
+            if current_price == TickStream.EOF:
+                return
+            self.__position_book.pop_latest_lot(acc_no, stock_code, current_price)
+            buy_price = buy_trade[2] * buy_trade[3]  # trade_price * qty
             sell_price = current_price * qty
             profit = (sell_price - buy_price) * (1 - 0.015)  # 수수료 1.5% 고려
-            
-            # 매도 기록 저장
-            cursor.execute('''
-                INSERT INTO closed_trades 
-                (_id, transaction_time, stock_code, trade_price, qty, acc_no, profit)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (buy_trade[0], datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                  stock_code, current_price, qty, acc_no, profit))
-            
-            # 활성 거래에서 제거
-            cursor.execute('DELETE FROM trading_active_stocks WHERE _id = ?', (buy_trade[0],))
-            self.__local.trading_db_conn.commit()
+
+            # 매도 기록 저장 및 활성 거래에서 제거
+            self.__ledger_writer.close_lot(buy_trade[0], self.__fill_time(), stock_code, current_price, qty, acc_no,
+                                           profit)
 
 
     def open_position(self, acc_no: str, stock_code: str, qty: int) -> None:
         self.__initialize_database_connections()
-        print(f'[백테스트] 매수 주문\n  계좌번호: {acc_no}  종목코드: {stock_code}  주문수량: {qty}')
-        cursor = self.__local.trading_db_conn.cursor()
-        
-        transaction_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.logger.debug("매수 주문", extra={"fields": {"acc_no": acc_no, "stock_code": stock_code, "qty": qty}})
+
         trade_price = self.get_current_price(stock_code)
-        
-        cursor.execute('''
-            INSERT INTO trading_active_stocks 
-            (_id, transaction_time, stock_code, trade_price, qty, acc_no)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (self.__get_next_trade_id(), transaction_time, 
-              stock_code, trade_price, qty, acc_no))
-        
-        self.__local.trading_db_conn.commit() 
+        if trade_price == TickStream.EOF:
+            return
+        transaction_time = self.__fill_time()
+
+        trade_id = self.__get_next_trade_id()
+        self.__position_book.add_lot(acc_no, stock_code, (trade_id, transaction_time, trade_price, qty))
+        self.__ledger_writer.open_lot(trade_id, transaction_time, stock_code, trade_price, qty, acc_no)
+
+    def __fill_time(self) -> str:
+        """방금 체결에 사용한 틱의 체결시간. 포트폴리오 백테스트에서 다른 종목의 시계가 앞서 있어도 틱 시각 그대로 기록한다."""
+        return SimulatedClock.parse(self.__local.latest_transaction_time).strftime('%Y-%m-%d %H:%M:%S')
+
+    def flush(self):
+        """비동기로 쓰고 있는 원장 변경이 모두 DB 에 반영될 때까지 기다린다."""
+        self.__ledger_writer.flush()
+
+    def close(self) -> None:
+        self.__ledger_writer.close()
 
     def __get_next_trade_id(self) -> int:
         """다음 거래 ID를 생성합니다."""
-        cursor = self.__local.trading_db_conn.cursor()
-        cursor.execute('''
-            SELECT COUNT(*) FROM (
-                SELECT _id FROM trading_active_stocks
-                UNION ALL
-                SELECT _id FROM closed_trades
-            )
-        ''')
-        return cursor.fetchone()[0] + 1
\ No newline at end of file
+        return self.__trade_id_allocator.next_id(self.__local.trading_db_conn)
\ No newline at end of file
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from python.src.ats.Clock import SimulatedClock
+
+
+class ColumnarTickStore():
+    '''백테스팅용 - 종목별, 컬럼별 .npy 파일로 저장한 체결 데이터.
+
+    디렉토리 구조
+    ----------
+    <root>/<stock_code>/current_price.npy      int64, 시간순
+    <root>/<stock_code>/transaction_time.npy   int64, YYYYMMDDHHMMSS
+    <root>/<stock_code>/source.json            변환한 SQLite 파일(과 -wal 파일)의 경로, mtime, 크기, 건수
+
+    읽을 때는 memory-map 으로 열기 때문에 파싱 과정이 없고, 여러 워커 프로세스가 같은 페이지를 공유한다.
+    원본 DB 가 바뀌었으면 is_fresh() 가 False 가 되므로 호출한 쪽은 SQLite 에서 읽어야 한다.
+    '''
+    DEFAULT_ROOT = "./resources/backtest/columnar"
+    COLUMNS = ("current_price", "transaction_time")
+    SOURCE_FILE = "source.json"
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        self.__warned = set()
+
+    @classmethod
+    def for_db(cls, db_path: str) -> "ColumnarTickStore":
+        '''db_path 옆의 columnar 디렉토리를 쓰는 저장소. 기본 DB 이면 DEFAULT_ROOT 와 같다.
+        '''
+        return cls(os.path.join(os.path.dirname(db_path) or ".", "columnar"))
+
+    def has(self, stock_code: str) -> bool:
+        return all(os.path.exists(self.__column_path(stock_code, column)) for column in self.COLUMNS)
+
+    def is_fresh(self, stock_code: str, db_path: str) -> bool:
+        '''db_path 를 변환한 뒤로 원본이 바뀌지 않았으면 True. 다르면 종목마다 한 번 경고를 남기고 False
+        '''
+        if not self.has(stock_code):
+            return False
+        reason = self.__stale_reason(stock_code, db_path)
+        if reason is not None:
+            if stock_code in self.__warned:
+                return False
+            self.__warned.add(stock_code)
+            self.logger.warning(f"{stock_code} 컬럼 저장소({self.root})를 사용하지 않습니다: {reason}. "
+                                f"SQLite({db_path}) 에서 읽습니다.")
+            return False
+        return True
+
+    def load(self, stock_code: str) -> Tuple[np.ndarray, np.ndarray]:
+        '''(현재가, 체결시간) 컬럼을 읽기 전용 memory-map 으로 연다.
+        '''
+        return tuple(np.load(self.__column_path(stock_code, column), mmap_mode="r")
+                     for column in self.COLUMNS)
+
+    def stock_codes(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return list()
+        return sorted(code for code in os.listdir(self.root) if self.has(code))
+
+    def convert_from_sqlite(self, db_path: str = "./resources/backtest/stock_data.db",
+                            batch_size: int = 100000) -> List[str]:
+        '''stock_data.db 의 back_testing_stock_data 테이블을 컬럼 저장소로 변환한다.
+
+        Returns
+        -------
+        List[str]:
+            변환한 종목코드 목록
+        '''
+        conn = sqlite3.connect(db_path)
+        try:
+            codes = [row[0] for row in conn.execute(
+                "SELECT DISTINCT stock_code FROM back_testing_stock_data")]
+            for stock_code in codes:
+                self.__convert_stock(conn, str(stock_code), batch_size)
+        finally:
+            conn.close()
+        return [str(code) for code in codes]
+
+    def __convert_stock(self, conn: sqlite3.Connection, stock_code: str, batch_size: int):
+        count = conn.execute("SELECT COUNT(*) FROM back_testing_stock_data WHERE stock_code = ?",
+                             (stock_code,)).fetchone()[0]
+
+        # 임시 디렉토리에 쓰고 마지막에 교체해서, 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 한다.
+        final_dir = os.path.join(self.root, stock_code)
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        prices = np.lib.format.open_memmap(os.path.join(tmp_dir, "current_price.npy"),
+                                           mode="w+", dtype=np.int64, shape=(count,))
+        times = np.lib.format.open_memmap(os.path.join(tmp_dir, "transaction_time.npy"),
+                                          mode="w+", dtype=np.int64, shape=(count,))
+        cursor = conn.execute('''
+            SELECT current_price, transaction_time FROM back_testing_stock_data
+            WHERE stock_code = ? ORDER BY transaction_time ASC
+        ''', (stock_code,))
+        pos = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if rows.__len__() == 0:
+                break
+            end = pos + rows.__len__()
+            prices[pos:end] = [abs(int(row[0])) for row in rows]
+            times[pos:end] = [self.__time_value(row[1]) for row in rows]
+            pos = end
+        prices.flush()
+        times.flush()
+        del prices, times
+        with open(os.path.join(tmp_dir, self.SOURCE_FILE), "w", encoding="utf-8") as f:
+            json.dump(dict(self.__db_signature(conn), rows=count), f)
+
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp_dir, final_dir)
+        self.logger.info(f"{stock_code} 컬럼 저장소 변환 완료: {count}건")
+
+    def __stale_reason(self, stock_code: str, db_path: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, str(stock_code), self.SOURCE_FILE), encoding="utf-8") as f:
+                source = json.load(f)
+        except (OSError, ValueError):
+            return "원본 정보(source.json)가 없음"
+        if not os.path.exists(db_path):
+            return None if source.get("db_path") == os.path.abspath(db_path) else "원본 DB 가 없음"
+        current = self.__db_signature_of(db_path)
+        for key in ("db_path", "db_mtime_ns", "db_size", "wal_mtime_ns", "wal_size"):
+            if source.get(key) != current[key]:
+                return f"원본 DB 의 {key} 가 다름"
+        rows = np.load(self.__column_path(stock_code, "current_price"), mmap_mode="r").__len__()
+        if source.get("rows") != rows:
+            return "건수가 다름"
+        return None
+
+    def __db_signature(self, conn: sqlite3.Connection):
+        db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+        return self.__db_signature_of(db_path)
+
+    @staticmethod
+    def __db_signature_of(db_path: str):
+        '''DB 파일과 -wal 파일의 mtime, 크기. DownStockData 는 WAL 을 쓰므로 checkpoint 전의 변경은 -wal 에만 있다.
+        읽기만 한 연결도 빈 -wal 을 만들므로 비어 있는 -wal 은 없는 것으로 본다.
+        '''
+        stat = os.stat(db_path)
+        signature = {"db_path": os.path.abspath(db_path), "db_mtime_ns": stat.st_mtime_ns, "db_size": stat.st_size,
+                     "wal_mtime_ns": 0, "wal_size": 0}
+        try:
+            wal = os.stat(db_path + "-wal")
+        except OSError:
+            return signature
+        if wal.st_size > 0:
+            signature.update(wal_mtime_ns=wal.st_mtime_ns, wal_size=wal.st_size)
+        return signature
+
+    @staticmethod
+    def __time_value(transaction_time) -> int:
+        '''체결시간을 YYYYmmddHHMMSS 정수로. "YYYY-mm-dd HH:MM:SS" 형식도 TickStream 처럼 받아들인다.
+        '''
+        if isinstance(transaction_time, int) or str(transaction_time).isdigit():
+            return int(transaction_time)
+        return int(SimulatedClock.parse(transaction_time).strftime("%Y%m%d%H%M%S"))
+
+    def __column_path(self, stock_code: str, column: str) -> str:
+        return os.path.join(self.root, str(stock_code), f"{column}.npy")
+
+
+class ColumnarTickStream():
+    '''ColumnarTickStore 위에서 동작하는 TickStream. next_tick() 인터페이스가 같다.
+
+    TickStream 의 fetchmany 처럼 batch_size 건씩 슬라이스를 파이썬 tuple 목록으로 바꿔 두고 꺼낸다.
+    memmap 원소를 하나씩 읽으면 numpy 스칼라를 만드는 비용 때문에 SQLite 보다 느리다.
+    '''
+
+    def __init__(self, store: ColumnarTickStore, stock_code: str, batch_size: int = 4096):
+        self.stock_code = stock_code
+        self.__prices, self.__times = store.load(stock_code)
+        self.__batch_size = batch_size
+        self.__batch: List[Tuple[int, str]] = list()
+        self.__start = 0
+        self.__pos = 0
+        self.latest_transaction_time: Optional[str] = None
+
+    def next_tick(self) -> Optional[Tuple[int, str]]:
+        tick = self.peek()
+        if tick is None:
+            return None
+        self.__pos += 1
+        self.latest_transaction_time = tick[1]
+        return tick
+
+    def peek(self) -> Optional[Tuple[int, str]]:
+        if self.__pos >= self.__batch.__len__():
+            if not self.__fill():
+                return None
+        return self.__batch[self.__pos]
+
+    def is_exhausted(self) -> bool:
+        return self.__pos >= self.__batch.__len__() and self.__start >= self.__prices.__len__()
+
+    def close(self):
+        self.__batch = list()
+        self.__pos = 0
+        self.__start = self.__prices.__len__()
+
+    def __fill(self) -> bool:
+        start, end = self.__start, min(self.__start + self.__batch_size, self.__prices.__len__())
+        if start >= end:
+            return False
+        self.__batch = list(zip(self.__prices[start:end].tolist(), map(str, self.__times[start:end].tolist())))
+        self.__start = end
+        self.__pos = 0
+        return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    ColumnarTickStore().convert_from_sqlite()
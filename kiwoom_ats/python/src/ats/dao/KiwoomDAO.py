@@ -2,14 +2,23 @@ import logging
 import sqlite3
 import threading
 from typing import Dict, List
+from .LedgerWriter import LedgerWriter
+from .PositionBook import PositionBook, normalize_stock_code
+from .PriceBoard import PriceBoard
+from .ScreenPool import ScreenPool
+from .TradeIdAllocator import TradeIdAllocator
+from .TrRequestRegistry import TrRequest, TrRequestRegistry
+from .TrRequestScheduler import TrRequestScheduler
 from .TradingInterface import TradingInterface
 from PyQt5.QAxContainer import QAxWidget
-from PyQt5.QtCore import QEventLoop
+from PyQt5.QtCore import QEventLoop, QTimer
 from PyQt5.QtTest import QTest
-import datetime
+import time
 
 # 설정 파서 및 예외 클래스 임포트
 from python.src.ats.ConfigParser import ConfigParser
+from python.src.ats.LatencyMetrics import LatencyMetrics
+from python.src.ats.TickDispatcher import TickDispatcher
 from python.src.ats.StockException import (NoSuchStockCodeError,
                                            NoSuchStockPositionError)
 
@@ -20,20 +29,29 @@ class KiwoomDAO(TradingInterface):
     logger = logging.getLogger(__name__)
     __thread_locker = threading.Lock()
     __local = threading.local()  # 스레드별 로컬 저장소
-    __tr_rq_single_data = None
-    __tr_rq_multi_data = None
-    __tr_data_cnt_limit = 0
+    __tr_timeout = 10.0  # TR 응답 대기 시간(초)
+    KW_BATCH_SIZE = 100  # CommKwRqData 한 번에 조회할 수 있는 최대 종목 수
     __market_status = -1
-    __scr_no_counter = 2000
-    __scr_no_map: Dict[str, str] = dict()
 
-    def __init__(self):
+    def __init__(self, tr_limits=TrRequestScheduler.DEFAULT_LIMITS):
         self.logger.info("KiwoomDAO 초기화")
+        self.__trade_id_allocator = TradeIdAllocator()
+        self.__position_book = PositionBook()
+        self.__price_board = PriceBoard.instance()
+        self.__latency_metrics = LatencyMetrics.instance()
+        # 키움은 화면번호 200개, 화면당 실시간 등록 100종목까지 허용한다.
+        # TR/주문용 화면(2000~)과 실시간 시세용 화면(3000~)을 나눠서 합계 190개 안에서 재사용한다.
+        self.__tr_screens = ScreenPool(2000, 100)
+        self.__real_screens = ScreenPool(3000, 90, slots_per_screen=100, on_evict=self.__on_real_screen_evicted)
         self.__initialize_connections()
+        self.__position_book.load(self.__local.trading_db_conn)
+        self.__trade_id_allocator.seed(self.__local.trading_db_conn)
+        self.__ledger_writer = LedgerWriter("./resources/trading/trading.db", durability="full")
+        self.__tr_scheduler = TrRequestScheduler(limits=tr_limits, sleep=self.__wait_tr_slot)
 
         self.kiwoom_instance = QAxWidget("KHOPENAPI.KHOpenAPICtrl.1")
+        self.__tr_registry = TrRequestRegistry()
         self.__register_all_slots()
-        self.__tr_global_eventloop = QEventLoop()
 
         if int(self.kiwoom_instance.dynamicCall("GetConnectState()")) == 0:
             self.__login_eventloop = QEventLoop()
@@ -56,7 +74,6 @@ class KiwoomDAO(TradingInterface):
         """현재 스레드의 연결 초기화"""
         if not hasattr(self.__local, 'trading_db_conn'):
             self.__local.trading_db_conn = self.__create_trading_db_connection()
-            self.__local.current_price_map = {}
             self.__initialize_database()
 
     def __create_trading_db_connection(self):
@@ -113,64 +130,119 @@ class KiwoomDAO(TradingInterface):
         Returns:
             int: 예수금
         """
-        self.__thread_locker.acquire()
         balance = int(self.__get_tr_data({
             "계좌번호": acc_no,
             "비밀번호": "",
             "상장폐지조회구분": "1",
             "비밀번호입력매체구분": "00"
-        }, "주식 잔고 요청", "OPW00004", "0", "5000", ["예수금"], [])["single_data"]["예수금"])
-        self.__thread_locker.release()
+        }, "주식 잔고 요청", "OPW00004", "0", "5000", ["예수금"], [],
+            priority=TrRequestScheduler.PRIORITY_ACCOUNT)["single_data"]["예수금"])
         return balance
 
     def get_current_price(self, stock_code: str) -> int:
         self.__initialize_connections()
-        if not self.__local.current_price_map.__contains__(stock_code):
-            self.__thread_locker.acquire()
+        stock_code = normalize_stock_code(stock_code)
+        price = self.__price_board.get(stock_code)
+        if price is None or stock_code not in self.__real_screens:
+            # 처음 조회하는(또는 실시간 등록이 해제된) 종목만 TR 로 받아오고, 이후는 실시간 체결로 갱신된 가격을 읽는다.
             current_price: str = self.__get_tr_data({
                 "종목코드": stock_code
-            }, "현재가 요청", "OPT10003", "0", self.__generate_scr_no(stock_code), ["현재가"], [], cnt=1)["single_data"]["현재가"]
+            }, "현재가 요청", "OPT10003", "0", self.__tr_screens.acquire(stock_code), ["현재가"], [], cnt=1)["single_data"]["현재가"]
             
             if current_price.__len__() == 0:
                 raise RuntimeError(f"{stock_code} 종목의 현재가 받아올 수 없음")
-            current_price = abs(int(current_price))
+            if price is None:
+                self.__price_board.initialize(stock_code, abs(int(current_price)))
+            else:
+                self.__price_board.update(stock_code, abs(int(current_price)))
+            price = self.__price_board.get(stock_code)
 
-            self.__local.current_price_map.setdefault(stock_code, current_price)
             self.logger.info(f"{stock_code} 실시간 시세 등록")
-            self.kiwoom_instance.dynamicCall(
-                "SetRealReg(QString, QString, QString, QString)", self.__generate_scr_no(stock_code), stock_code, "10", "1")
-            self.__thread_locker.release()
+            self.__register_real_data([stock_code])
+
+        return price
+
+    def warm_up(self, stock_codes: List[str]) -> Dict[str, int]:
+        """여러 종목의 현재가를 관심종목 TR(OPTKWFID) 로 한 번에 받아오고 실시간 시세를 묶어서 등록한다.
 
-        return self.__local.current_price_map[stock_code]
+        요청 한 번에 최대 100종목. 받아온 가격은 PriceBoard 에 올라가므로 이후 get_current_price 는 TR 없이 반환한다.
+
+        Returns:
+            Dict[str, int]: 종목코드별 현재가
+        """
+        stock_codes = list(dict.fromkeys(normalize_stock_code(stock_code) for stock_code in stock_codes))
+        prices = dict()
+        for start in range(0, stock_codes.__len__(), self.KW_BATCH_SIZE):
+            batch = stock_codes[start:start + self.KW_BATCH_SIZE]
+            scr_no = self.__tr_screens.acquire(f"관심종목{start // self.KW_BATCH_SIZE}")
+            records = self.__get_kw_tr_data(batch, "관심종목 현재가 요청", scr_no, ["종목코드", "현재가"])["multi_data"]
+            for record in records:
+                if record["종목코드"].__len__() == 0 or record["현재가"].__len__() == 0:
+                    continue
+                self.__price_board.initialize(record["종목코드"], abs(int(record["현재가"])))
+                prices[record["종목코드"]] = self.__price_board.get(record["종목코드"])
+
+            self.__register_real_data([stock_code for stock_code in batch if stock_code in prices])
+            missing = [stock_code for stock_code in batch if stock_code not in prices]
+            if missing.__len__() > 0:
+                self.logger.warning(f"관심종목 조회에서 현재가를 받지 못한 종목: {missing}")
+
+        self.logger.info(f"{prices.__len__()}/{stock_codes.__len__()} 종목 현재가 조회 및 실시간 시세 등록 완료")
+        return prices
+
+    def get_stock_state(self, stock_code: str) -> str:
+        """종목 상태 (예: "증거금20%|담보대출|거래정지"). TR 없이 마스터 정보에서 읽는다."""
+        with self.__thread_locker:
+            return self.kiwoom_instance.dynamicCall("GetMasterStockState(QString)", stock_code)
+
+    def get_screen_stats(self) -> Dict[str, Dict[str, int]]:
+        """사용 중인 화면 수와 등록 수. tr: TR/주문용, real: 실시간 시세용"""
+        return {"tr": self.__tr_screens.stats(), "real": self.__real_screens.stats()}
+
+    def wait_for_price_change(self, stock_code: str, seq: int, timeout: float = None):
+        """seq 이후 stock_code 의 현재가가 갱신될 때까지 대기. (현재가, seq) 반환"""
+        return self.__price_board.wait_for_change(normalize_stock_code(stock_code), seq, timeout)
 
     def open_position(self, acc_no: str, stock_code: str, qty: int) -> None:
         # 키움 API를 통한 실제 매수 주문만 수행
         self.logger.info(f"매수 주문 요청\n  계좌번호: {acc_no}  종목코드: {stock_code}  주문수량: {qty}")
         self.kiwoom_instance.dynamicCall(
             "SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)", [
-                "주식 매수 주문", self.__generate_scr_no(stock_code), acc_no, 1, stock_code, qty, 0, "03", ""])
+                "주식 매수 주문", self.__tr_screens.acquire(stock_code), acc_no, 1, stock_code, qty, 0, "03", ""])
+        self.__record_tick_to_order(stock_code)
 
     def close_position(self, acc_no: str, stock_code: str, qty: int) -> None:
         self.logger.info(f"매도 주문 요청\n  계좌번호: {acc_no}  종목코드: {stock_code}  주문수량: {qty}")
         # 키움 API를 통한 실제 매도 주문만 수행
         self.kiwoom_instance.dynamicCall(
             "SendOrder(QString, QString, QString, int, QString, int, int, QString, QString)", [
-                "주식 매도 주문", self.__generate_scr_no(stock_code), acc_no, 2, stock_code, qty, 0, "03", ""])
+                "주식 매도 주문", self.__tr_screens.acquire(stock_code), acc_no, 2, stock_code, qty, 0, "03", ""])
+        self.__record_tick_to_order(stock_code)
+
+    def __record_tick_to_order(self, stock_code: str):
+        """현재가를 마지막으로 받은 시점부터 SendOrder 반환까지의 시간 기록"""
+        tick_ns = self.__price_board.last_update_ns(normalize_stock_code(stock_code))
+        if tick_ns > 0:
+            self.__latency_metrics.record("tick_to_order", time.perf_counter_ns() - tick_ns,
+                                          stock_code=normalize_stock_code(stock_code))
 
     def get_latest_trade_price(self, stock_code: str):
-        self.__initialize_connections()
-        cursor = self.__local.trading_db_conn.cursor()
-        cursor.execute('''
-            SELECT trade_price FROM trading_active_stocks 
-            WHERE stock_code = ? 
-            ORDER BY transaction_time DESC LIMIT 1
-        ''', (stock_code,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self.__position_book.latest_trade_price(stock_code)
+
+    def get_open_lot_count(self, acc_no: str, stock_code: str) -> int:
+        return self.__position_book.lot_count(acc_no, stock_code)
+
+    def close(self) -> None:
+        self.__ledger_writer.close()
+
+    def get_tr_metrics(self) -> Dict[str, float]:
+        """TR 요청 대기열 길이, 대기 시간 등"""
+        return self.__tr_scheduler.metrics()
 
     # 기존 private 메서드들...
     def __get_tr_data(self, input_value: Dict[str, str], rq_name, tr_code, perv_next: str, scr_no: str,
-                      rq_single_data: List[str], rq_multi_data: List[str], cnt=0):
+                      rq_single_data: List[str], rq_multi_data: List[str], cnt=0,
+                      priority=TrRequestScheduler.PRIORITY_QUOTE):
         '''키움 API서버에 TR 데이터를 요청한다.
         Parameters
         ----------
@@ -192,38 +264,118 @@ class KiwoomDAO(TradingInterface):
         rq_multi_data :
             받아오고자 하는 멀티데이터 목록
 
+        priority :
+            TrRequestScheduler.PRIORITY_* 값. 작을수록 먼저 요청된다.
+
         Returns
         -------
         Dict[str, Dict[str, str]]
         '''
-        self.__tr_data_cnt_limit = cnt
-        self.__tr_rq_single_data = rq_single_data
-        self.__tr_rq_multi_data = rq_multi_data
+        request = self.__tr_registry.register(scr_no, rq_name, rq_single_data, rq_multi_data, cnt,
+                                              timeout=self.__tr_register_timeout())
+
+        def send():
+            # SetInputValue 와 CommRqData 사이에 다른 스레드의 요청이 끼어들지 않도록 묶는다.
+            with self.__thread_locker:
+                self.__set_input_values(input_value)   # inputvalue 대입 (재시도 시 다시 대입)
+                return self.__comm_rq_data(rq_name, tr_code, perv_next, scr_no)
+
+        return self.__send_tr_request(request, send, priority, f"{rq_name}({tr_code})",
+                                      tr_code=tr_code, stock_code=input_value.get("종목코드", ""))
 
-        self.__set_input_values(input_value)   # inputvalue 대입
+    def __get_kw_tr_data(self, stock_codes: List[str], rq_name, scr_no: str, rq_multi_data: List[str],
+                         priority=TrRequestScheduler.PRIORITY_QUOTE):
+        '''관심종목 TR(CommKwRqData, OPTKWFID) 로 최대 100종목을 한 번에 조회한다. 반환 형식은 __get_tr_data 와 같다.
+        '''
+        request = self.__tr_registry.register(scr_no, rq_name, [], rq_multi_data,
+                                              timeout=self.__tr_register_timeout())
+
+        def send():
+            with self.__thread_locker:
+                return self.__comm_kw_rq_data(stock_codes, rq_name, scr_no)
+
+        return self.__send_tr_request(request, send, priority, f"{rq_name}(OPTKWFID)", tr_code="OPTKWFID")
+
+    def __send_tr_request(self, request: TrRequest, send, priority, description: str, **labels):
+        started = time.perf_counter_ns()
+        try:
+            val = self.__tr_scheduler.execute(send, priority)
+            if val != 0:
+                raise RuntimeError(f"{description} 요청 실패 [{val}]")
+            result = self.__wait_tr_response(request)
+            # 조회 제한 대기 시간을 포함한 요청~응답 왕복 시간
+            self.__latency_metrics.record("tr_round_trip", time.perf_counter_ns() - started, **labels)
+            return result
+        except BaseException as e:
+            self.__tr_registry.fail(request, e)
+            raise
+
+    def __tr_register_timeout(self) -> float:
+        '''같은 키의 앞 요청을 기다릴 시간. 앞 요청의 응답을 처리할 Qt 메인 스레드는 기다리지 않고 바로 실패한다.
+        '''
+        return 0.0 if threading.current_thread() is threading.main_thread() else self.__tr_timeout
 
-        self.__comm_rq_data(rq_name, tr_code, perv_next, scr_no)
-        self.__tr_global_eventloop = QEventLoop()
-        self.__tr_global_eventloop.exec_()
-        return self.__tr_data_temp
+    def __wait_tr_slot(self, seconds: float):
+        '''조회 제한/backoff 대기. Qt 메인 스레드에서는 이벤트가 계속 처리되도록 qWait, 러너 스레드에서는 sleep
+        '''
+        if threading.current_thread() is threading.main_thread():
+            QTest.qWait(max(1, int(seconds * 1000)))
+        else:
+            time.sleep(seconds)
 
-    def __generate_scr_no(self, stock_code: str) -> str:
-        if not self.__scr_no_map.__contains__(stock_code):
-            self.__scr_no_map[stock_code] = str(self.__scr_no_counter)
-            self.__scr_no_counter += 1
+    def __wait_tr_response(self, request: TrRequest):
+        '''OnReceiveTrData 가 request 의 future 를 완료할 때까지 기다린다.
 
-        return self.__scr_no_map[stock_code]
+        Qt 메인 스레드에서는 이벤트를 계속 처리해야 하므로 QEventLoop 로, 러너 스레드에서는 future 로 기다린다.
+        '''
+        if threading.current_thread() is threading.main_thread():
+            if not request.future.done():
+                eventloop = QEventLoop()
+                request.future.add_done_callback(lambda _: eventloop.exit())
+                QTimer.singleShot(int(self.__tr_timeout * 1000), eventloop.exit)
+                if not request.future.done():
+                    eventloop.exec_()
+            if not request.future.done():
+                raise TimeoutError(f"TR 응답 대기 시간 초과: {request.key}")
+            return request.future.result()
+        return request.future.result(timeout=self.__tr_timeout)
+
+    def __register_real_data(self, stock_codes: List[str]):
+        '''실시간 시세(현재가) 등록. 같은 화면에 배정된 종목끼리 SetRealReg 한 번으로 묶는다.
+        '''
+        screens: Dict[str, List[str]] = dict()
+        for stock_code in stock_codes:
+            screens.setdefault(self.__real_screens.acquire(stock_code), list()).append(stock_code)
+        with self.__thread_locker:
+            for scr_no, codes in screens.items():
+                self.kiwoom_instance.dynamicCall(
+                    "SetRealReg(QString, QString, QString, QString)", scr_no, ";".join(codes), "10", "1")
+
+    def __on_real_screen_evicted(self, scr_no: str, stock_code: str, screen_empty: bool):
+        self.logger.warning(f"실시간 등록 한도 초과, 가장 오래 체결이 없던 {stock_code} 실시간 해제 (화면 {scr_no})")
+        with self.__thread_locker:
+            self.kiwoom_instance.dynamicCall("SetRealRemove(QString, QString)", scr_no, stock_code)
+            if screen_empty:
+                self.kiwoom_instance.dynamicCall("DisconnectRealData(QString)", scr_no)
 
     def __comm_rq_data(self, rq_name, tr_code, n_prev_next, scr_no):
         val = self.kiwoom_instance.dynamicCall(
                 "CommRqData(QString, QString, QString, QString)", rq_name, tr_code, n_prev_next, scr_no)
         val = int(val)
-        if val != 0:
-            if val == -200:
-                self.logger.fatal(f"RQ DATA [{val}]: 시세 과부하")
-            elif val == -201:
+        if val != 0 and val != TrRequestScheduler.OVERLOAD:  # 시세 과부하는 TrRequestScheduler 가 재시도
+            if val == -201:
                 self.logger.fatal(f"RQ DATA [{val}]:  조회 문작성 에러")
             self.logger.fatal(f"RQ DATA [{val}]: 에러 발생!!!")
+        return val
+
+    def __comm_kw_rq_data(self, stock_codes: List[str], rq_name, scr_no):
+        val = self.kiwoom_instance.dynamicCall(
+                "CommKwRqData(QString, bool, int, int, QString, QString)",
+                ";".join(stock_codes), False, stock_codes.__len__(), 0, rq_name, scr_no)
+        val = int(val)
+        if val != 0 and val != TrRequestScheduler.OVERLOAD:
+            self.logger.fatal(f"KW RQ DATA [{val}]: 에러 발생!!!")
+        return val
 
     def __set_input_values(self, input_value: Dict[str, str]):
         '''
@@ -238,31 +390,37 @@ class KiwoomDAO(TradingInterface):
         CommRqData 처리용 슬롯
         '''
         if tr_code == "KOA_NORMAL_BUY_KQ_ORD":
-            print(scr_no, rq_name, tr_code)
+            self.logger.debug(f"주문 TR 응답: {scr_no} {rq_name} {tr_code}")
+            return
+
+        request = self.__tr_registry.get(scr_no, rq_name)
+        if request is None:
+            self.logger.warning(f"요청하지 않은 TR 응답: {scr_no} {rq_name} {tr_code}")
             return
 
         # tr데이터 중, 멀티데이터의 레코드 개수를 받아옴.
-        if self.__tr_data_cnt_limit == 0:
+        if request.cnt_limit == 0:
             n_record = self.kiwoom_instance.dynamicCall(
                 "GetRepeatCnt(QString, QString)", tr_code, rq_name)
         else:
             n_record = min(self.kiwoom_instance.dynamicCall(
-                "GetRepeatCnt(QString, QString)", tr_code, rq_name), self.__tr_data_cnt_limit)
+                "GetRepeatCnt(QString, QString)", tr_code, rq_name), request.cnt_limit)
 
-        self.__tr_data_temp = dict()     # 이전에 저장되어 있던 임시 tr_data 삭제.
-        self.__tr_data_temp["single_data"] = dict()     # empty dict 선언
-        for s_data in self.__tr_rq_single_data:
-            self.__tr_data_temp["single_data"][s_data] = self.kiwoom_instance.dynamicCall(
+        tr_data = dict()
+        tr_data["single_data"] = dict()     # empty dict 선언
+        for s_data in request.rq_single_data:
+            tr_data["single_data"][s_data] = self.kiwoom_instance.dynamicCall(
                 "GetCommData(QString, QString, int, QString)", tr_code, rq_name, 0, s_data).strip()
 
-        self.__tr_data_temp["multi_data"] = list()
+        tr_data["multi_data"] = list()
         for i in range(n_record):
             m_data_dict_temp = dict()   # 멀티데이터에서 레코드 하나에 담길 딕셔너리 선언
-            for m_data in self.__tr_rq_multi_data:
+            for m_data in request.rq_multi_data:
                 m_data_dict_temp[m_data] = self.kiwoom_instance.dynamicCall(
                     "GetCommData(QString, QString, int, QString)", tr_code, rq_name, i, m_data).strip()
-            self.__tr_data_temp["multi_data"].append(m_data_dict_temp)
-        self.__tr_global_eventloop.exit()
+            tr_data["multi_data"].append(m_data_dict_temp)
+        self.__tr_registry.resolve(request, tr_data)
+
     # 키움 OpenAPI 연결 시 호출되는 슬롯
     def __on_event_connect_slot(self, err_code):
         if err_code == 0:  # 연결 성공
@@ -284,10 +442,12 @@ class KiwoomDAO(TradingInterface):
 
     # 실시간 데이터 수신 시 호출되는 슬롯
     def __on_receive_real_data(self, stock_code, real_type, real_data):
-        self.__initialize_connections()
         if real_type == "주식체결":  # 실시간 주식 체결 데이터
-            self.__local.current_price_map[stock_code] = abs(int(self.kiwoom_instance.dynamicCall(
-                "GetCommRealData(QString, int)", stock_code, 10)))  # 현재가 업데이트
+            price = abs(int(self.kiwoom_instance.dynamicCall(
+                "GetCommRealData(QString, int)", stock_code, 10)))
+            self.__price_board.update(stock_code, price)  # 현재가 업데이트
+            self.__real_screens.touch(stock_code)
+            TickDispatcher.instance().publish(stock_code, price)
         elif real_type == "장시작시간":  # 장 시작 시간
             self.__market_status = int(self.kiwoom_instance.dynamicCall(
                 "GetCommRealData(QString, int)", stock_code, 215))  # 시장 상태 업데이트
@@ -298,6 +458,7 @@ class KiwoomDAO(TradingInterface):
     # 체결 데이터 수신 시 호출되는 슬롯
     def __on_receive_chejan_data(self, gubun, item_cnt, fid_list):
         """체결 데이터 수신 시 호출되는 슬롯"""
+        started = time.perf_counter_ns()
         self.__initialize_connections()  # 스레드별 연결 확인
         acc_no = self.kiwoom_instance.dynamicCall("GetChejanData(9201)")
         stock_code = self.kiwoom_instance.dynamicCall("GetChejanData(9001)")[1:].strip()
@@ -307,52 +468,36 @@ class KiwoomDAO(TradingInterface):
         trade_type = self.kiwoom_instance.dynamicCall("GetChejanData(212)").strip()
 
         if gubun == "1":  # 주문 체결 완료
-            cursor = self.__local.trading_db_conn.cursor()  # 스레드별 연결 사용
-            transaction_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            transaction_time = self.clock.timestamp()
 
             if trade_type == "2":  # 매수
                 try:
-                    cursor.execute('''
-                        INSERT INTO trading_active_stocks 
-                        (_id, transaction_time, stock_code, trade_price, qty, acc_no)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (self.__get_next_trade_id(), transaction_time, stock_code, trade_price, qty, acc_no))
-                    self.__local.trading_db_conn.commit()
+                    trade_id = self.__get_next_trade_id()
+                    self.__position_book.add_lot(acc_no, stock_code, (trade_id, transaction_time, trade_price, qty))
+                    self.__ledger_writer.open_lot(trade_id, transaction_time, stock_code, trade_price, qty, acc_no)
                     self.logger.info(f"매수 체결 완료: 계좌번호: {acc_no}, 종목코드: {stock_code}, 체결가격: {trade_price}, 체결수량: {qty}")
                 except Exception as e:
-                    self.__local.trading_db_conn.rollback()
                     self.logger.error(f"매수 처리 중 오류 발생: {e}")
 
             elif trade_type == "1":  # 매도
                 try:
-                    cursor.execute('''
-                        SELECT * FROM trading_active_stocks 
-                        WHERE stock_code = ? AND acc_no = ? 
-                        ORDER BY _id DESC LIMIT 1
-                    ''', (stock_code, acc_no))
-                    buy_trade = cursor.fetchone()
+                    buy_trade = self.__position_book.pop_latest_lot(acc_no, stock_code, trade_price)
 
                     if buy_trade:
-                        buy_price = buy_trade[3] * buy_trade[4]
+                        buy_price = buy_trade[2] * buy_trade[3]
                         sell_price = trade_price * qty
                         profit = (sell_price - buy_price) * (1 - 0.015)
 
-                        cursor.execute('''
-                            INSERT INTO closed_trades 
-                            (_id, transaction_time, stock_code, trade_price, qty, acc_no, profit)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (buy_trade[0], transaction_time, stock_code, trade_price, qty, acc_no, profit))
-
-                        cursor.execute('DELETE FROM trading_active_stocks WHERE _id = ?', (buy_trade[0],))
-                        self.__local.trading_db_conn.commit()
+                        self.__ledger_writer.close_lot(buy_trade[0], transaction_time, stock_code, trade_price, qty,
+                                                       acc_no, profit)
                         self.logger.info(f"매도 체결 완료: 계좌번호: {acc_no}, 종목코드: {stock_code}, 체결가격: {trade_price}, 체결수량: {qty}, 수익: {profit}")
                     else:
                         self.logger.warning(f"매도 처리 실패: 활성 거래를 찾을 수 없음 (종목코드: {stock_code}, 계좌번호: {acc_no})")
                 except Exception as e:
-                    self.__local.trading_db_conn.rollback()
                     self.logger.error(f"매도 처리 중 오류 발생: {e}")
         elif gubun == "0":
             self.logger.info(f"체결 데이터 수신: 계좌번호: {acc_no}, 종목코드: {stock_code}, 체결가격: {trade_price}, 체결수량: {qty}, 주문구분: {order_type}, 체결구분: {trade_type}")
+        self.__latency_metrics.record("chejan", time.perf_counter_ns() - started, stock_code=stock_code, gubun=gubun)
 
     # 모든 슬롯을 등록하는 메서드
     def __register_all_slots(self):
@@ -366,12 +511,4 @@ class KiwoomDAO(TradingInterface):
             self.__on_receive_chejan_data)  # 체결 데이터 수신 슬롯
 
     def __get_next_trade_id(self) -> int:
-        cursor = self.__local.trading_db_conn.cursor()
-        cursor.execute('''
-            SELECT COUNT(*) FROM (
-                SELECT _id FROM trading_active_stocks
-                UNION ALL
-                SELECT _id FROM closed_trades
-            )
-        ''')
-        return cursor.fetchone()[0] + 1
+        return self.__trade_id_allocator.next_id(self.__local.trading_db_conn)
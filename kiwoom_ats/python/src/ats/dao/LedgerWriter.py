@@ -0,0 +1,152 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+
+class LedgerWriter():
+    '''거래 원장(trading_active_stocks, closed_trades) 을 별도 스레드에서 SQLite 에 반영한다.
+
+    호출한 스레드(Qt 이벤트 루프 포함)는 큐에 넣기만 하고 바로 반환한다. PositionBook 이 메모리 상태를 먼저 바꾸고,
+    이 클래스가 같은 변경을 순서대로 디스크에 쓴다.
+
+    Group commit
+    ------------
+    첫 변경이 들어오면 commit_interval 동안(또는 max_batch 개가 찰 때까지) 뒤따르는 변경을 모아서
+    트랜잭션 하나로 commit 한다. 장 시작 직후처럼 체결이 몰릴 때 fsync 횟수가 변경 수가 아니라 묶음 수가 된다.
+
+    Durability
+    ----------
+    "full"   : synchronous=FULL. commit 이 반환되면 전원이 꺼져도 남는다. (실거래 기본값)
+    "normal" : synchronous=NORMAL. WAL 에서 DB 손상은 없지만 전원 장애 시 마지막 묶음이 사라질 수 있다.
+    "off"    : synchronous=OFF. fsync 없음. 백테스트용
+    '''
+    logger = logging.getLogger(__name__)
+    DURABILITY_LEVELS = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+    __STOP = object()
+
+    def __init__(self, db_path: str, durability: str = "full", commit_interval: float = 0.05,
+                 max_batch: int = 500):
+        if durability not in self.DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {list(self.DURABILITY_LEVELS)}: {durability}")
+        self.db_path = db_path
+        self.durability = durability
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self.commit_count = 0
+        self.write_count = 0
+        self.__queue = queue.Queue()
+        self.__closed = False
+        self.__close_lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name="LedgerWriter", daemon=True)
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def open_lot(self, trade_id: int, transaction_time: str, stock_code: str, trade_price, qty: int,
+                 acc_no: str):
+        self.__put(("open", (trade_id, transaction_time, stock_code, trade_price, qty, acc_no)))
+
+    def close_lot(self, trade_id: int, transaction_time: str, stock_code: str, trade_price, qty: int,
+                  acc_no: str, profit: float):
+        self.__put(("close", (trade_id, transaction_time, stock_code, trade_price, qty, acc_no, profit)))
+
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    def flush(self):
+        '''지금까지 넣은 변경이 모두 commit 될 때까지 기다린다.
+        '''
+        self.__queue.join()
+
+    def close(self):
+        '''남은 변경을 모두 commit 하고 writer 스레드를 종료한다. 여러 번 호출해도 된다.
+        '''
+        with self.__close_lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__queue.put((self.__STOP, None))
+        self.__thread.join()
+        self.logger.info(f"LedgerWriter 종료: {self.write_count}건, commit {self.commit_count}회")
+
+    def __put(self, item):
+        with self.__close_lock:
+            if not self.__closed:
+                self.__queue.put(item)
+                return
+        # 종료 후에 들어온 체결은 버리지 않고 호출한 스레드에서 바로 쓴다.
+        self.logger.warning(f"LedgerWriter 종료 후 원장 변경 요청, 동기 반영: {item}")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.__commit(conn, [item])
+        finally:
+            conn.close()
+
+    def __run(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.DURABILITY_LEVELS[self.durability]}")
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self.__queue.get()]
+                deadline = time.monotonic() + self.commit_interval
+                while batch.__len__() < self.max_batch and batch[-1][0] is not self.__STOP:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self.__queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+
+                if batch[-1][0] is self.__STOP:
+                    stopping = True
+                    ops = batch[:-1]
+                else:
+                    ops = batch
+                try:
+                    self.__commit(conn, ops)
+                finally:
+                    for _ in batch:
+                        self.__queue.task_done()
+        finally:
+            conn.close()
+
+    def __commit(self, conn: sqlite3.Connection, ops):
+        if ops.__len__() == 0:
+            return
+        try:
+            with conn:
+                for op, row in ops:
+                    self.__apply(conn, op, row)
+        except Exception as e:
+            # 묶음 전체가 rollback 되었으므로 하나씩 다시 써서 문제 있는 변경만 버린다.
+            self.logger.error(f"원장 group commit 실패, 개별 반영으로 재시도: {e}")
+            for op, row in ops:
+                try:
+                    with conn:
+                        self.__apply(conn, op, row)
+                except Exception as e:
+                    self.logger.error(f"원장 반영 중 오류 발생: {op} {row} {e}")
+        self.commit_count += 1
+        self.write_count += ops.__len__()
+
+    @staticmethod
+    def __apply(conn: sqlite3.Connection, op, row):
+        cursor = conn.cursor()
+        if op == "open":
+            cursor.execute('''
+                INSERT INTO trading_active_stocks
+                (_id, transaction_time, stock_code, trade_price, qty, acc_no)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', row)
+        elif op == "close":
+            cursor.execute('''
+                INSERT INTO closed_trades
+                (_id, transaction_time, stock_code, trade_price, qty, acc_no, profit)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', row)
+            cursor.execute('DELETE FROM trading_active_stocks WHERE _id = ?', (row[0],))
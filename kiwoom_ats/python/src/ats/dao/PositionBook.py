@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# (_id, transaction_time, trade_price, qty)
+Lot = Tuple[int, str, float, int]
+
+
+def normalize_stock_code(stock_code) -> str:
+    '''엑셀/DB 에서 숫자로 읽힌 종목코드(예: 69500)를 6자리 문자열로 맞춘다.
+    '''
+    stock_code = str(stock_code).strip()
+    return stock_code.zfill(6) if stock_code.isdigit() else stock_code
+
+
+class PositionBook():
+    '''(계좌번호, 종목코드) 별 보유 lot 과 마지막 체결가를 메모리에 들고 있는 포지션 장부.
+
+    trading_active_stocks 를 대신해 hot path 의 조회(get_latest_trade_price 등)를 디스크 I/O 없이 처리한다.
+    DB 반영은 LedgerWriter 가 비동기로 하고, 시작 시 load() 로 테이블에서 다시 만든다.
+    '''
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__lots: Dict[Tuple[str, str], List[Lot]] = dict()
+        self.__last_fill_price: Dict[Tuple[str, str], float] = dict()
+
+    def load(self, conn: sqlite3.Connection):
+        '''trading_active_stocks 에서 보유 lot 을 다시 읽어온다.
+        '''
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT _id, transaction_time, stock_code, trade_price, qty, acc_no
+            FROM trading_active_stocks ORDER BY _id ASC
+        ''')
+        with self.__lock:
+            self.__lots.clear()
+            self.__last_fill_price.clear()
+            for _id, transaction_time, stock_code, trade_price, qty, acc_no in cursor.fetchall():
+                key = (str(acc_no), normalize_stock_code(stock_code))
+                self.__lots.setdefault(key, list()).append((_id, transaction_time, trade_price, qty))
+                self.__last_fill_price[key] = trade_price
+
+    def add_lot(self, acc_no: str, stock_code: str, lot: Lot):
+        key = (str(acc_no), normalize_stock_code(stock_code))
+        with self.__lock:
+            self.__lots.setdefault(key, list()).append(lot)
+            self.__last_fill_price[key] = lot[2]
+
+    def latest_lot(self, acc_no: str, stock_code: str) -> Optional[Lot]:
+        '''가장 최근 lot (_id 가 가장 큰 매수 기록)
+        '''
+        lots = self.__lots.get((str(acc_no), normalize_stock_code(stock_code)))
+        return lots[-1] if lots else None
+
+    def pop_latest_lot(self, acc_no: str, stock_code: str, fill_price: float = None) -> Optional[Lot]:
+        '''가장 최근 lot 을 장부에서 제거해서 반환한다. 매도 체결가가 있으면 마지막 체결가로 기록한다.
+        '''
+        key = (str(acc_no), normalize_stock_code(stock_code))
+        with self.__lock:
+            lots = self.__lots.get(key)
+            if not lots:
+                return None
+            lot = lots.pop()
+            if fill_price is not None:
+                self.__last_fill_price[key] = fill_price
+            return lot
+
+    def latest_trade_price(self, stock_code: str) -> Optional[float]:
+        '''종목의 가장 최근 lot 매수가. 보유 중이 아니면 None
+        '''
+        stock_code = normalize_stock_code(stock_code)
+        latest = None
+        for (_, code), lots in list(self.__lots.items()):
+            if code != stock_code or not lots:
+                continue
+            lot = lots[-1]
+            if latest is None or (lot[1], lot[0]) > (latest[1], latest[0]):
+                latest = lot
+        return latest[2] if latest else None
+
+    def last_fill_price(self, acc_no: str, stock_code: str) -> Optional[float]:
+        return self.__last_fill_price.get((str(acc_no), normalize_stock_code(stock_code)))
+
+    def lot_count(self, acc_no: str, stock_code: str) -> int:
+        lots = self.__lots.get((str(acc_no), normalize_stock_code(stock_code)))
+        return lots.__len__() if lots else 0
+
+    def lots(self, acc_no: str, stock_code: str) -> List[Lot]:
+        return list(self.__lots.get((str(acc_no), normalize_stock_code(stock_code)), ()))
@@ -0,0 +1,149 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class PriceBoard():
+    '''프로세스 전체가 공유하는 실시간 현재가 게시판.
+
+    종목마다 배열의 slot 하나를 배정하고, 가격과 버전(seqlock)을 numpy 배열에 기록한다.
+
+    * 쓰기: Qt 스레드의 OnReceiveRealData 가 update() 로 기록한다. 쓰기끼리는 lock 으로 직렬화한다.
+    * 읽기: 러너 스레드는 lock 없이 get()/read() 로 최신가를 읽는다. 버전이 홀수(쓰는 중)이거나 읽는 사이에
+      바뀌면 다시 읽는다.
+    * 대기: wait_for_change(stock_code, seq) 는 해당 종목의 seq 가 바뀔 때까지(또는 timeout) 기다린다.
+
+    seq 는 종목별 갱신 횟수다. 0 이면 아직 가격이 없다.
+    '''
+
+    def __init__(self, capacity: int = 256):
+        self.__write_lock = threading.Lock()
+        self.__changed = threading.Condition(self.__write_lock)
+        self.__slots: Dict[str, int] = dict()
+        self.__prices = np.zeros(capacity, dtype=np.int64)
+        self.__versions = np.zeros(capacity, dtype=np.int64)
+        self.__updated_ns = np.zeros(capacity, dtype=np.int64)  # 마지막 갱신 시각 (perf_counter_ns)
+        self.__waiters = 0
+
+    @classmethod
+    def __get_instance(cls):
+        return cls.__instance
+
+    @classmethod
+    def instance(cls, *args, **kargs):
+        cls.__instance = cls(*args, **kargs)
+        cls.instance = cls.__get_instance
+        return cls.__instance
+
+    def slot(self, stock_code: str) -> int:
+        '''종목의 slot 번호. 처음 보는 종목이면 새로 배정한다.
+        '''
+        slot = self.__slots.get(stock_code)
+        if slot is not None:
+            return slot
+        with self.__write_lock:
+            return self.__assign_slot(stock_code)
+
+    def update(self, stock_code: str, price: int) -> int:
+        '''현재가 기록. 갱신된 seq 를 반환한다.
+        '''
+        with self.__write_lock:
+            return self.__write(self.__assign_slot(stock_code), price)
+
+    def initialize(self, stock_code: str, price: int) -> int:
+        '''TR 로 받아온 초기 가격 기록. 그 사이 실시간 체결이 먼저 들어왔으면 덮어쓰지 않는다.
+        '''
+        with self.__write_lock:
+            slot = self.__assign_slot(stock_code)
+            if self.__versions[slot] != 0:
+                return int(self.__versions[slot]) >> 1
+            return self.__write(slot, price)
+
+    def get(self, stock_code: str) -> Optional[int]:
+        '''최신가. 아직 가격이 없으면 None
+        '''
+        price, seq = self.read(stock_code)
+        return price if seq > 0 else None
+
+    def read(self, stock_code: str) -> Tuple[int, int]:
+        '''(최신가, seq) 를 lock 없이 읽는다.
+        '''
+        slot = self.__slots.get(stock_code)
+        if slot is None:
+            return 0, 0
+        while True:
+            # 배열이 커지면서 교체될 수 있으므로 참조를 먼저 잡아둔다.
+            prices, versions = self.__prices, self.__versions
+            before = int(versions[slot])
+            if before & 1:
+                continue
+            price = int(prices[slot])
+            if int(versions[slot]) == before:
+                return price, before >> 1
+
+    def seq(self, stock_code: str) -> int:
+        return self.read(stock_code)[1]
+
+    def last_update_ns(self, stock_code: str) -> int:
+        '''마지막 갱신 시각(time.perf_counter_ns). 틱 수신부터 주문까지의 지연 측정에 사용한다. 없으면 0
+        '''
+        slot = self.__slots.get(stock_code)
+        return 0 if slot is None else int(self.__updated_ns[slot])
+
+    def wait_for_change(self, stock_code: str, seq: int, timeout: float = None) -> Tuple[int, int]:
+        '''stock_code 의 seq 가 주어진 seq 와 달라질 때까지 기다린 뒤 (최신가, seq) 를 반환한다.
+
+        timeout 이 지나면 그때의 (가격, seq) 를 반환하므로, 호출한 쪽은 seq 를 비교해서 변경 여부를 판단한다.
+        '''
+        price, current = self.read(stock_code)
+        if current != seq:
+            return price, current
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__changed:
+            self.__waiters += 1
+            try:
+                while True:
+                    price, current = self.read(stock_code)
+                    if current != seq:
+                        return price, current
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return price, current
+                    self.__changed.wait(remaining)
+            finally:
+                self.__waiters -= 1
+
+    def stock_codes(self):
+        return list(self.__slots.keys())
+
+    def __assign_slot(self, stock_code: str) -> int:
+        slot = self.__slots.get(stock_code)
+        if slot is not None:
+            return slot
+        slot = self.__slots.__len__()
+        if slot >= self.__prices.__len__():
+            # 새 배열을 다 채운 뒤 참조를 바꾸므로 읽는 쪽은 이전 배열이나 새 배열 중 하나를 온전히 본다.
+            capacity = self.__prices.__len__() * 2
+            prices = np.zeros(capacity, dtype=np.int64)
+            versions = np.zeros(capacity, dtype=np.int64)
+            updated_ns = np.zeros(capacity, dtype=np.int64)
+            prices[:slot] = self.__prices[:slot]
+            versions[:slot] = self.__versions[:slot]
+            updated_ns[:slot] = self.__updated_ns[:slot]
+            self.__prices, self.__versions, self.__updated_ns = prices, versions, updated_ns
+        self.__slots[stock_code] = slot
+        return slot
+
+    def __write(self, slot: int, price: int) -> int:
+        # write lock 을 잡은 상태에서만 호출
+        prices, versions = self.__prices, self.__versions
+        versions[slot] += 1  # 홀수: 쓰는 중
+        prices[slot] = price
+        self.__updated_ns[slot] = time.perf_counter_ns()
+        versions[slot] += 1
+        if self.__waiters > 0:
+            self.__changed.notify_all()
+        return int(versions[slot]) >> 1
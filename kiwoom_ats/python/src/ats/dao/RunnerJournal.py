@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+
+class RunnerJournal():
+    '''러너 상태(state) 변경 기록. 장 마감 때 엑셀(trading 시트)을 다시 쓰는 대신 상태가 바뀔 때마다 SQLite(WAL)에
+    한 줄씩 추가한다. 프로그램이 중간에 죽어도 마지막으로 기록한 상태에서 다시 시작할 수 있다.
+
+    * runner_events   : 상태 변경 append-only 로그
+    * runner_snapshot : 종목별 마지막 상태. compact() 가 이벤트를 반영하고 반영한 이벤트를 지운다.
+
+    이벤트가 compact_every 개 쌓이면 자동으로 compact 하고, close() 에서도 한 번 compact 한다.
+    상태 변경은 하루에 종목별로 몇 번뿐이므로 호출한 스레드에서 바로 commit 한다. (synchronous=NORMAL)
+    '''
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, db_path: str = "./resources/trading/runner_journal.db", compact_every: int = 1000):
+        self.db_path = db_path
+        self.compact_every = compact_every
+        self.__lock = threading.Lock()
+        self.__states: Dict[str, int] = dict()
+        self.__events_since_compact = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.__conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("PRAGMA synchronous=NORMAL")
+        with self.__conn:
+            self.__conn.execute('''
+                CREATE TABLE IF NOT EXISTS runner_events (
+                    _id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recorded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    stock_code TEXT NOT NULL,
+                    state INTEGER NOT NULL,
+                    config TEXT NOT NULL
+                )
+            ''')
+            self.__conn.execute('''
+                CREATE TABLE IF NOT EXISTS runner_snapshot (
+                    stock_code TEXT PRIMARY KEY,
+                    recorded_at DATETIME NOT NULL,
+                    state INTEGER NOT NULL,
+                    config TEXT NOT NULL
+                )
+            ''')
+        self.__events_since_compact = self.__conn.execute("SELECT COUNT(*) FROM runner_events").fetchone()[0]
+        for stock_code, entry in self.load().items():
+            self.__states[stock_code] = entry["state"]
+
+    @classmethod
+    def __get_instance(cls):
+        return cls.__instance
+
+    @classmethod
+    def instance(cls, *args, **kargs):
+        cls.__instance = cls(*args, **kargs)
+        cls.instance = cls.__get_instance
+        return cls.__instance
+
+    def record(self, config, state: int):
+        '''러너의 상태 변경 기록. 마지막으로 기록한 상태와 같으면 아무것도 하지 않는다.
+        '''
+        stock_code = str(config["stock_code"])
+        if self.__states.get(stock_code) == state:
+            return
+        row = (stock_code, state, json.dumps(self.__serializable(config), ensure_ascii=False))
+        with self.__lock:
+            with self.__conn:
+                self.__conn.execute("INSERT INTO runner_events (stock_code, state, config) VALUES (?, ?, ?)", row)
+            self.__states[stock_code] = state
+            self.__events_since_compact += 1
+            should_compact = self.__events_since_compact >= self.compact_every
+        if should_compact:
+            self.compact()
+
+    def get(self, stock_code: str) -> Optional[int]:
+        '''마지막으로 기록된 상태. 기록이 없으면 None
+        '''
+        return self.__states.get(str(stock_code))
+
+    def load(self) -> Dict[str, Dict]:
+        '''종목코드 -> {"state", "config"}. 스냅샷 위에 아직 compact 되지 않은 이벤트를 순서대로 덮어쓴다.
+        '''
+        with self.__lock:
+            rows = self.__conn.execute("SELECT stock_code, state, config FROM runner_snapshot").fetchall()
+            rows += self.__conn.execute("SELECT stock_code, state, config FROM runner_events ORDER BY _id").fetchall()
+        return {stock_code: {"state": state, "config": json.loads(config)} for stock_code, state, config in rows}
+
+    def warm_start(self, stock_list: List[Dict]) -> List[Dict]:
+        '''엑셀에서 읽은 종목 목록에 거래 중(state 1)이던 상태를 붙인다.
+
+        거래 중이던 종목이 엑셀에서 빠졌으면 기록해 둔 설정으로 목록에 추가해서 보유 물량을 계속 관리한다.
+        '''
+        unfinished = {stock_code: entry["config"] for stock_code, entry in self.load().items() if entry["state"] == 1}
+        for stock in stock_list:
+            if unfinished.pop(str(stock["stock_code"]), None) is not None:
+                stock["state"] = 1
+        for stock_code, config in unfinished.items():
+            self.logger.info(f"엑셀에 없는 거래 중 종목을 기록에서 불러옵니다: {stock_code}")
+            config["state"] = 1
+            stock_list.append(config)
+        return stock_list
+
+    def compact(self):
+        '''이벤트를 종목별 마지막 상태로 합쳐 스냅샷에 반영하고, 반영한 이벤트와 WAL 을 비운다.
+        '''
+        with self.__lock:
+            with self.__conn:
+                last_id = self.__conn.execute("SELECT MAX(_id) FROM runner_events").fetchone()[0]
+                if last_id is None:
+                    return
+                self.__conn.execute('''
+                    INSERT OR REPLACE INTO runner_snapshot (stock_code, recorded_at, state, config)
+                    SELECT stock_code, recorded_at, state, config FROM runner_events
+                    WHERE _id IN (SELECT MAX(_id) FROM runner_events WHERE _id <= ? GROUP BY stock_code)
+                ''', (last_id,))
+                self.__conn.execute("DELETE FROM runner_events WHERE _id <= ?", (last_id,))
+            self.__conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.__events_since_compact = 0
+
+    def close(self):
+        self.compact()
+        with self.__lock:
+            self.__conn.close()
+
+    @staticmethod
+    def __serializable(config) -> Dict:
+        return {key: value for key, value in config.items() if key not in ("state", "acc_no")}
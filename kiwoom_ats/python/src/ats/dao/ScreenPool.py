@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+class ScreenPool():
+    '''개수가 정해진 화면번호를 key(종목코드 등) 에 나눠주는 할당기.
+
+    * 화면 하나에 key 를 slots_per_screen 개까지 채워 넣는다. (실시간 등록: 화면당 100종목)
+    * 모든 화면이 가득 차면 가장 오래 쓰이지 않은 key 를 내보내고(LRU) 그 자리를 재사용한다.
+      내보낼 때 on_evict(scr_no, key, screen_empty) 를 호출하므로 SetRealRemove / DisconnectRealData 를 연결할 수 있다.
+    * stats() 로 사용 중인 화면 수와 등록 수를 확인한다.
+    '''
+
+    def __init__(self, first_scr_no: int, max_screens: int, slots_per_screen: int = 1,
+                 on_evict: Optional[Callable[[str, str, bool], None]] = None):
+        self.first_scr_no = first_scr_no
+        self.max_screens = max_screens
+        self.slots_per_screen = slots_per_screen
+        self.__on_evict = on_evict
+        self.__lock = threading.Lock()
+        self.__keys: "OrderedDict[str, str]" = OrderedDict()  # key -> 화면번호, 오래된 순
+        self.__screens: Dict[str, Set[str]] = dict()  # 화면번호 -> key 목록
+        self.__free_screens: List[str] = [str(first_scr_no + i) for i in reversed(range(max_screens))]
+        self.evictions = 0
+
+    def acquire(self, key: str) -> str:
+        '''key 의 화면번호. 처음 보는 key 면 빈 자리를 배정하고, 자리가 없으면 LRU key 를 내보낸다.
+        '''
+        evicted = None
+        with self.__lock:
+            scr_no = self.__keys.get(key)
+            if scr_no is not None:
+                self.__keys.move_to_end(key)
+                return scr_no
+
+            scr_no = self.__find_free_slot()
+            if scr_no is None:
+                evicted_key, scr_no = self.__keys.popitem(last=False)
+                self.__screens[scr_no].discard(evicted_key)
+                evicted = (scr_no, evicted_key, self.__screens[scr_no].__len__() == 0)
+                self.evictions += 1
+
+            self.__screens[scr_no].add(key)
+            self.__keys[key] = scr_no
+
+        if evicted is not None and self.__on_evict is not None:
+            self.__on_evict(*evicted)
+        return scr_no
+
+    def get(self, key: str) -> Optional[str]:
+        return self.__keys.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__keys
+
+    def touch(self, key: str):
+        '''key 를 최근 사용으로 표시. 등록되지 않은 key 면 무시한다.
+        '''
+        with self.__lock:
+            if key in self.__keys:
+                self.__keys.move_to_end(key)
+
+    def release(self, key: str) -> Optional[Tuple[str, bool]]:
+        '''key 를 반납한다. (화면번호, 화면이 비었는지) 반환. 빈 화면은 다시 쓸 수 있다.
+        '''
+        with self.__lock:
+            scr_no = self.__keys.pop(key, None)
+            if scr_no is None:
+                return None
+            keys = self.__screens[scr_no]
+            keys.discard(key)
+            if keys.__len__() == 0:
+                del self.__screens[scr_no]
+                self.__free_screens.append(scr_no)
+                return scr_no, True
+            return scr_no, False
+
+    def stats(self) -> Dict[str, int]:
+        with self.__lock:
+            return {
+                "screens": self.__screens.__len__(),
+                "max_screens": self.max_screens,
+                "registrations": self.__keys.__len__(),
+                "capacity": self.max_screens * self.slots_per_screen,
+                "evictions": self.evictions,
+            }
+
+    def __find_free_slot(self) -> Optional[str]:
+        # 이미 쓰고 있는 화면부터 채운다.
+        for scr_no, keys in self.__screens.items():
+            if keys.__len__() < self.slots_per_screen:
+                return scr_no
+        if self.__free_screens.__len__() > 0:
+            scr_no = self.__free_screens.pop()
+            self.__screens[scr_no] = set()
+            return scr_no
+        return None
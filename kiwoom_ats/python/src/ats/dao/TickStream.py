@@ -0,0 +1,62 @@
+import sqlite3
+from typing import List, Optional, Tuple
+
+
+class TickStream():
+    '''백테스팅용 - 종목 하나의 체결 데이터를 시간순으로 흘려보내는 스트림.
+
+    종목당 하나의 정렬된 커서를 열어두고 ``fetchmany`` 로 batch 단위만 메모리에 올린다.
+    다음 틱으로 넘어가는 비용은 O(1) 이다.
+    '''
+    EOF = -1  # 종료 신호
+
+    def __init__(self, conn: sqlite3.Connection, stock_code: str, batch_size: int = 1000):
+        self.stock_code = stock_code
+        self.__batch_size = batch_size
+        self.__batch: List[Tuple[int, str]] = list()
+        self.__pos = 0
+        self.__exhausted = False
+        self.__cursor = conn.cursor()
+        self.__cursor.execute('''
+            SELECT current_price, transaction_time FROM back_testing_stock_data
+            WHERE stock_code = ? ORDER BY transaction_time ASC
+        ''', (stock_code,))
+        self.latest_transaction_time: Optional[str] = None
+
+    def next_tick(self) -> Optional[Tuple[int, str]]:
+        '''다음 틱을 (현재가, 체결시간) 으로 반환한다. 데이터가 끝났으면 None.
+        '''
+        tick = self.peek()
+        if tick is None:
+            return None
+        self.__pos += 1
+        self.latest_transaction_time = tick[1]
+        return tick
+
+    def peek(self) -> Optional[Tuple[int, str]]:
+        '''다음 틱을 소비하지 않고 반환한다. 데이터가 끝났으면 None.
+        '''
+        if self.__pos >= len(self.__batch):
+            if not self.__fill():
+                return None
+
+        price, transaction_time = self.__batch[self.__pos]
+        return abs(int(price)), transaction_time
+
+    def is_exhausted(self) -> bool:
+        return self.__exhausted
+
+    def close(self):
+        self.__cursor.close()
+        self.__batch = list()
+        self.__exhausted = True
+
+    def __fill(self) -> bool:
+        if self.__exhausted:
+            return False
+        self.__batch = self.__cursor.fetchmany(self.__batch_size)
+        self.__pos = 0
+        if self.__batch.__len__() == 0:
+            self.close()
+            return False
+        return True
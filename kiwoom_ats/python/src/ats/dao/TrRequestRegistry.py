@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+
+class TrRequest():
+    '''응답을 기다리고 있는 TR 요청 하나. OnReceiveTrData 에서 읽어야 할 항목과 결과 future 를 들고 있다.
+    '''
+
+    def __init__(self, scr_no: str, rq_name: str, rq_single_data: List[str], rq_multi_data: List[str],
+                 cnt_limit: int = 0):
+        self.key = (str(scr_no), rq_name)
+        self.rq_single_data = rq_single_data
+        self.rq_multi_data = rq_multi_data
+        self.cnt_limit = cnt_limit
+        self.future = Future()
+
+
+class TrRequestRegistry():
+    '''(화면번호, 요청명) 으로 진행 중인 TR 요청을 찾는 registry.
+
+    요청마다 future 를 돌려주고, OnReceiveTrData 슬롯이 같은 키의 future 를 완료시킨다.
+    키가 다른 요청은 동시에 여러 개 보낼 수 있고, 같은 키의 요청은 앞 요청이 끝날 때까지 최대 timeout 초 기다린다.
+    앞 요청의 응답은 Qt 메인 스레드가 처리하므로 메인 스레드에서는 timeout=0 으로 바로 실패해야 한다.
+    '''
+
+    def __init__(self):
+        self.__condition = threading.Condition()
+        self.__requests: Dict[Tuple[str, str], TrRequest] = dict()
+
+    def register(self, scr_no: str, rq_name: str, rq_single_data: List[str], rq_multi_data: List[str],
+                 cnt_limit: int = 0, timeout: float = 0.0) -> TrRequest:
+        '''같은 키의 요청이 진행 중이면 timeout 초까지 기다리고, 그래도 끝나지 않으면 TimeoutError
+        '''
+        request = TrRequest(scr_no, rq_name, rq_single_data, rq_multi_data, cnt_limit)
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: request.key not in self.__requests, timeout):
+                raise TimeoutError(f"같은 TR 요청이 진행 중입니다: {request.key}")
+            self.__requests[request.key] = request
+        return request
+
+    def get(self, scr_no: str, rq_name: str) -> Optional[TrRequest]:
+        with self.__condition:
+            return self.__requests.get((str(scr_no), rq_name))
+
+    def resolve(self, request: TrRequest, result):
+        self.__remove(request)
+        if not request.future.done():
+            request.future.set_result(result)
+
+    def fail(self, request: TrRequest, exception: BaseException):
+        self.__remove(request)
+        if not request.future.done():
+            request.future.set_exception(exception)
+
+    def in_flight(self) -> int:
+        with self.__condition:
+            return self.__requests.__len__()
+
+    def __remove(self, request: TrRequest):
+        with self.__condition:
+            if self.__requests.get(request.key) is request:
+                del self.__requests[request.key]
+                self.__condition.notify_all()
@@ -0,0 +1,153 @@
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Tuple
+
+
+class SlidingWindow():
+    '''최근 period 초 안의 요청이 capacity 회를 넘지 않도록 하는 제한. 키움 서버도 최근 호출 수로 센다.
+    '''
+
+    def __init__(self, capacity: int, period: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.period = period
+        self.__clock = clock
+        self.__times = collections.deque()
+
+    def wait_time(self) -> float:
+        '''요청 하나를 더 보내기 위해 기다려야 하는 시간(초). 바로 보낼 수 있으면 0
+        '''
+        now = self.__clock()
+        self.__expire(now)
+        if self.__times.__len__() < self.capacity:
+            return 0.0
+        return self.__times[self.__times.__len__() - self.capacity] + self.period - now
+
+    def consume(self):
+        self.__times.append(self.__clock())
+
+    def __expire(self, now: float):
+        while self.__times.__len__() > 0 and self.__times[0] <= now - self.period:
+            self.__times.popleft()
+
+
+class TrRequestScheduler():
+    '''KiwoomDAO 의 CommRqData 앞단 스케줄러.
+
+    * 우선순위 큐: 숫자가 작을수록 먼저, 같은 우선순위는 들어온 순서대로 나간다.
+    * sliding window: 키움 조회 제한(기본 1초 5회, 1시간 1000회)을 넘지 않도록 전송 시점을 늦춘다.
+    * -200(시세 과부하) 응답은 지수 backoff 후 재시도한다. backoff 동안에는 다른 요청도 보내지 않는다.
+    * metrics(): 대기열 길이, 대기 시간, 재시도/실패 횟수
+
+    실제 요청은 execute() 를 호출한 스레드에서 실행된다. clock/sleep 을 주입하면 가짜 OCX 로 테스트할 수 있다.
+    앞 요청을 기다릴 때도 주입한 sleep 으로 QUEUE_POLL 초씩 나눠 기다리므로, Qt 메인 스레드(qWait)는
+    대기 중에도 실시간 시세와 TR 응답 이벤트를 처리한다.
+    '''
+    PRIORITY_ORDER = 0
+    PRIORITY_ACCOUNT = 1  # 잔고, 예수금
+    PRIORITY_QUOTE = 5  # 현재가
+    PRIORITY_BACKGROUND = 9
+
+    OVERLOAD = -200  # 시세 과부하
+    DEFAULT_LIMITS = ((5, 1.0), (1000, 3600.0))
+    QUEUE_POLL = 0.005  # 맨 앞이 아닌 요청이 차례를 확인하는 간격(초)
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, limits: Iterable[Tuple[int, float]] = DEFAULT_LIMITS, max_retries: int = 5,
+                 backoff: float = 0.5, max_backoff: float = 8.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.__windows = [SlidingWindow(capacity, period, clock) for capacity, period in limits]
+        self.__max_retries = max_retries
+        self.__backoff = backoff
+        self.__max_backoff = max_backoff
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__condition = threading.Condition()
+        self.__heap = list()
+        self.__seq = itertools.count()
+        self.__paused_until = 0.0
+
+        self.__submitted = 0
+        self.__sent = 0
+        self.__overloaded = 0
+        self.__failed = 0
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+
+    def execute(self, request: Callable[[], int], priority: int = PRIORITY_QUOTE) -> int:
+        '''순서와 조회 제한에 맞춰 request 를 실행하고 반환 코드를 돌려준다.
+
+        Parameters
+        ----------
+        request :
+            SetInputValue + CommRqData 를 호출하고 반환 코드를 돌려주는 함수. 재시도 시 다시 호출된다.
+
+        priority :
+            PRIORITY_* 상수. 작을수록 먼저 나간다.
+        '''
+        with self.__condition:
+            self.__submitted += 1
+
+        attempt = 0
+        while True:
+            self.__acquire(priority)
+            result = request()
+            if result != self.OVERLOAD:
+                return result
+
+            attempt += 1
+            delay = min(self.__backoff * (2 ** (attempt - 1)), self.__max_backoff)
+            with self.__condition:
+                self.__overloaded += 1
+                self.__paused_until = max(self.__paused_until, self.__clock() + delay)
+            if attempt > self.__max_retries:
+                with self.__condition:
+                    self.__failed += 1
+                self.logger.fatal(f"RQ DATA [{result}]: 시세 과부하, {self.__max_retries}회 재시도 실패")
+                return result
+
+            self.logger.warning(f"RQ DATA [{result}]: 시세 과부하, {delay:.1f}초 후 재시도 ({attempt}/{self.__max_retries})")
+            self.__sleep(delay)
+
+    def metrics(self) -> Dict[str, float]:
+        with self.__condition:
+            return {
+                "queue_depth": self.__heap.__len__(),
+                "submitted": self.__submitted,
+                "sent": self.__sent,
+                "overloaded": self.__overloaded,
+                "failed": self.__failed,
+                "wait_avg": self.__wait_total / self.__sent if self.__sent else 0.0,
+                "wait_max": self.__wait_max,
+            }
+
+    def __acquire(self, priority: int):
+        '''이 요청이 대기열 맨 앞이고 모든 window 에 자리가 있을 때까지 기다린 뒤 자리를 쓴다.
+        '''
+        entry = [priority, next(self.__seq)]
+        started = self.__clock()
+        with self.__condition:
+            heapq.heappush(self.__heap, entry)
+
+        while True:
+            with self.__condition:
+                if self.__heap[0] is not entry:
+                    # 앞 요청이 나갈 때까지 QUEUE_POLL 씩 대기. condition.wait 로 막히면 Qt 이벤트가 처리되지 않는다.
+                    delay = self.QUEUE_POLL
+                else:
+                    delay = max([self.__paused_until - self.__clock()] + [window.wait_time() for window in self.__windows])
+                    if delay <= 0:
+                        heapq.heappop(self.__heap)
+                        for window in self.__windows:
+                            window.consume()
+                        waited = self.__clock() - started
+                        self.__sent += 1
+                        self.__wait_total += waited
+                        self.__wait_max = max(self.__wait_max, waited)
+                        return
+            # lock 은 놓고 주입한 sleep 으로 기다린다. (메인 스레드는 qWait)
+            self.__sleep(delay)
@@ -0,0 +1,40 @@
+import sqlite3
+import threading
+
+
+class TradeIdAllocator():
+    '''거래 ID 발급기.
+
+    최초 발급 시 한 번만 trading_active_stocks, closed_trades 의 MAX(_id) 로 시드하고,
+    이후에는 메모리에서 lock 을 잡고 1씩 증가시킨다. 원장 크기와 무관하게 O(1) 이고,
+    행이 삭제되어도 이미 발급한 ID 와 겹치지 않는다.
+    '''
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__next_id = None
+
+    def seed(self, conn: sqlite3.Connection):
+        '''시작 시 호출해서 첫 체결에서 DB 를 읽지 않도록 미리 시드한다.
+        '''
+        with self.__lock:
+            if self.__next_id is None:
+                self.__next_id = self.__load_max_id(conn) + 1
+
+    def next_id(self, conn: sqlite3.Connection) -> int:
+        self.seed(conn)
+        with self.__lock:
+            trade_id = self.__next_id
+            self.__next_id += 1
+            return trade_id
+
+    @staticmethod
+    def __load_max_id(conn: sqlite3.Connection) -> int:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MAX(
+                (SELECT COALESCE(MAX(_id), 0) FROM trading_active_stocks),
+                (SELECT COALESCE(MAX(_id), 0) FROM closed_trades)
+            )
+        ''')
+        return int(cursor.fetchone()[0])
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
 
+from python.src.ats.Clock import Clock, WallClock
+
+
 class TradingInterface(ABC):
+    clock: Clock = WallClock()  # 백테스트 DAO 는 SimulatedClock 으로 바꾼다.
+
     @abstractmethod
     def get_stock_name(self, stock_code: str) -> str:
         pass
@@ -19,4 +24,12 @@ class TradingInterface(ABC):
     
     @abstractmethod
     def get_latest_trade_price(self, stock_code: str):
-        pass 
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def get_open_lot_count(self, acc_no: str, stock_code: str) -> int:
+        pass
+
+    def close(self) -> None:
+        """종료 시 호출. 비동기로 쓰고 있는 데이터를 모두 반영한다."""
+        pass
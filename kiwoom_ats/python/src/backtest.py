@@ -0,0 +1,191 @@
+'''Qt 없이 실행하는 백테스트 CLI.
+
+index.py 와 달리 QApplication 을 만들지 않고 KiwoomDAO(PyQt5) 도 import 하지 않으므로, PyQt5 가 없는 리눅스
+서버에서 종목/파라미터별로 여러 프로세스를 띄워 백테스트를 나눠 돌릴 수 있다.
+
+    python -m python.src.backtest --stocks 233740 251340 --output ./resources/backtest/result.json
+    python -m python.src.backtest --buy 20:3 --sell 30:2 --max-trading 2 --output result_20_30.csv
+
+원장은 기본적으로 실행마다 임시 파일에 새로 만들고 끝나면 지운다. 프로세스 여러 개가 같은 작업 디렉토리에서
+동시에 실행돼도 서로 원장을 덮어쓰지 않는다. 원장을 남기려면 --ledger 로 경로를 지정한다.
+'''
+import argparse
+import contextlib
+import csv
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from python.src.ats.AsyncLogging import configure_async_logging
+from python.src.ats.ConfigParser import ConfigParser
+from python.src.ats.RunnerController import Controller
+from python.src.ats.RunnerLocker import RunnerLocker
+from python.src.ats.TickDispatcher import TickDispatcher
+from python.src.ats.dao.BacktestDAO import BacktestDAO
+
+CSV_FIELDS = ["stock_code", "stock_name", "B1_price", "B1_qty", "S1_price", "S1_qty",
+              "sell_count", "sell_qty", "profit", "open_lots", "open_qty"]
+
+
+def parse_level(text: str) -> Dict:
+    '''"가격:수량" 형식의 B1/S1 설정
+    '''
+    price, qty = text.split(":")
+    return {"price": int(price), "qty": int(qty)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="kiwoom_ats 헤드리스 백테스트")
+    parser.add_argument("--config", default="./resources/config/config_stock.xlsx",
+                        help="설정 엑셀 파일. backtesting 시트의 종목을 사용한다.")
+    parser.add_argument("--stocks", nargs="*", help="backtesting 시트 중 실행할 종목코드. 없으면 전체")
+    parser.add_argument("--buy", type=parse_level, help="모든 종목의 B1 을 '가격:수량' 으로 덮어쓴다.")
+    parser.add_argument("--sell", type=parse_level, help="모든 종목의 S1 을 '가격:수량' 으로 덮어쓴다.")
+    parser.add_argument("--max-trading", type=int, help="최대 거래 종목 수. 없으면 setting 시트 D5")
+    parser.add_argument("--history-db", default="./resources/backtest/stock_data.db", help="틱 데이터 DB")
+    parser.add_argument("--ledger", help="원장 DB 경로. 없으면 임시 파일을 쓰고 끝나면 지운다.")
+    parser.add_argument("--output", help="결과 파일(.json 또는 .csv). 없으면 표준출력에 JSON")
+    parser.add_argument("--format", choices=["json", "csv"], help="결과 형식. 없으면 --output 확장자로 정한다.")
+    parser.add_argument("--verbose", action="store_true", help="INFO 로그를 표시한다.")
+    return parser.parse_args(argv)
+
+
+def load_stock_list(args) -> List[Dict]:
+    stock_list = ConfigParser.instance().load_back_testing_stock_config()
+    if args.stocks:
+        stock_list = [stock for stock in stock_list if str(stock["stock_code"]) in args.stocks]
+        missing = set(args.stocks) - {str(stock["stock_code"]) for stock in stock_list}
+        if missing:
+            raise KeyError(f"backtesting 시트에 없는 종목: {', '.join(sorted(missing))}")
+    for stock in stock_list:
+        if args.buy:
+            stock["B1"] = dict(args.buy)
+        if args.sell:
+            stock["S1"] = dict(args.sell)
+    return stock_list
+
+
+def run_backtest(stock_list: List[Dict]) -> Controller:
+    controller = Controller()
+    for stock in stock_list:
+        controller.add_runner(stock)
+    controller.run_all()
+    TickDispatcher.instance().join()
+    controller.stop_and_save_all()
+    return controller
+
+
+def collect_results(ledger_path: str, stock_list: List[Dict], elapsed_sec: float) -> Dict:
+    conn = sqlite3.connect(ledger_path)
+    try:
+        closed = {row[0]: row[1:] for row in conn.execute(
+            "SELECT stock_code, COUNT(*), SUM(qty), SUM(profit) FROM closed_trades GROUP BY stock_code")}
+        active = {row[0]: row[1:] for row in conn.execute(
+            "SELECT stock_code, COUNT(*), SUM(qty) FROM trading_active_stocks GROUP BY stock_code")}
+    finally:
+        conn.close()
+
+    stocks = list()
+    for stock in stock_list:
+        stock_code = str(stock["stock_code"])
+        sell_count, sell_qty, profit = closed.get(stock_code, (0, 0, 0.0))
+        open_lots, open_qty = active.get(stock_code, (0, 0))
+        stocks.append({
+            "stock_code": stock_code,
+            "stock_name": stock["stock_name"],
+            "B1_price": stock["B1"]["price"],
+            "B1_qty": stock["B1"]["qty"],
+            "S1_price": stock["S1"]["price"],
+            "S1_qty": stock["S1"]["qty"],
+            "sell_count": sell_count,
+            "sell_qty": sell_qty or 0,
+            "profit": round(profit or 0.0, 3),
+            "open_lots": open_lots,
+            "open_qty": open_qty or 0,
+        })
+
+    return {
+        "summary": dict(TickDispatcher.instance().backtest_summary or dict(),
+                        wall_sec=round(elapsed_sec, 3),
+                        profit=round(sum(stock["profit"] for stock in stocks), 3),
+                        sell_count=sum(stock["sell_count"] for stock in stocks),
+                        locker=RunnerLocker.instance().stats()),
+        "stocks": stocks,
+    }
+
+
+def write_results(results: Dict, output: str = None, fmt: str = None):
+    if fmt is None:
+        fmt = "csv" if output is not None and output.lower().endswith(".csv") else "json"
+
+    with contextlib.ExitStack() as stack:
+        if output is None:
+            f = sys.stdout
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            f = stack.enter_context(open(output, "w", encoding="utf-8", newline=""))
+
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(results["stocks"])
+        else:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+            f.write("\n")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # 결과 JSON 을 표준출력으로 내보낼 수 있으므로 로그는 표준에러로 보낸다.
+    log_listener = configure_async_logging({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {"simple": {"()": "python.src.ats.AsyncLogging.StructuredFormatter",
+                                  "fmt": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"}},
+        "handlers": {"console": {"class": "logging.StreamHandler", "formatter": "simple",
+                                 "stream": "ext://sys.stderr"}},
+        "root": {"level": "INFO" if args.verbose else "WARNING", "handlers": ["console"]},
+    })
+
+    ConfigParser.instance().FILE_PATH = args.config
+    ConfigParser.instance().set_back_testing_mode(True)
+    if args.max_trading is not None:
+        RunnerLocker.instance(args.max_trading)
+
+    temp_dir = None
+    ledger_path = args.ledger
+    if ledger_path is None:
+        temp_dir = tempfile.mkdtemp(prefix="kiwoom_ats_backtest_")
+        ledger_path = os.path.join(temp_dir, "backtest_ats.db")
+
+    try:
+        # 러너가 BacktestDAO.instance() 를 부르기 전에 경로를 지정해서 만들어 둔다.
+        BacktestDAO.instance(history_db_path=args.history_db, ledger_db_path=ledger_path)
+
+        stock_list = load_stock_list(args)
+        if stock_list.__len__() == 0:
+            print("에러: 실행할 종목이 아무것도 없습니다!", file=sys.stderr)
+            return 1
+
+        started = time.perf_counter()
+        run_backtest(stock_list)
+        results = collect_results(ledger_path, stock_list, time.perf_counter() - started)
+        write_results(results, args.output, args.format)
+        if "PyQt5" in sys.modules:
+            logging.getLogger(__name__).warning("백테스트 중 PyQt5 가 import 되었습니다.")
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        log_listener.stop()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,18 @@
 import datetime
 import json
 import logging
-import logging.config
 import os
 import sys
 
 from PyQt5.QtTest import QTest
 from PyQt5.QtWidgets import QApplication
 
+from python.src.ats.AsyncLogging import configure_async_logging
 from python.src.ats.ConfigParser import ConfigParser
+from python.src.ats.LatencyMetrics import LatencyMetrics
 from python.src.ats.RunnerController import Controller
-from python.src.ats.dao.KiwoomDAO import KiwoomDAO
-from python.src.ats.dao.BacktestDAO import BacktestDAO
+from python.src.ats.TickDispatcher import TickDispatcher
+from python.src.ats.dao.RunnerJournal import RunnerJournal
 
 
 def get_market_closeing_time() -> datetime.datetime:
@@ -63,7 +64,8 @@ def index():
         config = json.load(f)
         # 로그 파일 경로 설정
         config["handlers"]["file"]["filename"] = os.path.join(log_dir, "trading.log")
-    logging.config.dictConfig(config)
+    # 파일/콘솔 출력은 QueueListener 스레드 하나가 담당한다.
+    log_listener = configure_async_logging(config)
 
     # 루트 로거 가져오기
     logger = logging.getLogger(__name__)
@@ -71,13 +73,17 @@ def index():
 
     app = QApplication(sys.argv)
 
+    # 지연 시간 히스토그램을 1분마다 resources/metrics/latency.json, latency.prom 으로 저장
+    LatencyMetrics.instance().start_exporter("./resources/metrics", interval=60)
+
     _is_back_testing_mode = ConfigParser.instance().is_back_testing_mode()
     if _is_back_testing_mode:
         print("========= 백테스팅 모드입니다. ==========")
         stock_list = ConfigParser.instance().load_back_testing_stock_config()
     else:
         print("실제 거래 모드입니다.")
-        stock_list = ConfigParser.instance().load_stock_config()
+        # 지난 실행에서 거래 중이던 종목은 상태 기록에서 이어 받는다.
+        stock_list = RunnerJournal.instance().warm_start(ConfigParser.instance().load_stock_config())
 
     controller = Controller()
 
@@ -98,17 +104,23 @@ def index():
             print(f"거래 시작까지 {int(wait_seconds)}초 대기합니다.")
             QTest.qWait(int(wait_seconds * 1000))
 
-    print("장 시작하였습니다!\n2초 후 프로그램 가동!!!\a")
-    QTest.qWait(2000)
+    if not _is_back_testing_mode:
+        print("장 시작하였습니다!\n2초 후 프로그램 가동!!!\a")
+        QTest.qWait(2000)
 
     if stock_list.__len__() == 0:
         print("등록된 종목이 없습니다.")
     else:
+        if not _is_back_testing_mode:
+            from python.src.ats.dao.KiwoomDAO import KiwoomDAO
+
+            # 종목별 현재가 TR 대신 관심종목 TR 로 한 번에 현재가를 받고 실시간 시세를 등록
+            KiwoomDAO.instance().warm_up([stock["stock_code"] for stock in stock_list])
+
         print("===== 주식 목록 =====")
         for stock in stock_list:
             controller.add_runner(stock)
             print(f"{stock['stock_name']}({stock['stock_code']})")
-            QTest.qWait(1000)
 
     if (controller.runner_list.__len__() == 0):
         print("에러: 실행할 종목이 아무것도 없습니다!")
@@ -118,10 +130,8 @@ def index():
     controller.run_all()
 
     if _is_back_testing_mode:
-        while True:
-            QTest.qWait(1000)
-            if all(not runner.run_flag for runner in controller.runner_list):
-                break
+        # 백테스트는 TickDispatcher 가 시뮬레이션 시간으로 모든 틱을 처리하면 끝난다.
+        TickDispatcher.instance().join()
     else:
         hour, minute, second = get_hms(
             get_market_closeing_time(), datetime.datetime.now())
@@ -130,9 +140,12 @@ def index():
 
     print("장 종료")
     controller.stop_and_save_all()
+    LatencyMetrics.instance().stop_exporter()
     app.exit()
 
-    print("프로그램 종료")
+    logger.info("프로그램 종료")
+    if log_listener is not None:
+        log_listener.stop()  # 큐에 남은 로그를 모두 쓴다.
 
     if (ConfigParser.instance().load_is_power_off()):
         print("컴퓨터 종료합니다")
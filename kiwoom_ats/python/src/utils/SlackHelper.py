@@ -1,21 +1,61 @@
-import requests
 import json
 import logging
-from typing import Optional
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
 
 class SlackHelper:
+    """Slack Webhook 알림. 메시지는 큐에 넣기만 하고 전송은 별도 스레드가 한다.
+
+    * 큐는 크기가 정해져 있고, 가득 차면 새 메시지를 버린다. (거래 스레드를 막지 않는다)
+    * HTTP 연결은 requests.Session 으로 재사용한다.
+    * 매매 알림은 digest_interval 초 동안 모아서 한 메시지(digest)로 보낸다.
+    * 429/5xx/네트워크 오류는 지수 backoff 로 재시도한다. (429 의 Retry-After 를 따르되 backoff * 2^max_retries 초까지만)
+    * stats() 로 전송/실패/재시도/버림 횟수를 확인할 수 있다.
+    """
     __instance = None
     __log = logging.getLogger(__name__)
+    __FLUSH = object()
+    __STOP = object()
 
-    def __init__(self, webhook_url: str = None):
+    def __init__(self, webhook_url: str = None, max_queue: int = 1000, digest_interval: float = 5.0,
+                 digest_max_items: int = 20, max_retries: int = 3, backoff: float = 0.5, timeout: float = 5.0):
         """
         Args:
-            webhook_url (str, optional): Slack Webhook URL. 
+            webhook_url (str, optional): Slack Webhook URL.
                 환경변수 SLACK_WEBHOOK_URL이 설정되어 있다면 생략 가능
+            max_queue (int): 전송 대기 큐 크기. 가득 차면 새 메시지를 버림
+            digest_interval (float): 매매 알림을 모으는 시간(초)
+            digest_max_items (int): digest 하나에 담을 최대 매매 알림 수
+            max_retries (int): 전송 실패 시 재시도 횟수
+            backoff (float): 첫 재시도 대기 시간(초). 재시도마다 두 배
+            timeout (float): HTTP 요청 timeout(초)
         """
         self.webhook_url = webhook_url or os.environ.get('SLACK_WEBHOOK_URL')
         if not self.webhook_url:
             self.__log.warning("Slack webhook URL이 설정되지 않았습니다. 메시지 전송이 불가능합니다.")
+        self.digest_interval = digest_interval
+        self.digest_max_items = digest_max_items
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.__session = requests.Session()
+        self.__session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.__session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.__session.headers.update({'Content-Type': 'application/json'})
+
+        self.__queue = queue.Queue(max_queue)
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__closed = False
+        self.__dropping = False
+        self.__counters = {"enqueued": 0, "dropped": 0, "sent": 0, "failed": 0, "retried": 0, "coalesced": 0}
 
     @classmethod
     def __get_instance(cls):
@@ -28,43 +68,20 @@ class SlackHelper:
         return cls.__instance
 
     def send_message(self, text: str, channel: Optional[str] = None) -> bool:
-        """Slack으로 메시지를 전송합니다.
+        """Slack 전송 큐에 메시지를 넣습니다. 전송은 별도 스레드에서 진행됩니다.
 
         Args:
             text (str): 전송할 메시지
-            channel (str, optional): 메시지를 전송할 ��널. Webhook 설정의 기본 채널이 사용됨
+            channel (str, optional): 메시지를 전송할 채널. Webhook 설정의 기본 채널이 사용됨
 
         Returns:
-            bool: 전송 성공 여부
+            bool: 큐에 들어갔는지 여부 (URL 이 없거나 큐가 가득 차면 False)
         """
-        if not self.webhook_url:
-            self.__log.warning("Slack webhook URL이 설정되지 않아 메시지를 전송할 수 없습니다.")
-            return False
-
-        payload = {
-            "text": text
-        }
-        if channel:
-            payload["channel"] = channel
-
-        try:
-            response = requests.post(
-                self.webhook_url,
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'}
-            )
-            if response.status_code != 200:
-                self.__log.error(f"Slack 메시지 전송 실패: {response.status_code} - {response.text}")
-                return False
-                
-            return True
-        except Exception as e:
-            self.__log.error(f"Slack 메시지 전송 중 오류 발생: {str(e)}")
-            return False
+        return self.__enqueue(("message", text, channel))
 
-    def send_trade_notification(self, trade_type: str, stock_name: str, stock_code: str, 
+    def send_trade_notification(self, trade_type: str, stock_name: str, stock_code: str,
                               price: int, qty: int, profit: Optional[float] = None) -> bool:
-        """매매 알림을 전송합니다.
+        """매매 알림을 전송합니다. digest_interval 동안의 매매 알림은 하나로 묶어서 보냅니다.
 
         Args:
             trade_type (str): 거래 유형 ("매수" 또는 "매도")
@@ -75,33 +92,180 @@ class SlackHelper:
             profit (float, optional): 수익금 (매도 시에만 사용)
 
         Returns:
-            bool: 전송 성공 여부
+            bool: 큐에 들어갔는지 여부
         """
         emoji = "🔵" if trade_type == "매수" else "🔴"
         message = f"{emoji} {trade_type} 체결\n"
         message += f"• 종목: {stock_name}({stock_code})\n"
         message += f"• 가격: {price:,}원\n"
         message += f"• 수량: {qty:,}주\n"
-        
+
         if profit is not None:
             profit_emoji = "💰" if profit > 0 else "💸"
             message += f"• 수익: {profit_emoji} {profit:,.0f}원"
 
-        return self.send_message(message)
+        return self.__enqueue(("trade", message, None))
 
     def send_error_notification(self, error_msg: str, stock_info: Optional[str] = None) -> bool:
-        """에러 알림을 전송합니다.
+        """에러 알림을 전송합니다. 에러는 묶지 않고 바로 보냅니다.
 
         Args:
             error_msg (str): 에러 메시지
             stock_info (str, optional): 종목 정보
 
         Returns:
-            bool: 전송 성공 여부
+            bool: 큐에 들어갔는지 여부
         """
         message = "⚠️ 오류 발생\n"
         if stock_info:
             message += f"• 종목: {stock_info}\n"
         message += f"• 내용: {error_msg}"
-        
-        return self.send_message(message) 
\ No newline at end of file
+
+        return self.send_message(message)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """모아 둔 digest 를 포함해 큐의 메시지를 모두 보낼 때까지 기다립니다.
+
+        Returns:
+            bool: timeout 전에 모두 처리되었는지 여부
+        """
+        if self.__thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self.__queue.put(self.__FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        with self.__queue.all_tasks_done:
+            while self.__queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """남은 메시지를 보내고 전송 스레드를 종료합니다. timeout 은 호출 전체에 적용됩니다."""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+        if self.__thread is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                self.__queue.put(self.__STOP, timeout=timeout)
+            except queue.Full:
+                self.__log.warning("Slack 전송 큐가 비지 않아 남은 메시지를 보내지 못하고 종료합니다.")
+            else:
+                self.__thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self.__session.close()
+
+    def stats(self) -> Dict[str, int]:
+        """전송 통계. enqueued, dropped, sent, failed, retried, coalesced, pending"""
+        with self.__lock:
+            return dict(self.__counters, pending=self.__queue.qsize())
+
+    def __enqueue(self, item) -> bool:
+        if not self.webhook_url:
+            self.__log.warning("Slack webhook URL이 설정되지 않아 메시지를 전송할 수 없습니다.")
+            return False
+        with self.__lock:
+            if self.__closed:
+                return False
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name="SlackNotifier", daemon=True)
+                self.__thread.start()
+        try:
+            self.__queue.put_nowait(item)
+        except queue.Full:
+            self.__count("dropped")
+            if not self.__dropping:
+                # 몰릴 때 경고 로그가 쏟아지지 않도록 큐가 다시 빌 때까지 한 번만 남긴다.
+                self.__dropping = True
+                self.__log.warning("Slack 전송 큐가 가득 차 메시지를 버립니다.")
+            return False
+        self.__dropping = False
+        self.__count("enqueued")
+        return True
+
+    def __run(self):
+        digest: List[str] = list()
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.__queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            try:
+                if item is None or item is self.__FLUSH or item is self.__STOP:
+                    self.__send_digest(digest)
+                    digest, deadline = list(), None
+                    if item is self.__STOP:
+                        return
+                    continue
+
+                kind, text, channel = item
+                if kind == "trade":
+                    digest.append(text)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.digest_interval
+                    if digest.__len__() >= self.digest_max_items:
+                        self.__send_digest(digest)
+                        digest, deadline = list(), None
+                else:
+                    self.__post(text, channel)
+            except Exception as e:
+                self.__log.error(f"Slack 메시지 처리 중 오류 발생: {str(e)}")
+            finally:
+                if item is not None:
+                    self.__queue.task_done()
+
+    def __send_digest(self, digest: List[str]):
+        if digest.__len__() == 0:
+            return
+        if digest.__len__() == 1:
+            self.__post(digest[0], None)
+            return
+        self.__count("coalesced", digest.__len__() - 1)
+        self.__post(f"📊 체결 {digest.__len__()}건\n\n" + "\n\n".join(digest), None)
+
+    def __post(self, text: str, channel: Optional[str]) -> bool:
+        payload = {
+            "text": text
+        }
+        if channel:
+            payload["channel"] = channel
+        data = json.dumps(payload)
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.__session.post(self.webhook_url, data=data, timeout=self.timeout)
+                if response.status_code == 200:
+                    self.__count("sent")
+                    return True
+                self.__log.error(f"Slack 메시지 전송 실패: {response.status_code} - {response.text}")
+                if response.status_code != 429 and response.status_code < 500:
+                    # 잘못된 요청은 다시 보내도 실패한다.
+                    break
+                if str(response.headers.get("Retry-After", "")).isdigit():
+                    retry_after = int(response.headers["Retry-After"])
+            except requests.RequestException as e:
+                self.__log.error(f"Slack 메시지 전송 중 오류 발생: {str(e)}")
+
+            if attempt < self.max_retries:
+                self.__count("retried")
+                if retry_after is not None:
+                    # 서버가 아주 긴 값을 보내도 전송 스레드가 멈춰 있지 않도록 제한한다.
+                    time.sleep(min(retry_after, self.backoff * (2 ** self.max_retries)))
+                else:
+                    time.sleep(self.backoff * (2 ** attempt))
+
+        self.__count("failed")
+        return False
+
+    def __count(self, name: str, n: int = 1):
+        with self.__lock:
+            self.__counters[name] += n
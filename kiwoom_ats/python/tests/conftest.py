@@ -0,0 +1,8 @@
+import os
+import sys
+
+# python.src... 로 import 하고(kiwoom_ats), 가짜 키움 컨트롤(benchmarks/fake_kiwoom)을 쓸 수 있도록 경로를 추가한다.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+for path in (os.path.abspath(os.path.join(_HERE, "..", "..")), os.path.abspath(os.path.join(_HERE, "..", "benchmarks"))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,37 @@
+import logging
+
+import pytest
+
+from python.src.ats.AsyncLogging import configure_async_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = list()
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.mark.parametrize("sampling_level", ["DEBUG", logging.DEBUG])
+def test_sampling_level_accepts_name_or_number(sampling_level):
+    sink = ListHandler()
+    listener = configure_async_logging({
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {"sink": {"()": lambda: sink}},
+        "loggers": {"test.sampling": {"level": "DEBUG", "handlers": ["sink"], "propagate": False}},
+        "sampling": {"test.sampling": 10},
+        "sampling_level": sampling_level,
+    })
+    try:
+        logger = logging.getLogger("test.sampling")
+        for i in range(100):
+            logger.debug(f"tick {i}")
+        logger.info("filled")
+    finally:
+        listener.stop()
+        logging.getLogger("test.sampling").handlers.clear()
+
+    assert sink.messages == [f"tick {i}" for i in range(0, 100, 10)] + ["filled"]
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+
+from python.src.ats.Clock import SimulatedClock
+from python.src.ats.dao.ColumnarTickStore import ColumnarTickStore, ColumnarTickStream
+from python.src.ats.dao.TickStream import TickStream
+
+
+def make_db(path: str, rows, wal: bool = False) -> str:
+    conn = sqlite3.connect(path)
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE back_testing_stock_data (stock_code TEXT, current_price INTEGER, transaction_time TEXT)")
+    conn.executemany("INSERT INTO back_testing_stock_data VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def ticks(stream):
+    result = list()
+    while True:
+        tick = stream.next_tick()
+        if tick is None:
+            return result
+        result.append((tick[0], SimulatedClock.parse(tick[1])))
+
+
+def test_converts_dashed_transaction_time(tmp_path):
+    db_path = make_db(str(tmp_path / "stock_data.db"), [
+        ("233740", -10000, "2024-01-02 09:00:00"),
+        ("233740", 10005, "2024-01-02 09:00:01"),
+        ("233740", -9995, "2024-01-02 09:00:02"),
+        ("251340", 5000, "20240102090000"),
+    ])
+    store = ColumnarTickStore.for_db(db_path)
+    store.convert_from_sqlite(db_path)
+
+    assert store.is_fresh("233740", db_path)
+    assert store.load("233740")[1].tolist() == [20240102090000, 20240102090001, 20240102090002]
+    assert store.load("251340")[1].tolist() == [20240102090000]
+    conn = sqlite3.connect(db_path)
+    assert ticks(ColumnarTickStream(store, "233740")) == ticks(TickStream(conn, "233740"))
+    conn.close()
+
+
+def test_stream_reads_across_batches(tmp_path):
+    rows = [("233740", 10000 + i, f"202401020{9 + i // 3600:01d}{i // 60 % 60:02d}{i % 60:02d}") for i in range(1000)]
+    db_path = make_db(str(tmp_path / "stock_data.db"), rows)
+    store = ColumnarTickStore.for_db(db_path)
+    store.convert_from_sqlite(db_path)
+
+    stream = ColumnarTickStream(store, "233740", batch_size=64)
+    assert stream.peek() == (10000, "20240102090000")
+    assert [tick[0] for tick in ticks(stream)] == list(range(10000, 11000))
+    assert stream.is_exhausted()
+
+
+def test_uncheckpointed_wal_rows_make_store_stale(tmp_path):
+    db_path = make_db(str(tmp_path / "stock_data.db"), [("233740", 10000, "20240102090000")], wal=True)
+    store = ColumnarTickStore.for_db(db_path)
+    store.convert_from_sqlite(db_path)
+
+    # 읽기만 하는 연결이 빈 -wal 을 만들어도 그대로 쓴다.
+    reader = sqlite3.connect(db_path)
+    reader.execute("SELECT COUNT(*) FROM back_testing_stock_data").fetchone()
+    assert store.is_fresh("233740", db_path)
+
+    # 중단된 수집처럼 commit 은 됐지만 checkpoint 전이면 변경은 -wal 에만 있다.
+    db_stat = os.stat(db_path)
+    writer = sqlite3.connect(db_path)
+    writer.execute("PRAGMA wal_autocheckpoint=0")
+    writer.execute("INSERT INTO back_testing_stock_data VALUES ('233740', 10005, '20240102090001')")
+    writer.commit()
+    assert (os.stat(db_path).st_mtime_ns, os.stat(db_path).st_size) == (db_stat.st_mtime_ns, db_stat.st_size)
+    assert not store.is_fresh("233740", db_path)
+    writer.close()
+    reader.close()
+
+
+def test_store_of_another_db_is_not_used(tmp_path):
+    db_path = make_db(str(tmp_path / "stock_data.db"), [("233740", 10000, "20240102090000")])
+    store = ColumnarTickStore.for_db(db_path)
+    store.convert_from_sqlite(db_path)
+    other = str(tmp_path / "other.db")
+    os.replace(db_path, other)
+    make_db(db_path, [("233740", 10000, "20240102090000"), ("233740", 10005, "20240102090001")])
+
+    assert not store.is_fresh("233740", db_path)
+    assert not store.is_fresh("233740", other)
+    assert not store.is_fresh("251340", db_path)
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import synthetic
+from python.src.ats import ConfigParser as config_module
+from python.src.ats.ConfigParser import ConfigParser
+
+LEVELS = [{"name": "S1", "when": "above", "distance": 50, "action": "sell", "qty": 100, "max_lots": 1},
+          {"name": "B2", "when": "below", "distance": 30, "action": "buy", "qty": 100, "max_lots": 1}]
+
+
+@pytest.fixture
+def parser(tmp_path):
+    parser = ConfigParser()
+    parser.FILE_PATH = str(tmp_path / "config_stock.xlsx")
+    parser.STRATEGY_PATH = str(tmp_path / "strategy.json")
+    synthetic.make_config_workbook(parser.FILE_PATH, ["233740", "251340"])
+    return parser
+
+
+@pytest.fixture
+def json_loads(monkeypatch):
+    calls = list()
+    load = json.load
+
+    def counting_load(f, *args, **kwargs):
+        calls.append(f.name)
+        return load(f, *args, **kwargs)
+
+    monkeypatch.setattr(config_module.json, "load", counting_load)
+    return calls
+
+
+def write_strategies(parser, strategies):
+    with open(parser.STRATEGY_PATH, "w", encoding="utf-8") as f:
+        json.dump(strategies, f)
+
+
+def test_strategies_are_parsed_once_per_file_version(parser, json_loads):
+    write_strategies(parser, {"default": {"entry_qty": 100, "levels": LEVELS}})
+
+    for _ in range(5):
+        stocks = parser.load_stock_config()
+        parser.load_back_testing_stock_config()
+    assert json_loads.__len__() == 1
+    assert [stock["strategy"]["entry_qty"] for stock in stocks] == [100, 100]
+
+    write_strategies(parser, {"default": {"entry_qty": 100, "levels": LEVELS},
+                              "233740": {"entry_qty": 200, "levels": LEVELS}})
+    stocks = parser.load_stock_config()
+    assert json_loads.__len__() == 2
+    assert [stock["strategy"]["entry_qty"] for stock in stocks] == [200, 100]
+
+    parser.invalidate()
+    parser.load_stock_config()
+    assert json_loads.__len__() == 3
+
+
+def test_invalid_strategy_is_rejected_on_every_load(parser):
+    write_strategies(parser, {"default": {"entry_qty": 100, "levels": [dict(LEVELS[0], min_lots=2)]}})
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            parser.load_stock_config()
+
+
+def test_missing_strategy_file_uses_b1_s1(parser):
+    stocks = parser.load_stock_config()
+
+    assert [stock["stock_code"] for stock in stocks] == ["233740", "251340"]
+    assert all("strategy" not in stock for stock in stocks)
@@ -0,0 +1,45 @@
+import pytest
+
+from python.src.ats.GridStrategy import GridStrategy
+
+
+def level(**kwargs):
+    return dict({"name": "B2", "when": "below", "distance": 30, "action": "buy", "qty": 100}, **kwargs)
+
+
+def test_max_lots_zero_is_not_unlimited():
+    strategy = GridStrategy([level(min_lots=0, max_lots=0)], entry_qty=100)
+
+    assert strategy.evaluate(9970, 10000, lots=0) == 0
+    assert strategy.evaluate(9970, 10000, lots=1) is None
+    assert strategy.signals([9970], 10000, lots=1).tolist() == [-1]
+    assert strategy.uses_lot_count
+
+
+def test_missing_max_lots_is_unlimited():
+    strategy = GridStrategy([level()], entry_qty=100)
+
+    assert strategy.evaluate(9970, 10000, lots=10 ** 6) == 0
+    assert not strategy.uses_lot_count
+
+
+def test_rejects_max_lots_below_min_lots():
+    with pytest.raises(ValueError):
+        GridStrategy([level(min_lots=2, max_lots=1)], entry_qty=100)
+
+
+def test_evaluate_matches_signals_and_first_level_wins():
+    strategy = GridStrategy([
+        {"name": "S1", "when": "above", "distance": 50, "action": "sell", "qty": 100, "max_lots": 1},
+        {"name": "S3", "when": "above", "distance": 20, "action": "sell", "qty": 100, "min_lots": 2},
+        {"name": "S5", "when": "below", "distance": 60, "action": "sell", "qty": 100, "min_lots": 2},
+        {"name": "B2", "when": "below", "distance": 30, "action": "buy", "qty": 100, "max_lots": 1},
+    ], entry_qty=100)
+    prices = list(range(9900, 10101, 5))
+
+    for lots in (1, 2, 3):
+        expected = [strategy.evaluate(price, 10000, lots) for price in prices]
+        assert strategy.signals(prices, 10000, lots).tolist() == [-1 if row is None else row for row in expected]
+    assert strategy.evaluate(10060, 10000, lots=1) == 0
+    assert strategy.evaluate(10060, 10000, lots=2) == 1
+    assert strategy.evaluate(9930, 10000, lots=2) == 2
@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+
+from python.src.ats.dao.LedgerWriter import LedgerWriter
+
+
+def make_ledger(db_path: str) -> str:
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute('''
+            CREATE TABLE trading_active_stocks (
+                _id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transaction_time DATETIME NOT NULL,
+                stock_code TEXT NOT NULL,
+                trade_price REAL NOT NULL,
+                qty INTEGER NOT NULL,
+                acc_no TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE closed_trades (
+                _id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transaction_time DATETIME NOT NULL,
+                stock_code TEXT NOT NULL,
+                trade_price REAL NOT NULL,
+                qty INTEGER NOT NULL,
+                acc_no TEXT NOT NULL,
+                profit REAL NOT NULL
+            )
+        ''')
+    conn.close()
+    return db_path
+
+
+def read_rows(db_path: str, table: str):
+    # writer 와 다른 새 연결로 읽어서 commit 된 것만 보이게 한다.
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT _id, stock_code, trade_price, qty FROM {table} ORDER BY _id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_rejects_unknown_durability(tmp_path):
+    with pytest.raises(ValueError):
+        LedgerWriter(str(tmp_path / "trading.db"), durability="fast")
+
+
+def test_bad_row_in_batch_falls_back_to_per_row_writes(tmp_path):
+    db_path = make_ledger(str(tmp_path / "trading.db"))
+    writer = LedgerWriter(db_path, commit_interval=1.0)
+
+    writer.open_lot(1, "2024-01-02 09:00:00", "005930", 70000, 1, "1234")
+    writer.open_lot(2, "2024-01-02 09:00:01", "000660", 130000, 2, "1234")
+    # _id 중복: 묶음 전체가 rollback 된다.
+    writer.open_lot(1, "2024-01-02 09:00:02", "035720", 50000, 3, "1234")
+    writer.open_lot(3, "2024-01-02 09:00:03", "035420", 200000, 4, "1234")
+    writer.flush()
+
+    assert read_rows(db_path, "trading_active_stocks") == [
+        (1, "005930", 70000, 1), (2, "000660", 130000, 2), (3, "035420", 200000, 4)]
+    assert writer.commit_count == 1
+    assert writer.write_count == 4
+    writer.close()
+
+
+def test_flush_makes_writes_visible_to_other_connections(tmp_path):
+    db_path = make_ledger(str(tmp_path / "trading.db"))
+    writer = LedgerWriter(db_path)
+
+    writer.open_lot(1, "2024-01-02 09:00:00", "005930", 70000, 1, "1234")
+    writer.open_lot(2, "2024-01-02 09:01:00", "005930", 69000, 1, "1234")
+    writer.close_lot(2, "2024-01-02 09:10:00", "005930", 71000, 1, "1234", 2000.0)
+    writer.flush()
+
+    assert writer.pending() == 0
+    assert read_rows(db_path, "trading_active_stocks") == [(1, "005930", 70000, 1)]
+    assert read_rows(db_path, "closed_trades") == [(2, "005930", 71000, 1)]
+    writer.close()
+
+
+def test_close_commits_queued_writes(tmp_path):
+    db_path = make_ledger(str(tmp_path / "trading.db"))
+    writer = LedgerWriter(db_path, commit_interval=10.0)
+
+    for trade_id in range(1, 101):
+        writer.open_lot(trade_id, "2024-01-02 09:00:00", "005930", 70000 + trade_id, 1, "1234")
+    writer.close()
+    writer.close()
+
+    rows = read_rows(db_path, "trading_active_stocks")
+    assert rows.__len__() == 100
+    assert rows[-1] == (100, "005930", 70100, 1)
+    assert writer.write_count == 100
+
+
+def test_writes_after_close_are_applied_synchronously(tmp_path):
+    db_path = make_ledger(str(tmp_path / "trading.db"))
+    writer = LedgerWriter(db_path)
+    writer.open_lot(1, "2024-01-02 09:00:00", "005930", 70000, 1, "1234")
+    writer.close()
+
+    writer.close_lot(1, "2024-01-02 09:10:00", "005930", 71000, 1, "1234", 1000.0)
+    writer.open_lot(2, "2024-01-02 09:20:00", "000660", 130000, 2, "1234")
+
+    # 큐를 거치지 않고 호출한 스레드에서 바로 commit 된다.
+    assert read_rows(db_path, "closed_trades") == [(1, "005930", 71000, 1)]
+    assert read_rows(db_path, "trading_active_stocks") == [(2, "000660", 130000, 2)]
+    assert writer.pending() == 0
@@ -0,0 +1,82 @@
+import sqlite3
+
+from python.src.ats.dao.PositionBook import PositionBook
+
+
+def make_conn(rows) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute('''
+        CREATE TABLE trading_active_stocks (
+            _id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_time DATETIME NOT NULL,
+            stock_code TEXT NOT NULL,
+            trade_price REAL NOT NULL,
+            qty INTEGER NOT NULL,
+            acc_no TEXT NOT NULL
+        )
+    ''')
+    conn.executemany('''
+        INSERT INTO trading_active_stocks (_id, transaction_time, stock_code, trade_price, qty, acc_no)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+    return conn
+
+
+def test_load_rebuilds_lots_from_trading_active_stocks():
+    conn = make_conn([
+        (3, "2024-01-02 09:30:00", "005930", 69000, 1, "1234"),
+        (1, "2024-01-02 09:00:00", "005930", 70000, 1, "1234"),
+        (2, "2024-01-02 09:10:00", "000660", 130000, 2, "1234"),
+        (4, "2024-01-02 09:40:00", "005930", 71000, 3, "5678"),
+    ])
+    book = PositionBook()
+    book.load(conn)
+
+    # _id 순서대로 쌓이므로 마지막 lot 이 가장 최근 매수다.
+    assert book.lots("1234", "005930") == [(1, "2024-01-02 09:00:00", 70000, 1), (3, "2024-01-02 09:30:00", 69000, 1)]
+    assert book.latest_lot("1234", "005930") == (3, "2024-01-02 09:30:00", 69000, 1)
+    assert book.last_fill_price("1234", "005930") == 69000
+    assert book.lot_count("1234", "000660") == 1
+    assert book.lot_count("5678", "005930") == 1
+    # 계좌와 관계없이 가장 늦게 매수한 lot
+    assert book.latest_trade_price("005930") == 71000
+    assert book.latest_trade_price("035720") is None
+
+
+def test_load_normalizes_numeric_stock_code_and_acc_no():
+    # 엑셀을 거쳐 숫자로 저장된 종목코드/계좌번호
+    conn = make_conn([(1, "2024-01-02 09:00:00", 69500, 10000, 5, 1234)])
+    book = PositionBook()
+    book.load(conn)
+
+    assert book.lot_count("1234", "069500") == 1
+    assert book.lot_count(1234, 69500) == 1
+    assert book.latest_trade_price("069500") == 10000
+
+
+def test_load_replaces_in_memory_state():
+    book = PositionBook()
+    book.add_lot("1234", "000660", (9, "2024-01-01 09:00:00", 120000, 1))
+    book.add_lot("1234", "005930", (10, "2024-01-01 09:00:00", 68000, 1))
+
+    book.load(make_conn([(1, "2024-01-02 09:00:00", "005930", 70000, 1, "1234")]))
+
+    assert book.lot_count("1234", "000660") == 0
+    assert book.last_fill_price("1234", "000660") is None
+    assert book.lots("1234", "005930") == [(1, "2024-01-02 09:00:00", 70000, 1)]
+
+
+def test_pop_after_load_keeps_remaining_lots_and_fill_price():
+    book = PositionBook()
+    book.load(make_conn([
+        (1, "2024-01-02 09:00:00", "005930", 70000, 1, "1234"),
+        (2, "2024-01-02 09:10:00", "005930", 69000, 1, "1234"),
+    ]))
+
+    assert book.pop_latest_lot("1234", "005930", fill_price=71000) == (2, "2024-01-02 09:10:00", 69000, 1)
+    assert book.latest_lot("1234", "005930") == (1, "2024-01-02 09:00:00", 70000, 1)
+    assert book.last_fill_price("1234", "005930") == 71000
+    assert book.pop_latest_lot("1234", "005930") == (1, "2024-01-02 09:00:00", 70000, 1)
+    assert book.pop_latest_lot("1234", "005930") is None
+    assert book.latest_trade_price("005930") is None
@@ -0,0 +1,96 @@
+import sqlite3
+
+from python.src.ats.dao.RunnerJournal import RunnerJournal
+
+
+def stock(stock_code: str, stock_name: str, **extra):
+    config = {
+        "stock_code": stock_code,
+        "stock_name": stock_name,
+        "B1": {"price": 1000, "qty": 1},
+        "S1": {"price": 1100, "qty": 1},
+    }
+    config.update(extra)
+    return config
+
+
+def count_events(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM runner_events").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_record_skips_unchanged_state(tmp_path):
+    db_path = str(tmp_path / "runner_journal.db")
+    journal = RunnerJournal(db_path)
+
+    journal.record(stock("005930", "삼성전자"), 1)
+    journal.record(stock("005930", "삼성전자"), 1)
+    journal.record(stock("005930", "삼성전자"), 0)
+
+    assert count_events(db_path) == 2
+    assert journal.get("005930") == 0
+    journal.close()
+
+
+def test_compact_folds_events_into_snapshot(tmp_path):
+    db_path = str(tmp_path / "runner_journal.db")
+    journal = RunnerJournal(db_path)
+    journal.record(stock("005930", "삼성전자"), 1)
+    journal.record(stock("000660", "SK하이닉스"), 1)
+    journal.record(stock("000660", "SK하이닉스"), 0)
+
+    journal.compact()
+
+    assert count_events(db_path) == 0
+    assert {code: entry["state"] for code, entry in journal.load().items()} == {"005930": 1, "000660": 0}
+    journal.close()
+
+
+def test_warm_start_after_compact_and_uncompacted_events(tmp_path):
+    db_path = str(tmp_path / "runner_journal.db")
+    journal = RunnerJournal(db_path)
+    journal.record(stock("005930", "삼성전자", acc_no="1234"), 1)
+    journal.record(stock("000660", "SK하이닉스"), 1)
+    journal.record(stock("035720", "카카오", strategy={"levels": [], "entry_qty": 2}), 1)
+    journal.compact()
+    # compact 뒤의 이벤트: 000660 은 거래를 마쳤고 035420 은 새로 거래를 시작했다.
+    journal.record(stock("000660", "SK하이닉스"), 0)
+    journal.record(stock("035420", "NAVER"), 1)
+    assert count_events(db_path) == 2
+
+    # close()(compact) 없이 종료된 상황: 같은 파일을 새로 연다.
+    restarted = RunnerJournal(db_path)
+    assert restarted.get("000660") == 0 and restarted.get("035420") == 1
+
+    # 035720 은 엑셀에서 빠졌지만 아직 보유 중이다.
+    sheet = [stock("005930", "삼성전자"), stock("000660", "SK하이닉스"), stock("035420", "NAVER"),
+             stock("051910", "LG화학")]
+    stock_list = restarted.warm_start(sheet)
+
+    states = {config["stock_code"]: config.get("state") for config in stock_list}
+    assert states == {"005930": 1, "000660": None, "035420": 1, "051910": None, "035720": 1}
+    restored = stock_list[-1]
+    assert restored["stock_name"] == "카카오"
+    assert restored["strategy"] == {"levels": [], "entry_qty": 2}
+    assert "acc_no" not in stock_list[0]
+    restarted.close()
+    journal.close()
+
+
+def test_automatic_compact_keeps_latest_state(tmp_path):
+    db_path = str(tmp_path / "runner_journal.db")
+    journal = RunnerJournal(db_path, compact_every=3)
+    for state in (1, 0, 1, 0):
+        journal.record(stock("005930", "삼성전자"), state)
+
+    assert count_events(db_path) == 1
+    journal.close()
+
+    reopened = RunnerJournal(db_path)
+    assert count_events(db_path) == 0
+    assert reopened.get("005930") == 0
+    assert reopened.warm_start([stock("005930", "삼성전자")]) == [stock("005930", "삼성전자")]
+    reopened.close()
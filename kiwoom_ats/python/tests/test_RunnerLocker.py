@@ -0,0 +1,145 @@
+import threading
+import time
+
+from python.src.ats.RunnerLocker import RunnerLocker
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "조건을 기다리다 시간 초과"
+        time.sleep(0.001)
+
+
+def start_waiter(locker: RunnerLocker, holder: str, results: dict, timeout: float = 5.0) -> threading.Thread:
+    '''holder 의 acquire 를 별도 스레드에서 시작하고, 줄에 선 것을 확인한 뒤 반환한다.
+    '''
+    waiting = locker.stats()["waiting"]
+    thread = threading.Thread(target=lambda: results.__setitem__(holder, locker.acquire(holder, timeout)))
+    thread.start()
+    wait_until(lambda: locker.stats()["waiting"] == waiting + 1)
+    return thread
+
+
+def test_limit_holds_under_contention():
+    locker = RunnerLocker(2)
+    guard = threading.Lock()
+    active, peak, granted = [0], [0], [0]
+
+    def runner(name: str):
+        for _ in range(50):
+            assert locker.acquire(name, timeout=10.0)
+            with guard:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                granted[0] += 1
+            time.sleep(0.0002)
+            with guard:
+                active[0] -= 1
+            locker.release(name)
+
+    threads = [threading.Thread(target=runner, args=(f"runner{i}",)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30.0)
+
+    assert peak[0] == 2
+    assert granted[0] == 500
+    stats = locker.stats()
+    assert (stats["occupied"], stats["waiting"], stats["admitted"]) == (0, 0, 500)
+
+
+def test_waiters_are_granted_in_arrival_order():
+    locker = RunnerLocker(1)
+    assert locker.acquire("first")
+    order = list()
+    results = dict()
+
+    def runner(name: str):
+        results[name] = locker.acquire(name, timeout=5.0)
+        order.append(name)
+        locker.release(name)
+
+    names = [f"runner{i}" for i in range(6)]
+    threads = list()
+    for name in names:
+        threads.append(threading.Thread(target=runner, args=(name,)))
+        threads[-1].start()
+        wait_until(lambda: locker.stats()["waiting"] == threads.__len__())
+
+    locker.release("first")
+    for thread in threads:
+        thread.join(5.0)
+
+    assert order == names
+    assert all(results.values())
+
+
+def test_released_slot_is_handed_over_without_barging():
+    locker = RunnerLocker(1)
+    locker.acquire("holder")
+    results = dict()
+    thread = start_waiter(locker, "waiter", results)
+
+    locker.release("holder")
+    # 슬롯은 release 하는 순간 기다리던 러너에게 넘어가므로 새로 온 러너가 가로챌 수 없다.
+    assert not locker.try_acquire("newcomer")
+    thread.join(5.0)
+    assert results["waiter"] and locker.is_holding("waiter")
+
+
+def test_same_holder_uses_one_slot():
+    locker = RunnerLocker(2)
+
+    assert locker.acquire("a") and locker.acquire("a") and locker.try_acquire("a")
+    assert locker.try_acquire("b")
+    assert locker.stats()["occupied"] == 2
+    locker.release("a")
+    locker.release("a")
+    assert locker.stats()["occupied"] == 1
+
+
+def test_timeout_removes_waiter():
+    locker = RunnerLocker(1)
+    locker.acquire("holder")
+
+    assert not locker.acquire("late", timeout=0.05)
+    assert locker.stats()["waiting"] == 0
+    locker.release("holder")
+    assert not locker.is_holding("late")
+    assert locker.try_acquire("next")
+
+
+def test_cancel_ends_waiting_acquire():
+    locker = RunnerLocker(1)
+    locker.acquire("holder")
+    results = dict()
+    thread = start_waiter(locker, "waiter", results)
+
+    locker.cancel("waiter")
+    thread.join(5.0)
+
+    assert results["waiter"] is False
+    assert locker.stats()["waiting"] == 0
+    locker.release("holder")
+    assert locker.stats()["occupied"] == 0
+
+
+def test_restore_over_admits_and_new_runners_wait_until_below_capacity():
+    locker = RunnerLocker(1)
+    locker.acquire("a")
+    locker.restore("b")
+    assert locker.is_holding("a") and locker.is_holding("b")
+    assert locker.stats()["occupied"] == 2
+
+    results = dict()
+    thread = start_waiter(locker, "c", results)
+    locker.release("a")
+    # 아직 b 가 한도를 채우고 있으므로 c 는 계속 기다린다.
+    time.sleep(0.05)
+    assert "c" not in results and locker.stats()["waiting"] == 1
+
+    locker.release("b")
+    thread.join(5.0)
+    assert results["c"] and locker.stats()["occupied"] == 1
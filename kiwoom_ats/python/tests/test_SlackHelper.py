@@ -0,0 +1,134 @@
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from python.src.utils.SlackHelper import SlackHelper
+
+
+class WebhookStub():
+    '''Slack Webhook 대신 응답하는 로컬 HTTP 서버. responses 의 (상태 코드, 헤더) 를 차례로 돌려주고,
+    다 쓰면 200 을 돌려준다. release 가 set 될 때까지 응답을 미룰 수 있다.
+    '''
+
+    def __init__(self):
+        self.responses = list()
+        self.received = list()
+        self.release = threading.Event()
+        self.release.set()
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.release.wait(5.0)
+                stub.received.append(json.loads(body)["text"])
+                status, headers = stub.responses.pop(0) if stub.responses else (200, dict())
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = WebhookStub()
+    yield stub
+    stub.close()
+
+
+def make_helper(stub, **kwargs) -> SlackHelper:
+    kwargs.setdefault("backoff", 0.01)
+    kwargs.setdefault("digest_interval", 10.0)
+    return SlackHelper(stub.url, **kwargs)
+
+
+def test_retries_429_and_5xx_and_caps_retry_after(stub):
+    stub.responses = [(500, dict()), (429, {"Retry-After": "3600"}), (200, dict())]
+    helper = make_helper(stub, max_retries=3)
+
+    started = time.monotonic()
+    assert helper.send_message("hello")
+    assert helper.flush(timeout=5.0)
+    elapsed = time.monotonic() - started
+    helper.close(timeout=1.0)
+
+    assert stub.received == ["hello"] * 3
+    # Retry-After 3600 은 backoff * 2^max_retries(0.08초) 로 줄어든다.
+    assert elapsed < 1.0
+    stats = helper.stats()
+    assert (stats["sent"], stats["retried"], stats["failed"]) == (1, 2, 0)
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.responses = [(503, dict())] * 10
+    helper = make_helper(stub, max_retries=2)
+
+    helper.send_message("down")
+    assert helper.flush(timeout=5.0)
+    helper.close(timeout=1.0)
+
+    assert stub.received.__len__() == 3
+    stats = helper.stats()
+    assert (stats["sent"], stats["retried"], stats["failed"]) == (0, 2, 1)
+
+
+def test_client_error_is_not_retried(stub):
+    stub.responses = [(400, dict())]
+    helper = make_helper(stub, max_retries=3)
+
+    helper.send_message("bad")
+    assert helper.flush(timeout=5.0)
+    helper.close(timeout=1.0)
+
+    assert stub.received == ["bad"]
+    stats = helper.stats()
+    assert (stats["retried"], stats["failed"]) == (0, 1)
+
+
+def test_drops_when_queue_is_full(stub):
+    stub.release.clear()
+    helper = make_helper(stub, max_queue=2)
+
+    results = [helper.send_message(f"m{i}") for i in range(10)]
+    assert helper.flush(timeout=0.1) is False
+    stub.release.set()
+    assert helper.flush(timeout=5.0)
+    helper.close(timeout=1.0)
+
+    stats = helper.stats()
+    assert results.count(False) == stats["dropped"] > 0
+    assert stats["enqueued"] == results.count(True) == stats["sent"] == stub.received.__len__()
+    assert stub.received == sorted(stub.received, key=lambda text: int(text[1:]))
+
+
+def test_coalesces_trade_notifications(stub):
+    helper = make_helper(stub, digest_max_items=3)
+
+    for i in range(4):
+        helper.send_trade_notification("매수", "삼성전자", "005930", 70000 + i, 1)
+    assert helper.flush(timeout=5.0)
+    helper.close(timeout=1.0)
+
+    # 3건이 모이면 하나로 보내고, 남은 1건은 flush 때 그대로 보낸다.
+    assert stub.received.__len__() == 2
+    assert stub.received[0].startswith("📊 체결 3건")
+    assert "70,003원" in stub.received[1] and "체결 3건" not in stub.received[1]
+    stats = helper.stats()
+    assert (stats["enqueued"], stats["sent"], stats["coalesced"]) == (4, 2, 2)
@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from python.src.ats.dao.TrRequestRegistry import TrRequestRegistry
+
+
+def test_same_key_fails_fast_by_default():
+    registry = TrRequestRegistry()
+    registry.register("2000", "opw00001_req", [], [])
+
+    with pytest.raises(TimeoutError):
+        registry.register("2000", "opw00001_req", [], [])
+    assert registry.register("2001", "opw00001_req", [], []).key == ("2001", "opw00001_req")
+
+
+def test_same_key_waits_until_previous_request_resolves():
+    registry = TrRequestRegistry()
+    first = registry.register("2000", "opw00001_req", [], [])
+    registered = list()
+    waiter = threading.Thread(target=lambda: registered.append(registry.register("2000", "opw00001_req", [], [],
+                                                                                   timeout=5.0)))
+    waiter.start()
+
+    registry.resolve(first, {"single_data": {}})
+    waiter.join(5.0)
+
+    assert first.future.result(0) == {"single_data": {}}
+    assert registered.__len__() == 1 and registered[0] is not first
+    assert registry.get("2000", "opw00001_req") is registered[0]
+
+
+def test_same_key_wait_is_bounded():
+    registry = TrRequestRegistry()
+    registry.register("2000", "opw00001_req", [], [])
+
+    with pytest.raises(TimeoutError):
+        registry.register("2000", "opw00001_req", [], [], timeout=0.05)
+    assert registry.in_flight() == 1
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+import fake_kiwoom
+from python.src.ats.dao.TrRequestScheduler import TrRequestScheduler
+
+
+class VirtualClock():
+    '''스케줄러와 가짜 서버가 같이 쓰는 시계. sleep 은 기다리지 않고 시각만 옮긴다.
+    '''
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = list()
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def ocx(clock):
+    ocx = fake_kiwoom.FakeOpenAPI("KHOPENAPI.KHOpenAPICtrl.1")
+    ocx.clock = clock.time
+    yield ocx
+    fake_kiwoom._events.clear()
+
+
+def request(ocx):
+    return lambda: ocx.dynamicCall("CommRqData(QString, QString, int, QString)", "opt10001_req", "opt10001", 0, "2000")
+
+
+def assert_within(accepted, limit: int, period: float):
+    for first, last in zip(accepted, accepted[limit:]):
+        assert last - first >= period - 1e-9
+
+
+def test_stays_within_kiwoom_limits(clock, ocx):
+    scheduler = TrRequestScheduler(clock=clock.time, sleep=clock.sleep)
+
+    results = [scheduler.execute(request(ocx)) for _ in range(1005)]
+
+    assert set(results) == {0}
+    assert ocx.calls["overloaded"] == 0
+    assert_within(ocx.accepted, 5, 1.0)
+    assert_within(ocx.accepted, 1000, 3600.0)
+    # 1초에 5건씩 1000건은 200초 동안 나가고, 1001번째는 첫 요청 1시간 뒤에야 나간다.
+    assert ocx.accepted[999] - ocx.accepted[0] == pytest.approx(199.0)
+    assert ocx.accepted[1000] - ocx.accepted[0] == pytest.approx(3600.0)
+    metrics = scheduler.metrics()
+    assert metrics["sent"] == 1005
+    assert metrics["overloaded"] == 0
+
+
+def test_overload_backs_off_and_retries(clock, ocx):
+    # 다른 프로그램과 계정을 같이 써서 서버 쪽 제한이 스케줄러보다 빡빡한 경우
+    ocx.rate_limits = ((2, 1.0),)
+    scheduler = TrRequestScheduler(limits=((5, 1.0),), backoff=0.5, max_backoff=8.0,
+                                   clock=clock.time, sleep=clock.sleep)
+
+    results = [scheduler.execute(request(ocx)) for _ in range(10)]
+
+    assert set(results) == {0}
+    assert ocx.accepted.__len__() == 10
+    assert_within(ocx.accepted, 2, 1.0)
+    metrics = scheduler.metrics()
+    assert metrics["overloaded"] == ocx.calls["overloaded"] > 0
+    assert metrics["failed"] == 0
+    assert ocx.calls["CommRqData"] == 10 + ocx.calls["overloaded"]
+    # 세 번째 요청: 0.5초 후 재시도도 거절되고, 두 배(1초) 기다린 뒤 성공한다.
+    assert clock.sleeps[:2] == [0.5, 1.0]
+
+
+def test_gives_up_after_max_retries(clock, ocx):
+    ocx.rate_limits = ((0, 1.0),)
+    scheduler = TrRequestScheduler(max_retries=3, backoff=0.5, max_backoff=1.0, clock=clock.time, sleep=clock.sleep)
+
+    assert scheduler.execute(request(ocx)) == TrRequestScheduler.OVERLOAD
+    assert ocx.calls["CommRqData"] == 4
+    assert clock.sleeps == [0.5, 1.0, 1.0]
+    metrics = scheduler.metrics()
+    assert metrics["overloaded"] == 4
+    assert metrics["failed"] == 1
+
+
+def test_main_thread_keeps_processing_events_behind_runner_request():
+    # 러너 요청이 조회 제한 때문에 기다리는 동안 그 뒤에 줄 선 메인 스레드 요청도 qWait 로 이벤트를 처리해야 한다.
+    main = threading.main_thread()
+    main_waits = list()  # (시각, 대기 시간)
+
+    def sleep(seconds: float):
+        if threading.current_thread() is main:
+            main_waits.append((time.monotonic(), seconds))
+            fake_kiwoom.process_events()
+        time.sleep(seconds)
+
+    scheduler = TrRequestScheduler(limits=((1, 0.3),), sleep=sleep)
+    sent = dict()
+
+    def stamp(name: str):
+        def request():
+            sent[name] = time.monotonic()
+            return 0
+        return request
+
+    def runner():
+        scheduler.execute(stamp("runner_first"))
+        scheduler.execute(stamp("runner_second"))
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    while scheduler.metrics()["queue_depth"] == 0 and thread.is_alive():
+        time.sleep(0.001)
+    ticks = list()
+    for i in range(20):
+        fake_kiwoom.post_event(lambda i=i: ticks.append(i))
+
+    scheduler.execute(stamp("main"), TrRequestScheduler.PRIORITY_BACKGROUND)
+    thread.join(5.0)
+
+    assert sent["runner_first"] < sent["runner_second"] < sent["main"]
+    # 러너의 두 번째 요청이 나가기 전에도 메인 스레드는 짧게 나눠 기다리며 이벤트를 처리했다.
+    queued = [seconds for at, seconds in main_waits if at < sent["runner_second"]]
+    assert queued.__len__() >= 2
+    assert max(queued) <= TrRequestScheduler.QUEUE_POLL
+    assert ticks == list(range(20))